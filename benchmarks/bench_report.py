@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Benchmark da geração de relatórios sobre repositórios sintéticos.
+
+Para cada escala (ver `synthetic_repo.SCALES`) monta um repositório com
+`git fast-import`, instala o Review Kit e mede cada motor de relatório:
+
+- `sh`: o script gerado `git-relatorio.sh` (bash);
+- `ps`: o script gerado `git-relatorio.ps1` (pwsh; ignorado se ausente);
+- `native`: `review-cli report --no-cache`;
+- `native-cold`: `review-cli report` com as opções padrão e `diffs/.cache`
+  apagado antes de cada execução;
+- `native-warm`: `review-cli report` com as opções padrão depois de uma
+  execução de aquecimento (acerto de cache).
+
+Por execução registra tempo de parede, pico de RSS (via `os.wait4`, incluindo
+os processos git aguardados) e tamanho do relatório. No Linux o pico herda o
+RSS do próprio harness no fork; esse piso é medido com `true` e gravado em
+`meta.rss_floor_bytes` (valores iguais ao piso significam "abaixo do piso").
+Os resultados vão para um JSON comparável; `--baseline` falha se a mediana
+de algum motor piorar além de `--max-regression`.
+
+Uso:
+    python benchmarks/bench_report.py [--scales small,medium] [--engines sh,native]
+        [--runs 3] [--output bench.json] [--baseline anterior.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SRC_DIR = ROOT_DIR / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from synthetic_repo import SCALES, TARGET_BRANCH, Scale, build_repo  # noqa: E402
+
+ENGINES = ("sh", "ps", "native", "native-cold", "native-warm")
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+    return env
+
+
+def install_kit(repo: Path) -> None:
+    """Grava os dois scripts do Review Kit no repositório (sem passar pelo `init`)."""
+    from code_review import render_kit
+
+    for script in ("sh", "ps"):
+        for item in render_kit("generic", script)["files"]:
+            if item["step"] != "script":
+                continue
+            path = repo / item["path"]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(item["payload"])
+            if item["executable"]:
+                path.chmod(0o755)
+
+
+def engine_command(engine: str, repo: Path) -> list[str] | None:
+    scripts = repo / ".code_review" / "scripts"
+    if engine == "sh":
+        return ["bash", str(scripts / "git-relatorio.sh"), TARGET_BRANCH]
+    if engine == "ps":
+        pwsh = shutil.which("pwsh")
+        if not pwsh:
+            return None
+        return [pwsh, "-NoProfile", "-NonInteractive", "-File", str(scripts / "git-relatorio.ps1"), TARGET_BRANCH]
+    if engine == "native":
+        return [sys.executable, "-c", "import code_review; code_review.main()", "report", TARGET_BRANCH, "--no-cache"]
+    if engine in ("native-cold", "native-warm"):
+        return [sys.executable, "-c", "import code_review; code_review.main()", "report", TARGET_BRANCH]
+    raise ValueError(f"Motor desconhecido: {engine}")
+
+
+def report_path(repo: Path) -> Path:
+    return repo / "diffs" / f"relatorio_diff_{TARGET_BRANCH.replace('/', '-')}.md"
+
+
+def run_once(command: list[str], repo: Path) -> dict:
+    """Executa um motor e devolve tempo, pico de RSS e tamanho do relatório."""
+    output = report_path(repo)
+    output.unlink(missing_ok=True)
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=repo, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr = proc.stderr.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{command[0]} saiu com {proc.returncode}: {stderr.decode(errors='replace')[-500:]}")
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS
+    rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return {
+        "wall_s": round(wall, 4),
+        "peak_rss_bytes": rss,
+        "output_bytes": output.stat().st_size if output.exists() else 0,
+    }
+
+
+def rss_floor() -> int:
+    """Pico de RSS de um processo trivial: o mínimo que `os.wait4` consegue reportar aqui."""
+    true = shutil.which("true") or "true"
+    proc = subprocess.Popen([true])
+    _, _, usage = os.wait4(proc.pid, 0)
+    proc.returncode = 0
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+
+def _median(values: list[float]) -> float:
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def bench_scale(scale: Scale, engines: list[str], runs: int, workdir: Path) -> list[dict]:
+    repo = workdir / scale.name
+    if repo.exists():
+        shutil.rmtree(repo)
+    start = time.perf_counter()
+    build_repo(repo, scale)
+    install_kit(repo)
+    print(f"[{scale.name}] repositório pronto em {time.perf_counter() - start:.1f}s")
+
+    results = []
+    for engine in engines:
+        command = engine_command(engine, repo)
+        if command is None:
+            print(f"[{scale.name}] {engine}: ignorado (interpretador ausente)")
+            results.append({"scale": scale.name, "engine": engine, "skipped": True})
+            continue
+        if engine == "native-warm":
+            run_once(command, repo)
+        samples = []
+        for _ in range(runs):
+            if engine == "native-cold":
+                shutil.rmtree(repo / "diffs" / ".cache", ignore_errors=True)
+            samples.append(run_once(command, repo))
+        result = {
+            "scale": scale.name,
+            "engine": engine,
+            "runs": samples,
+            "median_wall_s": _median([s["wall_s"] for s in samples]),
+            "max_peak_rss_bytes": max(s["peak_rss_bytes"] for s in samples),
+            "output_bytes": samples[-1]["output_bytes"],
+        }
+        print(
+            f"[{scale.name}] {engine}: {result['median_wall_s']:.3f}s, "
+            f"RSS {result['max_peak_rss_bytes'] / 2**20:.1f} MiB, "
+            f"saída {result['output_bytes'] / 2**10:.0f} KiB"
+        )
+        results.append(result)
+    return results
+
+
+def compare(results: list[dict], baseline_path: Path, max_regression: float) -> list[str]:
+    """Regressões de tempo mediano frente a um JSON anterior do mesmo harness."""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    previous = {
+        (r["scale"], r["engine"]): r for r in baseline.get("results", []) if not r.get("skipped")
+    }
+    problems = []
+    for result in results:
+        old = previous.get((result["scale"], result["engine"]))
+        if result.get("skipped") or old is None:
+            continue
+        limit = old["median_wall_s"] * (1 + max_regression)
+        if result["median_wall_s"] > limit:
+            problems.append(
+                f"{result['scale']}/{result['engine']}: {result['median_wall_s']:.3f}s "
+                f"(antes {old['median_wall_s']:.3f}s, limite {limit:.3f}s)"
+            )
+    return problems
+
+
+def _git_version() -> str:
+    return subprocess.run(["git", "--version"], capture_output=True, text=True, check=True).stdout.strip()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="small,medium", help=f"Escalas: {', '.join(SCALES)}")
+    parser.add_argument("--engines", default=",".join(ENGINES), help=f"Motores: {', '.join(ENGINES)}")
+    parser.add_argument("--runs", type=int, default=3, help="Execuções por motor (usa a mediana)")
+    parser.add_argument("--output", type=Path, default=Path("bench-report.json"))
+    parser.add_argument("--workdir", type=Path, help="Onde criar os repositórios (padrão: diretório temporário)")
+    parser.add_argument("--baseline", type=Path, help="JSON anterior para comparação")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Piora tolerada (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    scales = [SCALES[name] for name in args.scales.split(",") if name]
+    engines = [name for name in args.engines.split(",") if name]
+    for engine in engines:
+        if engine not in ENGINES:
+            parser.error(f"motor desconhecido: {engine}")
+
+    from code_review.version import get_app_version
+
+    with tempfile.TemporaryDirectory(prefix="review-bench-") as tmp:
+        workdir = args.workdir or Path(tmp)
+        results = []
+        for scale in scales:
+            results.extend(bench_scale(scale, engines, max(args.runs, 1), workdir))
+
+    payload = {
+        "meta": {
+            "version": get_app_version(),
+            "python": platform.python_version(),
+            "git": _git_version(),
+            "platform": platform.platform(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "runs": args.runs,
+            "rss_floor_bytes": rss_floor(),
+            "scales": {scale.name: scale.as_dict() for scale in scales},
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    print(f"Resultados em {args.output}")
+
+    if args.baseline:
+        problems = compare(results, args.baseline, args.max_regression)
+        for problem in problems:
+            print(f"[ERR] regressão: {problem}")
+        if problems:
+            return 1
+        print("[OK] sem regressões frente ao baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Repositórios git sintéticos para os benchmarks de relatório.
+
+O repositório é montado por um único `git fast-import` (sem checkout nem um
+processo por commit), com escala controlada: arquivos alterados, hunks por
+arquivo, linhas por hunk, commits, blobs binários e renames. A mesma escala e
+a mesma semente geram sempre o mesmo histórico.
+
+Estrutura gerada:
+- `main` (e `origin/main`): commit base com todos os arquivos;
+- `feature/bench`: `commits` commits que alteram os arquivos em rodízio,
+  renomeiam `renames` arquivos e reescrevem os blobs binários.
+"""
+
+from __future__ import annotations
+
+import random
+import subprocess
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+BASE_BRANCH = "main"
+TARGET_BRANCH = "feature/bench"
+# Linhas intactas entre hunks: acima de 2x o contexto padrão (3), então os hunks não se fundem
+HUNK_GAP = 10
+BINARY_SIZE = 16 * 1024
+COMMITTER = b"Bench <bench@example.com>"
+EPOCH = 1_700_000_000
+
+
+@dataclass(frozen=True)
+class Scale:
+    name: str
+    files: int
+    hunks_per_file: int
+    lines_per_hunk: int
+    commits: int
+    binaries: int
+    renames: int
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+SCALES = {
+    "small": Scale("small", files=50, hunks_per_file=2, lines_per_hunk=5, commits=5, binaries=2, renames=2),
+    "medium": Scale("medium", files=500, hunks_per_file=3, lines_per_hunk=10, commits=20, binaries=10, renames=20),
+    "large": Scale("large", files=5000, hunks_per_file=3, lines_per_hunk=20, commits=50, binaries=50, renames=100),
+}
+
+
+def _text_file(index: int, scale: Scale, revision: int) -> bytes:
+    """Conteúdo do arquivo de texto `index`; `revision > 0` altera as linhas de cada hunk."""
+    lines = []
+    for hunk in range(scale.hunks_per_file):
+        for gap in range(HUNK_GAP):
+            lines.append(f"contexto {index}.{hunk}.{gap}\n")
+        for line in range(scale.lines_per_hunk):
+            if revision:
+                lines.append(f"valor alterado {index}.{hunk}.{line} r{revision}\n")
+            else:
+                lines.append(f"valor original {index}.{hunk}.{line}\n")
+    lines.append(f"fim {index}\n")
+    return "".join(lines).encode("utf-8")
+
+
+def _data(payload: bytes) -> bytes:
+    return b"data %d\n%s\n" % (len(payload), payload)
+
+
+def _commit(ref: str, mark: int, message: str, changes: list[bytes], parent: int = 0) -> bytes:
+    out = [
+        b"commit %s\n" % ref.encode(),
+        b"mark :%d\n" % mark,
+        b"committer %s %d +0000\n" % (COMMITTER, EPOCH + mark),
+        _data(message.encode("utf-8")),
+    ]
+    if parent:
+        out.append(b"from :%d\n" % parent)
+    out.extend(changes)
+    out.append(b"\n")
+    return b"".join(out)
+
+
+def _modify(path: str, payload: bytes, mode: str = "100644") -> bytes:
+    return b"M %s inline %s\n%s" % (mode.encode(), path.encode("utf-8"), _data(payload))
+
+
+def text_path(index: int) -> str:
+    return f"src/mod{index // 100:03d}/arquivo_{index:05d}.txt"
+
+
+def build_fast_import_stream(scale: Scale, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    chunks = []
+
+    # Commit base: arquivos alterados, origens dos renames e binários
+    base = [_modify(text_path(i), _text_file(i, scale, 0)) for i in range(scale.files)]
+    base += [_modify(f"renomear/antigo_{i:04d}.txt", _text_file(-i - 1, scale, 0)) for i in range(scale.renames)]
+    base += [_modify(f"assets/blob_{i:04d}.bin", rng.randbytes(BINARY_SIZE)) for i in range(scale.binaries)]
+    base.append(_modify("README.md", b"# Repo sintetico\n"))
+    chunks.append(_commit(f"refs/heads/{BASE_BRANCH}", 1, "base", base))
+    chunks.append(b"reset refs/remotes/origin/%s\nfrom :1\n\n" % BASE_BRANCH.encode())
+
+    commits = max(scale.commits, 1)
+    for number in range(commits):
+        changes = []
+        for i in range(number, scale.files, commits):
+            changes.append(_modify(text_path(i), _text_file(i, scale, number + 1)))
+        if number == 0:
+            for i in range(scale.renames):
+                changes.append(b"R renomear/antigo_%04d.txt renomeado/novo_%04d.txt\n" % (i, i))
+        if number == commits - 1:
+            for i in range(scale.binaries):
+                changes.append(_modify(f"assets/blob_{i:04d}.bin", rng.randbytes(BINARY_SIZE)))
+        mark = number + 2
+        chunks.append(_commit(f"refs/heads/{TARGET_BRANCH}", mark, f"commit {number + 1}", changes, parent=mark - 1))
+    return b"".join(chunks)
+
+
+def build_repo(path: Path, scale: Scale, seed: int = 0) -> Path:
+    """Cria (ou recria) o repositório sintético em `path`."""
+    path.mkdir(parents=True, exist_ok=True)
+    subprocess.run(["git", "init", "-q", "-b", BASE_BRANCH, str(path)], check=True)
+    subprocess.run(
+        ["git", "fast-import", "--quiet", "--force"],
+        cwd=path,
+        input=build_fast_import_stream(scale, seed),
+        check=True,
+    )
+    return path
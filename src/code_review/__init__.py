@@ -13,39 +13,34 @@ Review CLI - Ferramenta de Setup para Code Reviews Automatizados (Multi-Platafor
 Uso:
     uvx src/code_review/__init__.py init
     uvx src/code_review/__init__.py init --here
+    uvx src/code_review/__init__.py report feature/minha-branch
 """
 
-import hashlib
 import os
 import sys
 import time
-import platform
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
-
-from importlib import metadata
+from typing import TYPE_CHECKING, Optional
 
 import typer
-import readchar
-from rich.console import Console
-from rich.panel import Panel
-from rich.live import Live
-from rich.text import Text
-from rich.align import Align
-from rich.tree import Tree
-from rich.table import Table
 from typer.core import TyperGroup
 
+# Importações pesadas (rich, readchar, motor de relatório) e as usadas por um
+# só comando (json, hashlib, histórico, manifesto do kit) ficam dentro das
+# funções que as usam: cada comando paga só pelo que usa.
+# Verifique com `python tools/check_import_time.py`.
 from code_review.powershell_utils import (
     ensure_utf8_bom,
     format_ascii_log,
     sanitize_branch_name,
 )
+from code_review.version import get_app_version
+
+if TYPE_CHECKING:
+    from code_review.report import ReportOptions
 
-try:
-    APP_VERSION = metadata.version("review-cli")
-except metadata.PackageNotFoundError:
-    APP_VERSION = "0.0.0-dev"
+APP_VERSION = get_app_version()
 
 # --- CONFIGURAÇÃO DOS AGENTES (Mapeamento de Pastas) ---
 
@@ -102,6 +97,9 @@ fi
 BRANCH_ALVO=$1
 BRANCH_BASE="main" # Altere para 'master' se necessário
 
+# Filtro de caminhos compilado de .code_review/config.toml (regenere com `review-cli init`)
+PATHSPEC=(__PATHSPEC_SH__)
+
 # --- CONFIGURAÇÃO DE DIRETÓRIO ---
 
 # Obtém o caminho absoluto de onde ESTE script está salvo
@@ -131,7 +129,7 @@ echo "🔄 Processando alterações entre '$BRANCH_BASE' e '$BRANCH_ALVO'..."
     echo ""
     echo "## 📂 Arquivos Alterados"
     echo ""
-    git diff --name-only "origin/$BRANCH_BASE".."$BRANCH_ALVO" -- . ':(exclude)*.md' | sed 's/^/- /'
+    git diff --name-only "origin/$BRANCH_BASE".."$BRANCH_ALVO" -- "${PATHSPEC[@]}" | sed 's/^/- /'
     echo ""
     echo "## 📝 Histórico de Commits"
     echo ""
@@ -140,7 +138,7 @@ echo "🔄 Processando alterações entre '$BRANCH_BASE' e '$BRANCH_ALVO'..."
     echo "## 💻 Detalhes do Código (Diff)"
     echo ""
     echo "\`\`\`diff"
-    git diff "origin/$BRANCH_BASE"..."$BRANCH_ALVO" -- . ':(exclude)*.md' | grep -v '^-[^-]'
+    git diff "origin/$BRANCH_BASE"..."$BRANCH_ALVO" -- "${PATHSPEC[@]}" | grep -v '^-[^-]'
     echo "\`\`\`"
 } > "$ARQUIVO_SAIDA"
 
@@ -164,6 +162,9 @@ param(
     [string]$BranchBase = "main"
 )
 
+# Filtro de caminhos compilado de .code_review/config.toml (regenere com `review-cli init`)
+$Pathspec = @(__PATHSPEC_PS__)
+
 Set-StrictMode -Version Latest
 $ErrorActionPreference = "Stop"
 
@@ -198,44 +199,64 @@ try {{
     $Projeto = Split-Path -Leaf (Get-Location)
     $Agora = Get-Date -Format "yyyy-MM-dd HH:mm:ss"
 
-    $Content = @(
-        "# Relatório de Alterações: $BranchAlvo",
-        "**Projeto:** $Projeto",
-        "**Gerado em:** $Agora",
-        "**Branch Base:** $BranchBase",
-        "**Branch Alvo:** $BranchAlvo",
-        "",
-        "---",
-        "",
-        "## Arquivos Alterados",
-        ""
-    )
-
-    $DiffFiles = git diff --name-only "origin/$BranchBase..$BranchAlvo" -- . ':(exclude)*.md'
-    if ($DiffFiles) {{
-        $Content += $DiffFiles | ForEach-Object {{ "- $_" }}
-    }} else {{
-        $Content += "- Nenhum arquivo alterado"
-    }}
-
-    $Content += @("", "## Histórico de Commits", "")
-    $Commits = git log --no-merges --oneline "origin/$BranchBase..$BranchAlvo"
-    if ($Commits) {{
-        $Content += $Commits | ForEach-Object {{ "- $_" }}
-    }} else {{
-        $Content += "- Nenhum commit encontrado"
+    # Grava em streaming: cada linha vai direto para o disco assim que o git a produz.
+    # Out-File -Encoding utf8 grava BOM no PowerShell 5.1 e não grava no 7+; mantemos o mesmo.
+    $ComBom = $PSVersionTable.PSVersion.Major -lt 6
+    $Encoding = New-Object System.Text.UTF8Encoding($ComBom)
+    $Writer = New-Object System.IO.StreamWriter([System.IO.Path]::GetFullPath($ArquivoSaida), $false, $Encoding)
+    $Estado = @{{ Linhas = 0 }}
+
+    try {{
+        $Writer.WriteLine("# Relatório de Alterações: $BranchAlvo")
+        $Writer.WriteLine("**Projeto:** $Projeto")
+        $Writer.WriteLine("**Gerado em:** $Agora")
+        $Writer.WriteLine("**Branch Base:** $BranchBase")
+        $Writer.WriteLine("**Branch Alvo:** $BranchAlvo")
+        $Writer.WriteLine("")
+        $Writer.WriteLine("---")
+        $Writer.WriteLine("")
+        $Writer.WriteLine("## Arquivos Alterados")
+        $Writer.WriteLine("")
+
+        $Estado.Linhas = 0
+        git diff --name-only "origin/$BranchBase..$BranchAlvo" -- $Pathspec | ForEach-Object {{
+            $Writer.WriteLine("- $_")
+            $Estado.Linhas++
+        }}
+        if ($Estado.Linhas -eq 0) {{
+            $Writer.WriteLine("- Nenhum arquivo alterado")
+        }}
+
+        $Writer.WriteLine("")
+        $Writer.WriteLine("## Histórico de Commits")
+        $Writer.WriteLine("")
+        $Estado.Linhas = 0
+        git log --no-merges --oneline "origin/$BranchBase..$BranchAlvo" | ForEach-Object {{
+            $Writer.WriteLine("- $_")
+            $Estado.Linhas++
+        }}
+        if ($Estado.Linhas -eq 0) {{
+            $Writer.WriteLine("- Nenhum commit encontrado")
+        }}
+
+        $Writer.WriteLine("")
+        $Writer.WriteLine("## Detalhes do Código (Diff)")
+        $Writer.WriteLine("")
+        $Writer.WriteLine('```diff')
+        $Estado.Linhas = 0
+        git diff "origin/$BranchBase...$BranchAlvo" -- $Pathspec | ForEach-Object {{
+            $Writer.WriteLine($_)
+            $Estado.Linhas++
+        }}
+        if ($Estado.Linhas -eq 0) {{
+            $Writer.WriteLine("# Nenhum diff gerado")
+        }}
+        $Writer.WriteLine('```')
     }}
-
-    $Content += @("", "## Detalhes do Código (Diff)", "", '```diff')
-    $DiffOutput = git diff "origin/$BranchBase...$BranchAlvo" -- . ':(exclude)*.md'
-    if ($DiffOutput) {{
-        $Content += $DiffOutput
-    }} else {{
-        $Content += "# Nenhum diff gerado"
+    finally {{
+        $Writer.Dispose()
     }}
-    $Content += '```'
 
-    $Content | Out-File -FilePath $ArquivoSaida -Encoding utf8 -Force
     Write-Host ('Relatório salvo: ' + $ArquivoSaida) -ForegroundColor Green
 }}
 catch {{
@@ -259,6 +280,8 @@ Você é um Engenheiro de Software Sênior especializado em revisão de código.
 
 **IMPORTANTE:** Quando o usuário fornecer o nome de uma branch como argumento. Você deve primeiro gerar o relatório de diff antes de analisá-lo. Se o usuário não fornecer uma branch, use a branch atual. Para identificar a branch atual, você pode usar o comando `git rev-parse --abbrev-ref HEAD`.
 
+**Atalho (servidor local):** se existir o arquivo `.code_review/serve.json` (criado por `review-cli serve --http`), leia a `url` dele e faça um GET em `<url>/report?branch=<nome-da-branch>`: a resposta já é o relatório em Markdown e os passos 1 e 2 podem ser pulados. Para um único trecho, use `<url>/files?branch=<branch>` e `<url>/hunk?branch=<branch>&path=<arquivo>&n=<N>`. Se a conexão falhar, siga os passos abaixo normalmente.
+
 1.  **Execute o Script de Relatório:**
     Execute o script de relatório para gerar o diff. O comando (a partir da raiz do projeto) é:
     `{SCRIPT_COMMAND_PLACEHOLDER}`
@@ -272,7 +295,7 @@ Você é um Engenheiro de Software Sênior especializado em revisão de código.
 
 4.  **Forneça a Revisão:** Com base no diff, forneça sua revisão de código seguindo os critérios abaixo.
 
-5.  **Limpeza (Opcional):** Após a revisão, você pode sugerir a remoção do arquivo de diff gerado para manter o repositório limpo.
+5.  **Limpeza:** Não apague o relatório: com o `review-cli`, as versões anteriores vão comprimidas para `diffs/.archive` e `review-cli gc` aplica os limites de retenção.
 
 ---
 
@@ -294,7 +317,7 @@ Por favor, analise o diff fornecido e estruture seu feedback abordando os seguin
 
 ### 4. Boas Práticas e Princípios
 * **SOLID/DRY:** O código segue princípios como DRY (Don't Repeat Yourself) e SOLID?
-* **Segurança:** Alguma alteração introduz vulnerabilidades óbvias (ex: SQL Injection, XSS, exposição de chaves)?
+* **Segurança:** Alguma alteração introduz vulnerabilidades óbvias (ex: SQL Injection, XSS, exposição de chaves)? Se o relatório tiver a seção "Possíveis Segredos Expostos", parta dela em vez de procurar chaves no diff inteiro.
 * **Testabilidade:** As mudanças são fáceis de testar? O código de teste (se incluído no diff) é adequado?
 
 ### 5. Consistência de Estilo
@@ -350,22 +373,101 @@ BANNER = """
 
 TAGLINE = "Automated Code Review Bootstrap Tool (Multi-Agent & Cross-Platform)"
 
-console = Console()
+@lru_cache(maxsize=None)
+def get_console():
+    """Console do rich, criado apenas quando algo for de fato exibido."""
+    from rich.console import Console
+
+    return Console()
+
+
+class _LazyConsole:
+    """Encaminha chamadas para `get_console()` sem importar o rich antecipadamente."""
+
+    def __getattr__(self, name):
+        return getattr(get_console(), name)
+
+
+console = _LazyConsole()
+
+
+def echo_status(label: str, value: str = "", style: str = "green") -> None:
+    """
+    Imprime "rótulo valor". Em terminais usa o rich; em pipes (agentes, CI)
+    escreve texto puro sem carregar o rich.
+    """
+    if sys.stdout.isatty():
+        from rich.markup import escape
+
+        console.print(f"[{style}]{label}[/{style}] {escape(value)}".rstrip())
+    else:
+        typer.echo(f"{label} {value}".rstrip())
+
+STEP_SYMBOLS = {
+    "done": "[green]●[/green]",
+    "pending": "[green dim]○[/green dim]",
+    "running": "[cyan]○[/cyan]",
+    "error": "[red]●[/red]",
+}
+
+
+class _Step:
+    """Um passo do tracker. `text` guarda a linha já montada (None quando mudou)."""
+
+    __slots__ = ("key", "label", "status", "detail", "text")
+
+    def __init__(self, key: str, label: str, status: str = "pending", detail: str = ""):
+        self.key = key
+        self.label = label
+        self.status = status
+        self.detail = detail
+        self.text = None
+
+    def markup(self) -> str:
+        symbol = STEP_SYMBOLS.get(self.status, " ")
+        style = "white" if self.status != "pending" else "bright_black"
+        line = f"{symbol} [{style}]{self.label}[/{style}]"
+        detail_text = self.detail.strip() if self.detail else ""
+        if detail_text:
+            line += f" [bright_black]({detail_text})[/bright_black]"
+        return line
+
 
 class StepTracker:
-    """Rastreia e renderiza passos hierárquicos (estilo Spec Kit)."""
-    def __init__(self, title: str):
+    """
+    Rastreia e renderiza passos hierárquicos (estilo Spec Kit).
+
+    Os passos ficam numa lista com um índice chave -> posição, então `add` e
+    as atualizações custam O(1). Cada linha é montada de novo só quando o passo
+    muda, e cada quadro mostra no máximo a altura do terminal (os primeiros
+    passos viram uma linha de resumo). O callback de `attach_refresh` é chamado
+    no máximo uma vez a cada `min_interval` segundos; as mudanças do intervalo
+    saem juntas no próximo redesenho ou em `flush`.
+    """
+
+    def __init__(self, title: str, min_interval: float = 0.1):
+        import threading
+
         self.title = title
-        self.steps = []
+        self.min_interval = min_interval
+        self.steps: list[_Step] = []
+        self._index: dict[str, int] = {}
+        self._counts: dict[str, int] = {}
         self._refresh_cb = None
+        # O Live do rich desenha numa thread própria
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._pending = False
 
     def attach_refresh(self, cb):
         self._refresh_cb = cb
 
     def add(self, key: str, label: str):
-        if key not in [s["key"] for s in self.steps]:
-            self.steps.append({"key": key, "label": label, "status": "pending", "detail": ""})
-            self._maybe_refresh()
+        with self._lock:
+            if key in self._index:
+                return
+            self._append(_Step(key, label))
+        self._maybe_refresh()
 
     def start(self, key: str, detail: str = ""):
         self._update(key, status="running", detail=detail)
@@ -376,46 +478,81 @@ class StepTracker:
     def error(self, key: str, detail: str = ""):
         self._update(key, status="error", detail=detail)
 
+    def _append(self, step: _Step) -> None:
+        self._index[step.key] = len(self.steps)
+        self.steps.append(step)
+        self._counts[step.status] = self._counts.get(step.status, 0) + 1
+
     def _update(self, key: str, status: str, detail: str):
-        for s in self.steps:
-            if s["key"] == key:
-                s["status"] = status
+        with self._lock:
+            position = self._index.get(key)
+            if position is None:
+                self._append(_Step(key, key, status, detail))
+            else:
+                step = self.steps[position]
+                if step.status == status and (not detail or step.detail == detail):
+                    return
+                self._counts[step.status] -= 1
+                self._counts[status] = self._counts.get(status, 0) + 1
+                step.status = status
                 if detail:
-                    s["detail"] = detail
-                self._maybe_refresh()
-                return
-        self.steps.append({"key": key, "label": key, "status": status, "detail": detail})
+                    step.detail = detail
+                step.text = None
         self._maybe_refresh()
 
     def _maybe_refresh(self):
-        if self._refresh_cb:
-            try:
-                self._refresh_cb()
-            except Exception:
-                pass
+        if not self._refresh_cb:
+            return
+        now = time.monotonic()
+        if now - self._last_refresh < self.min_interval:
+            self._pending = True
+            return
+        self._refresh(now)
+
+    def flush(self):
+        """Redesenha agora se houver mudanças ainda não mostradas."""
+        if self._refresh_cb and self._pending:
+            self._refresh(time.monotonic())
+
+    def _refresh(self, now: float):
+        self._last_refresh = now
+        self._pending = False
+        try:
+            self._refresh_cb()
+        except Exception:
+            pass
 
     def render(self):
-        tree = Tree(f"[cyan]{self.title}[/cyan]", guide_style="grey50")
-        for step in self.steps:
-            label = step["label"]
-            detail_text = step["detail"].strip() if step["detail"] else ""
-            status = step["status"]
-            
-            if status == "done": symbol = "[green]●[/green]"
-            elif status == "pending": symbol = "[green dim]○[/green dim]"
-            elif status == "running": symbol = "[cyan]○[/cyan]"
-            elif status == "error": symbol = "[red]●[/red]"
-            else: symbol = " "
-
-            style = "white" if status != "pending" else "bright_black"
-            line = f"{symbol} [{style}]{label}[/{style}]"
-            if detail_text:
-                line += f" [bright_black]({detail_text})[/bright_black]"
-            tree.add(line)
-        return tree
+        """Renderizável do rich (o próprio tracker; o `Live` o redesenha a cada quadro)."""
+        return self
+
+    def __rich_console__(self, console, options):
+        from rich.text import Text
+
+        guide = "grey50"
+        yield Text.from_markup(f"[cyan]{self.title}[/cyan]")
+        with self._lock:
+            total = len(self.steps)
+            # Título e, se faltar espaço, a linha de resumo
+            room = max(options.max_height - 2, 1)
+            first = 0
+            if total > room + 1:
+                first = total - room
+                done = self._counts.get("done", 0)
+                errors = self._counts.get("error", 0)
+                summary = f"… {first} passo(s) acima · {done} concluído(s), {errors} com erro"
+                yield Text.assemble(("├── ", guide), (summary, "bright_black"))
+            for position in range(first, total):
+                step = self.steps[position]
+                if step.text is None:
+                    step.text = Text.from_markup(step.markup())
+                branch = "└── " if position == total - 1 else "├── "
+                yield Text.assemble((branch, guide), step.text, no_wrap=True, overflow="ellipsis")
 
 def get_key():
     """Obtém um único toque de tecla (multi-plataforma)."""
+    import readchar
+
     key = readchar.readkey()
     if key == readchar.key.UP or key == readchar.key.CTRL_P: return 'up'
     if key == readchar.key.DOWN or key == readchar.key.CTRL_N: return 'down'
@@ -426,6 +563,10 @@ def get_key():
 
 def select_with_arrows(options: dict, prompt_text: str = "Select an option", default_key: str = None) -> str:
     """Seleção interativa usando setas (estilo Spec Kit)."""
+    from rich.live import Live
+    from rich.panel import Panel
+    from rich.table import Table
+
     option_keys = list(options.keys())
     if default_key and default_key in option_keys:
         selected_index = option_keys.index(default_key)
@@ -459,7 +600,7 @@ def select_with_arrows(options: dict, prompt_text: str = "Select an option", def
         )
 
     console.print()
-    with Live(create_selection_panel(), console=console, transient=True, auto_refresh=False) as live:
+    with Live(create_selection_panel(), console=get_console(), transient=True, auto_refresh=False) as live:
         while True:
             live.update(create_selection_panel(), refresh=True)
             try:
@@ -494,6 +635,9 @@ app = typer.Typer(
 )
 
 def show_banner():
+    from rich.align import Align
+    from rich.text import Text
+
     banner_lines = BANNER.strip().split('\n')
     colors = ["bright_blue", "blue", "cyan", "bright_cyan"]
     styled_banner = Text()
@@ -508,38 +652,51 @@ def show_banner():
 def callback(ctx: typer.Context):
     """Exibe o banner se nenhum comando for invocado."""
     if ctx.invoked_subcommand is None:
+        from rich.align import Align
+
         show_banner()
         console.print(Align.center("[dim]Execute 'review-cli init' para começar.[/dim]"))
         console.print()
 
-def create_file(
+def render_payload(content: str, powershell_script: bool = False) -> bytes:
+    """Bytes finais de um arquivo gerado: LF no Unix, CRLF + BOM no PowerShell."""
+    # Normaliza quebras de linha para Unix (LF) e converte conforme o tipo
+    normalized = content.replace('\r\n', '\n').replace('\r', '\n')
+
+    if powershell_script:
+        return ensure_utf8_bom(normalized, newline="\r\n")
+    return normalized.encode('utf-8')
+
+
+def write_payload(
     path: Path,
-    content: str,
+    payload: bytes,
     tracker: StepTracker,
     step_key: str,
     make_executable: bool = False,
-    powershell_script: bool = False,
     skip_if_unchanged: bool = False,
-):
-    """Helper para criar arquivos e atualizar o tracker."""
+    digest: Optional[str] = None,
+    label: str = "criado",
+) -> dict:
+    """
+    Grava bytes já renderizados e atualiza o tracker.
+    Retorna o registro do arquivo (`path`, `status` e `sha256`) para o sumário.
+    """
+    import hashlib
+
     try:
         tracker.start(step_key)
         path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Normaliza quebras de linha para Unix (LF) e converte conforme o tipo
-        normalized = content.replace('\r\n', '\n').replace('\r', '\n')
-
-        if powershell_script:
-            payload = ensure_utf8_bom(normalized, newline="\r\n")
-        else:
-            payload = normalized.encode('utf-8')
+        digest = digest or hashlib.sha256(payload).hexdigest()
+        record = {"path": str(path), "status": "created", "sha256": digest}
 
         if skip_if_unchanged and path.exists():
             existing = path.read_bytes()
             if existing == payload:
-                digest = hashlib.sha256(payload).hexdigest()[:8]
-                tracker.complete(step_key, f"inalterado (sha={digest})")
-                return
+                tracker.complete(step_key, f"inalterado (sha={digest[:8]})")
+                record["status"] = "unchanged"
+                return record
 
         with open(path, 'wb') as f:
             f.write(payload)
@@ -548,15 +705,39 @@ def create_file(
         if make_executable and os.name != 'nt':
             st = os.stat(path)
             os.chmod(path, st.st_mode | 0o111) # Adiciona permissão de execução
-            tracker.complete(step_key, f"criado & chmod +x")
+            tracker.complete(step_key, f"{label} & chmod +x")
         else:
-            tracker.complete(step_key, "criado")
+            tracker.complete(step_key, label)
+        return record
             
     except Exception as e:
         tracker.error(step_key, str(e))
         raise e
 
 
+def create_file(
+    path: Path,
+    content: str,
+    tracker: StepTracker,
+    step_key: str,
+    make_executable: bool = False,
+    powershell_script: bool = False,
+    skip_if_unchanged: bool = False,
+) -> dict:
+    """
+    Helper para criar arquivos e atualizar o tracker.
+    Retorna o registro do arquivo (`path`, `status` e `sha256`) para o sumário.
+    """
+    return write_payload(
+        path,
+        render_payload(content, powershell_script),
+        tracker,
+        step_key,
+        make_executable=make_executable,
+        skip_if_unchanged=skip_if_unchanged,
+    )
+
+
 def build_windows_script_command(script_path: Path) -> str:
     """
     Monta o comando padrão usado nos prompts para executar o script PowerShell.
@@ -564,135 +745,359 @@ def build_windows_script_command(script_path: Path) -> str:
     script_path_str = script_path.as_posix().replace('/', '\\')
     return f".\\{script_path_str} <nome-da-branch-fornecida>"
 
+
+# Filtro padrão (sem .code_review/config.toml), o mesmo de `report.DEFAULT_PATHSPEC`
+DEFAULT_PATHSPEC = (".", ":(exclude)*.md")
+
+
+def _sh_quote(value: str) -> str:
+    if value and all(ch.isalnum() or ch in "._-/" for ch in value):
+        return value
+    return "'" + value.replace("'", "'\\''") + "'"
+
+
+def _ps_quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+@lru_cache(maxsize=None)
+def render_kit(selected_ai: str, selected_script: str, pathspec: tuple[str, ...] = DEFAULT_PATHSPEC) -> dict:
+    """
+    Renderiza uma vez os arquivos do Review Kit para a combinação IA/script/filtro.
+    Os caminhos são relativos à raiz do repositório, então os mesmos bytes
+    servem para qualquer repositório com o mesmo perfil (ver `init --repos`).
+    O resultado é compartilhado entre chamadas e não deve ser alterado.
+    """
+    import hashlib
+
+    script_dir = Path(".code_review") / "scripts"
+    prompt_dir = Path(AGENT_CONFIG[selected_ai]["prompt_dir"])
+
+    if selected_script == "sh":
+        script_path = script_dir / "git-relatorio.sh"
+        content = SCRIPT_CONTENT_SH.replace("__PATHSPEC_SH__", " ".join(map(_sh_quote, pathspec)))
+        script_payload = render_payload(content)
+        script_command = f"./{script_path.as_posix()} <nome-da-branch-fornecida>"
+    else:
+        script_path = script_dir / "git-relatorio.ps1"
+        content = SCRIPT_CONTENT_PS.replace("__PATHSPEC_PS__", ", ".join(map(_ps_quote, pathspec)))
+        script_payload = render_payload(content, powershell_script=True)
+        script_command = build_windows_script_command(script_path)
+
+    prompt_filename = "code_review.prompt.md"
+
+    if selected_ai == "antigravity":
+        prompt_filename = "code_review.md"
+
+    # Gera o conteúdo do prompt dinamicamente
+    prompt_payload = render_payload(
+        PROMPT_CONTENT_TEMPLATE.format(SCRIPT_COMMAND_PLACEHOLDER=script_command)
+    )
+
+    return {
+        "ai": selected_ai,
+        "script": selected_script,
+        "dirs": [script_dir, prompt_dir],
+        "files": [
+            {
+                "step": "script",
+                "path": script_path,
+                "payload": script_payload,
+                "sha256": hashlib.sha256(script_payload).hexdigest(),
+                "executable": selected_script == "sh",
+            },
+            {
+                "step": "prompt",
+                "path": prompt_dir / prompt_filename,
+                "payload": prompt_payload,
+                "sha256": hashlib.sha256(prompt_payload).hexdigest(),
+                "executable": False,
+            },
+        ],
+    }
+
+
+def bootstrap_repo(
+    root_path: Path,
+    selected_ai: str,
+    selected_script: str,
+    tracker: StepTracker,
+    pause: float = 0.0,
+    kit: Optional[dict] = None,
+    force: bool = False,
+) -> dict:
+    """
+    Cria a estrutura do Review Kit em `root_path` (diretórios, script e prompt).
+    `pause` mantém a pausa estética entre os passos no modo interativo. Sem
+    `kit`, os arquivos vêm de `render_kit` com o filtro de caminhos do
+    `.code_review/config.toml` do repositório (renderizado uma vez por perfil).
+    Arquivos editados localmente só são sobrescritos com `force`.
+    Retorna o sumário com o status de cada arquivo gerado.
+    """
+    from code_review.history import append_run
+    from code_review.kit_manifest import (
+        CREATED,
+        UNCHANGED,
+        UNTRACKED,
+        USER_MODIFIED,
+        classify,
+        load_manifest,
+        make_entry,
+        save_manifest,
+        stat_matches,
+    )
+
+    started = time.perf_counter()
+    if kit is None:
+        from code_review.config import load_pathspec
+
+        kit = render_kit(selected_ai, selected_script, load_pathspec(root_path))
+
+    # Passo 1: Diretórios
+    tracker.start("dirs")
+    try:
+        for directory in kit["dirs"]:
+            (root_path / directory).mkdir(parents=True, exist_ok=True)
+        tracker.complete("dirs", "pronto")
+    except Exception as e:
+        tracker.error("dirs", str(e))
+        raise
+
+    # Passos 2 e 3: Script e Prompt, decididos por stat + manifesto
+    manifest = load_manifest(root_path)
+    entries = dict(manifest)
+    files = []
+    for item in kit["files"]:
+        if pause:
+            time.sleep(pause) # Pausa estética
+        rel_path = item["path"].as_posix()
+        path = root_path / item["path"]
+        step_key = item["step"]
+        try:
+            tracker.start(step_key)
+            status, st = classify(path, manifest.get(rel_path), item["sha256"], item["payload"])
+        except OSError as e:
+            tracker.error(step_key, str(e))
+            raise
+
+        written = False
+        if status == UNCHANGED:
+            tracker.complete(step_key, f"inalterado (sha={item['sha256'][:8]})")
+        elif status == USER_MODIFIED and not force:
+            tracker.complete(step_key, "modificado localmente, mantido (use --force)")
+        elif status == UNTRACKED and not force:
+            tracker.complete(step_key, "sem registro no manifesto, mantido (use --force)")
+        else:
+            write_payload(
+                path,
+                item["payload"],
+                tracker,
+                step_key,
+                make_executable=item["executable"],
+                digest=item["sha256"],
+                label="criado" if status == CREATED else "atualizado",
+            )
+            st = path.stat()
+            written = True
+
+        # Mesmo conteúdo com outro mtime (clone, checkout): o stat registrado é renovado
+        if written or (status == UNCHANGED and not stat_matches(entries.get(rel_path), st)):
+            entries[rel_path] = make_entry(rel_path, st, item["sha256"])
+        files.append({"path": rel_path, "status": status, "sha256": item["sha256"], "written": written})
+
+    if entries != manifest:
+        save_manifest(root_path, entries, APP_VERSION)
+
+    # Pausas estéticas não entram na duração registrada
+    duration = time.perf_counter() - started - pause * len(kit["files"])
+    try:
+        append_run(root_path, {
+            "kind": "init",
+            "version": APP_VERSION,
+            "repo": root_path.name,
+            "ai": selected_ai,
+            "script": selected_script,
+            "files_written": sum(1 for f in files if f["written"]),
+            "statuses": [f["status"] for f in files],
+            "duration_s": round(duration, 6),
+        })
+    except OSError:
+        pass
+
+    script_item, prompt_item = kit["files"]
+    return {
+        "root": str(root_path),
+        "ai": selected_ai,
+        "script": selected_script,
+        "script_path": script_item["path"].as_posix(),
+        "prompt_path": prompt_item["path"].as_posix(),
+        "files": files,
+    }
+
+
+def bootstrap_fleet(
+    repos: list[Path],
+    selected_ai: str,
+    selected_script: str,
+    workers: int = 8,
+    on_done=None,
+    force: bool = False,
+) -> dict:
+    """
+    Aplica o Review Kit em vários repositórios com um pool de threads limitado.
+    Os arquivos são renderizados uma única vez por perfil de caminhos
+    (`render_kit` é memoizado). Falhas de cada repositório são devolvidas no
+    lugar do sumário; `on_done(repo, resultado)` acompanha o progresso.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    from code_review.config import ConfigError
+
+    def run(repo: Path):
+        if not repo.is_dir():
+            return NotADirectoryError(f"Diretório não encontrado: {repo}")
+        tracker = StepTracker(str(repo))
+        for key in ("dirs", "script", "prompt"):
+            tracker.add(key, key)
+        try:
+            return bootstrap_repo(repo, selected_ai, selected_script, tracker, force=force)
+        except (OSError, ConfigError) as e:
+            return e
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        futures = {pool.submit(run, repo): repo for repo in dict.fromkeys(repos)}
+        for future in as_completed(futures):
+            repo = futures[future]
+            results[repo] = future.result()
+            if on_done:
+                on_done(repo, results[repo])
+    return {repo: results[repo] for repo in dict.fromkeys(repos)}
+
+
+def _init_error(message: str, headless: bool):
+    """Erro de validação do `init`: JSON no modo headless, texto colorido no interativo."""
+    import json
+
+    if headless:
+        typer.echo(json.dumps({"ok": False, "error": message}, ensure_ascii=False))
+    else:
+        console.print(f"[red]Erro: {message}[/red]")
+    raise typer.Exit(1)
+
+
 @app.command()
 def init(
     ai: str = typer.Option(None, "--ai", help="Assistente de IA (copilot, claude, gemini, etc)"),
     script_type: str = typer.Option(None, "--script", help="Tipo de script (sh ou ps)"),
     here: bool = typer.Option(False, "--here", help="Inicializar no diretório atual (flag legada)"),
+    headless: Optional[bool] = typer.Option(
+        None,
+        "--headless/--no-headless",
+        help="Sem banner, animações ou pausas; imprime um sumário JSON (padrão quando stdin não é um TTY)",
+    ),
+    repos: Optional[Path] = typer.Option(
+        None,
+        "--repos",
+        help="Arquivo com um repositório por linha: inicializa todos em um único processo",
+    ),
+    workers: int = typer.Option(8, "--workers", "-j", help="Repositórios processados em paralelo com --repos"),
+    force: bool = typer.Option(False, "--force", help="Sobrescreve também arquivos editados localmente"),
 ):
     """
     Inicializa a estrutura do Code Review.
     Suporta múltiplos agentes e SOs.
     """
-    show_banner()
+    import json
+    import platform
+
+    from code_review.kit_manifest import UNTRACKED, USER_MODIFIED
+
+    interactive = sys.stdin.isatty()
+    if headless is None:
+        headless = not interactive
+
+    if not headless:
+        show_banner()
     
     root_path = Path.cwd()
     
     # 1. Seleciona IA
     if ai:
         if ai not in AGENT_CONFIG:
-            console.print(f"[red]Erro: IA inválida '{ai}'.[/red] Opções: {', '.join(AGENT_CONFIG.keys())}")
-            raise typer.Exit(1)
+            _init_error(f"IA inválida '{ai}'. Opções: {', '.join(AGENT_CONFIG.keys())}", headless)
         selected_ai = ai
     else:
         # Modo interativo se stdin for um TTY
-        if not sys.stdin.isatty():
+        if not interactive or headless:
             selected_ai = "copilot" # Default para ambientes não interativos
-            console.print("[dim]Ambiente não interativo, usando 'copilot' como padrão.[/dim]")
+            if not headless:
+                console.print("[dim]Ambiente não interativo, usando 'copilot' como padrão.[/dim]")
         else:
             selected_ai = select_with_arrows(AGENT_CONFIG, "Escolha seu Assistente de IA", default_key="copilot")
     
     # 2. Seleciona Tipo de Script
     if script_type:
         if script_type not in SCRIPT_TYPE_CHOICES:
-            console.print(f"[red]Erro: Tipo de script inválido '{script_type}'.[/red] Opções: {', '.join(SCRIPT_TYPE_CHOICES.keys())}")
-            raise typer.Exit(1)
+            _init_error(
+                f"Tipo de script inválido '{script_type}'. Opções: {', '.join(SCRIPT_TYPE_CHOICES.keys())}",
+                headless,
+            )
         selected_script = script_type
     else:
         # Auto-detecta padrão baseado no SO
         default_script = "ps" if platform.system() == "Windows" else "sh"
-        if not sys.stdin.isatty():
+        if not interactive or headless:
             selected_script = default_script
-            console.print(f"[dim]Ambiente não interativo, usando '{default_script}' como padrão.[/dim]")
+            if not headless:
+                console.print(f"[dim]Ambiente não interativo, usando '{default_script}' como padrão.[/dim]")
         else:
             selected_script = select_with_arrows(SCRIPT_TYPE_CHOICES, "Escolha o Formato do Script", default_key=default_script)
 
-    console.print(f"[cyan]Alvo:[/cyan] {AGENT_CONFIG[selected_ai]['name']}")
-    console.print(f"[cyan]Script:[/cyan] {selected_script.upper()}\n")
+    if repos:
+        run_fleet_init(repos, selected_ai, selected_script, workers, headless, force)
+        return
 
     # 3. Setup do Tracker
     tracker = StepTracker("Inicializando Review Kit")
     tracker.add("dirs", "Criar estrutura de diretórios")
     tracker.add("script", f"Gerar script {selected_script.upper()}")
     tracker.add("prompt", f"Gerar Prompt para {selected_ai}")
-    
-    with Live(tracker.render(), console=console, refresh_per_second=8, transient=False) as live:
-        tracker.attach_refresh(lambda: live.update(tracker.render()))
-        
-        # Caminhos
-        script_dir = root_path / ".code_review" / "scripts"
-        prompt_relative_path = AGENT_CONFIG[selected_ai]["prompt_dir"]
-        prompt_dir = root_path / prompt_relative_path
-        
-        # Passo 1: Diretórios
-        tracker.start("dirs")
-        try:
-            script_dir.mkdir(parents=True, exist_ok=True)
-            prompt_dir.mkdir(parents=True, exist_ok=True)
-            tracker.complete("dirs", "pronto")
-        except Exception as e:
-            tracker.error("dirs", str(e))
-            return
 
-        time.sleep(0.3) # Pausa estética
+    from code_review.config import ConfigError
 
-        # Passo 2: Script
-        if selected_script == "sh":
-            script_path = script_dir / "git-relatorio.sh"
-            content = SCRIPT_CONTENT_SH
-            create_file(
-                script_path,
-                content,
-                tracker,
-                "script",
-                make_executable=True,
-                skip_if_unchanged=True,
-            )
-            
-            # Define o comando dinâmico para o prompt (relativo ao root_path)
-            rel_script_path = script_path.relative_to(root_path)
-            script_command = f"./{rel_script_path.as_posix()} <nome-da-branch-fornecida>"
-        else:
-            script_path = script_dir / "git-relatorio.ps1"
-            content = SCRIPT_CONTENT_PS
-            create_file(
-                script_path,
-                content,
-                tracker,
-                "script",
-                make_executable=False,
-                powershell_script=True,
-                skip_if_unchanged=True,
-            )
-            
-            # Define o comando dinâmico para o prompt (relativo ao root_path)
-            rel_script_path = script_path.relative_to(root_path)
-            script_command = build_windows_script_command(rel_script_path)
-
-        time.sleep(0.3)
-
-        # Passo 3: Prompt
-        prompt_filename = "code_review.prompt.md"
+    if headless:
+        # Sem Live, sem redesenhos e sem pausas: apenas o sumário JSON
+        try:
+            summary = bootstrap_repo(root_path, selected_ai, selected_script, tracker, force=force)
+        except (OSError, ConfigError) as e:
+            typer.echo(json.dumps({"ok": False, "root": str(root_path), "error": str(e)}, ensure_ascii=False))
+            raise typer.Exit(1)
+        typer.echo(json.dumps({"ok": True, **summary}, ensure_ascii=False))
+        return
 
-        if selected_ai == "antigravity":
-            prompt_filename = "code_review.md"
-            
-        prompt_path = prompt_dir / prompt_filename
+    from rich.live import Live
+    from rich.panel import Panel
 
+    console.print(f"[cyan]Alvo:[/cyan] {AGENT_CONFIG[selected_ai]['name']}")
+    console.print(f"[cyan]Script:[/cyan] {selected_script.upper()}\n")
 
-        
-        # Gera o conteúdo do prompt dinamicamente
-        final_prompt_content = PROMPT_CONTENT_TEMPLATE.format(
-            SCRIPT_COMMAND_PLACEHOLDER=script_command
-        )
-        
-        create_file(prompt_path, final_prompt_content, tracker, "prompt")
+    try:
+        with Live(tracker, console=get_console(), refresh_per_second=8, transient=False) as live:
+            tracker.attach_refresh(live.refresh)
+            summary = bootstrap_repo(root_path, selected_ai, selected_script, tracker, pause=0.3, force=force)
+            tracker.flush()
+    except ConfigError as e:
+        console.print(f"[red]Erro na configuração:[/red] {e}")
+        raise typer.Exit(1)
+    except OSError:
+        raise typer.Exit(1)
 
     # Sumário Final
     console.print("\n[bold green]✨ Ambiente pronto![/bold green]")
     
-    rel_script = script_path.relative_to(root_path)
-    rel_prompt = prompt_path.relative_to(root_path)
+    rel_script = Path(summary["script_path"])
+    rel_prompt = Path(summary["prompt_path"])
     
     # Define o comando de execução baseado no SO/script
     # Correção: A lógica do prefixo foi movida para fora do f-string para evitar o SyntaxError com '\'
@@ -708,6 +1113,798 @@ def init(
         border_style="green"
     ))
 
+    edited = [f["path"] for f in summary["files"] if f["status"] == USER_MODIFIED and not f["written"]]
+    if edited:
+        console.print(
+            "[yellow]Arquivos editados localmente foram mantidos "
+            f"(use --force para sobrescrever):[/yellow] {', '.join(edited)}"
+        )
+    untracked = [f["path"] for f in summary["files"] if f["status"] == UNTRACKED and not f["written"]]
+    if untracked:
+        console.print(
+            "[yellow]Arquivos sem registro no manifesto (instalação anterior?) foram mantidos "
+            f"e podem estar desatualizados (use --force para atualizar):[/yellow] {', '.join(untracked)}"
+        )
+
+def run_fleet_init(
+    repos_file: Path,
+    selected_ai: str,
+    selected_script: str,
+    workers: int,
+    headless: bool,
+    force: bool = False,
+):
+    """`init --repos`: Review Kit em vários repositórios, com progresso agregado."""
+    import json
+
+    from code_review.files import read_list_file
+    from code_review.kit_manifest import UNTRACKED, USER_MODIFIED
+
+    try:
+        repos = [Path(line).expanduser() for line in read_list_file(repos_file)]
+    except OSError as e:
+        _init_error(f"Não foi possível ler {repos_file}: {e}", headless)
+    if not repos:
+        _init_error(f"Nenhum repositório listado em {repos_file}.", headless)
+
+    if headless:
+        results = bootstrap_fleet(repos, selected_ai, selected_script, workers=workers, force=force)
+    else:
+        from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
+
+        failures = 0
+        with Progress(
+            TextColumn("[cyan]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            TextColumn("{task.fields[failures]}"),
+            TimeElapsedColumn(),
+            console=get_console(),
+        ) as progress:
+            task = progress.add_task("Inicializando repositórios", total=len(dict.fromkeys(repos)), failures="")
+
+            def on_done(repo: Path, result) -> None:
+                nonlocal failures
+                if isinstance(result, Exception):
+                    failures += 1
+                progress.update(
+                    task,
+                    advance=1,
+                    failures=f"[red]{failures} falha(s)[/red]" if failures else "",
+                )
+
+            results = bootstrap_fleet(
+                repos, selected_ai, selected_script, workers=workers, on_done=on_done, force=force
+            )
+
+    failed = {repo: result for repo, result in results.items() if isinstance(result, Exception)}
+
+    if headless:
+        entries = []
+        for repo, result in results.items():
+            if isinstance(result, Exception):
+                entries.append({"ok": False, "root": str(repo), "error": str(result)})
+            else:
+                entries.append({"ok": True, **result})
+        typer.echo(json.dumps({"ok": not failed, "repos": entries}, ensure_ascii=False))
+    else:
+        from rich.table import Table
+
+        summaries = [result for result in results.values() if not isinstance(result, Exception)]
+        changed = sum(1 for summary in summaries if any(f["written"] for f in summary["files"]))
+        edited = [
+            (summary["root"], f["path"])
+            for summary in summaries
+            for f in summary["files"]
+            if f["status"] == USER_MODIFIED and not f["written"]
+        ]
+        untracked = sum(
+            1
+            for summary in summaries
+            for f in summary["files"]
+            if f["status"] == UNTRACKED and not f["written"]
+        )
+        console.print(
+            f"\n[bold green]✨ {len(summaries)} repositório(s) prontos[/bold green] "
+            f"[dim]({changed} com arquivos gravados)[/dim]"
+        )
+        if edited:
+            console.print(
+                f"[yellow]{len(edited)} arquivo(s) editados localmente foram mantidos "
+                f"(use --force para sobrescrever).[/yellow]"
+            )
+        if untracked:
+            console.print(
+                f"[yellow]{untracked} arquivo(s) sem registro no manifesto foram mantidos e podem "
+                f"estar desatualizados (use --force para atualizar).[/yellow]"
+            )
+        if failed:
+            table = Table(title=f"Falhas ({len(failed)})")
+            table.add_column("Repositório", style="cyan")
+            table.add_column("Erro")
+            for repo, error in failed.items():
+                table.add_row(str(repo), f"[red]{error}[/red]")
+            console.print(table)
+
+    if failed:
+        raise typer.Exit(1)
+
+
+def resolve_compact(
+    root: Path,
+    compact: Optional[bool],
+    context: Optional[int],
+    function_context: bool,
+    removed: Optional[str],
+    no_collapse_moved: bool,
+    keep_removed: bool,
+):
+    """
+    Modo compacto do `report`: a tabela `[report]` do config.toml, sobrescrita
+    pelas opções da linha de comando. None quando o modo compacto está desligado.
+    """
+    from dataclasses import replace
+
+    from code_review.compact import CompactOptions
+    from code_review.config import ConfigError, load_compact
+
+    if compact is False:
+        return None
+    configured = load_compact(root)
+    explicit = context is not None or function_context or removed is not None or no_collapse_moved
+    if configured is None and not (compact or explicit):
+        return None
+    changes = {}
+    if context is not None:
+        changes["context"] = context
+    if function_context:
+        changes["function_context"] = True
+    if removed is not None:
+        changes["removed"] = removed
+    elif keep_removed:
+        changes["removed"] = "keep"
+    if no_collapse_moved:
+        changes["collapse_moved"] = False
+    try:
+        return replace(configured or CompactOptions(), **changes)
+    except ValueError as e:
+        raise ConfigError(str(e)) from e
+
+
+@app.command()
+def report(
+    branch: Optional[str] = typer.Argument(None, help="Branch alvo (padrão: branch atual)"),
+    base: str = typer.Option("main", "--base", help="Branch base da comparação"),
+    remote: str = typer.Option("origin", "--remote", help="Remoto da branch base (vazio para usar a local)"),
+    output_dir: Optional[Path] = typer.Option(None, "--output-dir", help="Pasta de saída (padrão: diffs/ na raiz do repo)"),
+    keep_removed: bool = typer.Option(False, "--keep-removed", help="Mantém as linhas removidas no diff"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Ignora o cache e gera o relatório do zero"),
+    file_cache: bool = typer.Option(False, "--file-cache/--no-file-cache", help="Cache de diffs por arquivo (blobs antigo/novo), compartilhado entre branches"),
+    shard_bytes: Optional[int] = typer.Option(None, "--shard-bytes", help="Divide o diff em partes de até N bytes"),
+    shard_tokens: Optional[int] = typer.Option(None, "--shard-tokens", help="Divide o diff em partes de até ~N tokens"),
+    workers: int = typer.Option(1, "--workers", "-j", help="Processos git em paralelo para o diff (0 = um por núcleo)"),
+    branches_from: Optional[Path] = typer.Option(None, "--branches-from", help="Arquivo com uma branch por linha (modo lote)"),
+    branch_glob: Optional[str] = typer.Option(None, "--glob", help="Glob de refs para o modo lote (ex: 'feature/*')"),
+    prefilter: bool = typer.Option(False, "--prefilter", help="Omite do diff arquivos grandes, binários e gerados (listados no relatório)"),
+    max_file_lines: Optional[int] = typer.Option(None, "--max-file-lines", help="Pré-filtro: máximo de linhas alteradas por arquivo (implica --prefilter)"),
+    max_file_bytes: Optional[int] = typer.Option(None, "--max-file-bytes", help="Pré-filtro: tamanho máximo do arquivo em bytes (implica --prefilter)"),
+    profile: bool = typer.Option(False, "--profile", help="Mede cada etapa e grava <relatório>.profile.json"),
+    cprofile: Optional[Path] = typer.Option(None, "--cprofile", help="Grava estatísticas do cProfile (lado Python) neste arquivo"),
+    output_format: str = typer.Option("md", "--format", help="Formato de saída: md ou jsonl (um registro por arquivo/hunk + índice)"),
+    since_last: bool = typer.Option(False, "--since-last", help="Relata só o que mudou desde o último relatório da branch"),
+    compact: Optional[bool] = typer.Option(None, "--compact/--no-compact", help="Modo compacto (padrão: [report] do config.toml)"),
+    context: Optional[int] = typer.Option(None, "--context", "-U", help="Linhas de contexto do diff (implica --compact)"),
+    function_context: bool = typer.Option(False, "--function-context", help="Contexto da função inteira (implica --compact)"),
+    removed: Optional[str] = typer.Option(None, "--removed", help="Linhas removidas: keep, drop ou summary (implica --compact)"),
+    no_collapse_moved: bool = typer.Option(False, "--no-collapse-moved", help="Não resume blocos movidos/copiados"),
+    semantic: bool = typer.Option(False, "--semantic", help="Omite arquivos e hunks só de formatação (Python: árvores sintáticas iguais)"),
+    scan_secrets: Optional[bool] = typer.Option(None, "--scan-secrets/--no-scan-secrets", help="Lista possíveis segredos das linhas adicionadas no topo (padrão: [report] do config.toml)"),
+    no_archive: bool = typer.Option(False, "--no-archive", help="Substitui o relatório anterior sem guardá-lo em diffs/.archive"),
+):
+    """
+    Gera o relatório de diff em Python, sem depender dos scripts embedados.
+    """
+    from code_review.git_utils import GitError, git_output
+    from code_review.patches import resolve_workers
+    from code_review.report import ReportOptions, generate_report
+    from code_review.shard import tokens_to_bytes
+
+    if shard_bytes and shard_tokens:
+        echo_status("Erro:", "use apenas --shard-bytes ou --shard-tokens.", "red")
+        raise typer.Exit(1)
+    if output_format not in ("md", "jsonl"):
+        echo_status("Erro:", "formato inválido. Opções: md, jsonl", "red")
+        raise typer.Exit(1)
+    if output_format == "jsonl" and (shard_bytes or shard_tokens):
+        echo_status("Erro:", "--shard-* só vale para o formato md.", "red")
+        raise typer.Exit(1)
+    if output_format == "jsonl" and semantic:
+        echo_status("Erro:", "--semantic só vale para o formato md.", "red")
+        raise typer.Exit(1)
+    if output_format == "jsonl" and scan_secrets:
+        echo_status("Erro:", "--scan-secrets só vale para o formato md.", "red")
+        raise typer.Exit(1)
+    rules = None
+    if prefilter or max_file_lines is not None or max_file_bytes is not None:
+        from code_review.prefilter import DEFAULT_MAX_BYTES, DEFAULT_MAX_LINES, FilterRules
+
+        rules = FilterRules(
+            max_lines=max_file_lines if max_file_lines is not None else DEFAULT_MAX_LINES,
+            max_bytes=max_file_bytes if max_file_bytes is not None else DEFAULT_MAX_BYTES,
+        )
+    from code_review.config import ConfigError, load_archive, load_pathspec, load_scan_secrets
+    from code_review.git_utils import find_repo_root
+    from code_review.report import REPORT_DIR_NAME
+
+    try:
+        root = find_repo_root()
+        pathspec = load_pathspec(root)
+        compact_options = resolve_compact(
+            root, compact, context, function_context, removed, no_collapse_moved, keep_removed
+        )
+        if scan_secrets is None:
+            # O config vale só para o Markdown (o JSONL não tem seção de achados)
+            scan_secrets = output_format == "md" and load_scan_secrets(root)
+        retention = None if no_archive else load_archive(root)
+    except (GitError, ConfigError) as e:
+        echo_status("Erro:", str(e), "red")
+        raise typer.Exit(1)
+    output_dir = output_dir or root / REPORT_DIR_NAME
+
+    options = ReportOptions(
+        pathspec=pathspec,
+        keep_removed=keep_removed,
+        compact=compact_options,
+        semantic=semantic,
+        scan_secrets=scan_secrets,
+        archive=retention,
+        workers=resolve_workers(workers),
+        use_cache=not no_cache,
+        file_cache=file_cache,
+        shard_bytes=shard_bytes or (tokens_to_bytes(shard_tokens) if shard_tokens else None),
+        prefilter=rules,
+        output_format=output_format,
+    )
+
+    if branches_from or branch_glob:
+        if profile or cprofile:
+            echo_status("Erro:", "--profile/--cprofile não são suportados no modo lote.", "red")
+            raise typer.Exit(1)
+        run_batch_report(branch, branches_from, branch_glob, base, remote, output_dir, options, since_last)
+        return
+
+    from code_review.profiling import StageProfiler
+
+    # Sempre mede as etapas grossas para o histórico; --profile detalha as seções
+    profiler = StageProfiler(sections=profile)
+    python_profiler = None
+    if cprofile:
+        import cProfile
+
+        python_profiler = cProfile.Profile()
+        python_profiler.enable()
+
+    from code_review.checkpoints import checkpoint_tip, load_checkpoints
+
+    try:
+        target = branch or git_output(["rev-parse", "--abbrev-ref", "HEAD"])
+        checkpoint = checkpoint_tip(load_checkpoints(root), target) if since_last else None
+        result = generate_report(
+            target,
+            base=base,
+            remote=remote,
+            output_dir=output_dir,
+            options=options,
+            profiler=profiler,
+            checkpoint=checkpoint,
+        )
+    except GitError as e:
+        echo_status("Erro:", str(e), "red")
+        raise typer.Exit(1)
+    finally:
+        if python_profiler:
+            python_profiler.disable()
+
+    if since_last:
+        if result.range.checkpoint:
+            echo_status("Desde a revisão:", result.range.checkpoint[:12])
+        elif checkpoint:
+            echo_status("Aviso:", "histórico reescrito desde a última revisão (rebase/force-push); relatório completo.", "yellow")
+        else:
+            echo_status("Aviso:", "nenhuma revisão anterior desta branch; relatório completo.", "yellow")
+    origin = " (cache)" if result.cached else ""
+    echo_status("Relatório salvo:", f"{result.path}{origin}")
+    if result.manifest:
+        echo_status("Manifesto das partes:", str(result.manifest))
+    if result.index:
+        echo_status("Índice:", str(result.index))
+    if result.archived:
+        echo_status("Versão anterior arquivada:", str(result.archived))
+    if python_profiler:
+        python_profiler.dump_stats(cprofile)
+        echo_status("cProfile salvo:", str(cprofile))
+    if profile:
+        show_profile(profiler, result)
+    record_report_run(result, profiler, options)
+    record_checkpoints(root, [result])
+
+
+def record_checkpoints(root: Path, results: list) -> None:
+    """Guarda a ponta relatada de cada branch para o próximo `--since-last`."""
+    from code_review.checkpoints import save_checkpoints
+
+    try:
+        save_checkpoints(root, [result.range for result in results])
+    except OSError as e:
+        echo_status("Aviso:", f"checkpoint não gravado: {e}", "yellow")
+
+
+def record_report_run(result, profiler, options) -> None:
+    """Acrescenta a execução do `report` ao histórico do repositório."""
+    from code_review.git_utils import GitError, find_repo_root
+    from code_review.history import append_run
+    from code_review.report import count_changed_files
+
+    try:
+        root = find_repo_root()
+        append_run(root, {
+            "kind": "report",
+            "version": APP_VERSION,
+            "repo": root.name,
+            "branch": result.range.target,
+            "base": result.range.base_ref,
+            "cached": result.cached,
+            "sharded": result.manifest is not None,
+            "since_last": result.range.checkpoint is not None,
+            "compact": options.compact is not None,
+            "semantic": options.semantic,
+            "scan_secrets": options.scan_secrets,
+            "file_cache": result.file_cache,
+            "format": "jsonl" if result.index else "md",
+            "files_changed": (
+                result.files_changed if result.files_changed is not None else count_changed_files(result.path)
+            ),
+            "diff_bytes": result.path.stat().st_size,
+            "duration_s": profiler.summary()["total_seconds"],
+            "stages": profiler.durations(),
+        })
+    except (GitError, OSError):
+        pass  # o histórico nunca deve derrubar o relatório
+
+
+def show_profile(profiler, result) -> None:
+    """Imprime a tabela de etapas do `--profile` e grava o JSON ao lado do relatório."""
+    from code_review.profiling import profile_filename, write_profile
+
+    summary = {
+        "target": result.range.target,
+        "base": result.range.base_ref,
+        "merge_base": result.range.merge_base,
+        "tip": result.range.tip_sha,
+        "cached": result.cached,
+        "file_cache": result.file_cache,
+        **profiler.summary(),
+    }
+    profile_path = profile_filename(result.path)
+    write_profile(summary, profile_path)
+
+    if sys.stdout.isatty():
+        from rich.table import Table
+
+        table = Table(title=f"Etapas ({summary['total_seconds'] * 1000:.1f} ms no total)")
+        table.add_column("Etapa", style="cyan")
+        table.add_column("Duração", justify="right")
+        table.add_column("Bytes", justify="right")
+        table.add_column("Processos", justify="right")
+        for stage in summary["stages"]:
+            table.add_row(
+                stage["name"],
+                f"{stage['seconds'] * 1000:.1f} ms",
+                str(stage["bytes"]),
+                str(stage["processes"]),
+            )
+        console.print(table)
+    else:
+        for stage in summary["stages"]:
+            typer.echo(
+                f"{stage['name']}: {stage['seconds'] * 1000:.1f} ms, "
+                f"{stage['bytes']} bytes, {stage['processes']} processo(s)"
+            )
+        typer.echo(f"total: {summary['total_seconds'] * 1000:.1f} ms, {summary['total_processes']} processo(s)")
+    if result.file_cache:
+        echo_status(
+            "Cache de arquivos:",
+            f"{result.file_cache['hits']} acerto(s), {result.file_cache['misses']} arquivo(s) gerado(s) pelo git",
+        )
+    echo_status("Perfil salvo:", str(profile_path))
+
+def run_batch_report(
+    branch: Optional[str],
+    branches_from: Optional[Path],
+    branch_glob: Optional[str],
+    base: str,
+    remote: str,
+    output_dir: Optional[Path],
+    options: "ReportOptions",
+    since_last: bool = False,
+):
+    """Modo lote do `report`: um relatório por branch, com merge-bases calculados juntos."""
+    from dataclasses import replace
+
+    from rich.table import Table
+
+    from code_review.batch import generate_batch, list_branches, read_branch_list
+    from code_review.checkpoints import checkpoint_tip, load_checkpoints
+    from code_review.git_utils import GitError, find_repo_root
+
+    try:
+        root = find_repo_root()
+        branches = [branch] if branch else []
+        if branches_from:
+            branches += read_branch_list(branches_from)
+        if branch_glob:
+            branches += list_branches(branch_glob)
+        if not branches:
+            console.print("[yellow]Nenhuma branch encontrada para o lote.[/yellow]")
+            raise typer.Exit(1)
+        checkpoints = None
+        if since_last:
+            saved = load_checkpoints(root)
+            checkpoints = {name: checkpoint_tip(saved, name) for name in branches}
+        # Paraleliza entre branches; cada relatório roda serial
+        batch_options = replace(options, workers=1)
+        started = time.perf_counter()
+        results = generate_batch(
+            branches,
+            base=base,
+            remote=remote,
+            output_dir=output_dir,
+            options=batch_options,
+            workers=options.workers,
+            checkpoints=checkpoints,
+        )
+    except (GitError, OSError) as e:
+        console.print(f"[red]Erro:[/red] {e}")
+        raise typer.Exit(1)
+
+    table = Table(title=f"Relatórios em lote ({len(results)} branches)")
+    table.add_column("Branch", style="cyan")
+    table.add_column("Resultado")
+    failures = 0
+    for name, result in results.items():
+        if isinstance(result, Exception):
+            failures += 1
+            table.add_row(name, f"[red]{result}[/red]")
+        else:
+            origin = " [dim](cache)[/dim]" if result.cached else ""
+            if result.range.checkpoint:
+                origin += f" [dim](desde {result.range.checkpoint[:12]})[/dim]"
+            table.add_row(name, f"{result.path.name}{origin}")
+    console.print(table)
+    record_batch_run(results, time.perf_counter() - started)
+    record_checkpoints(root, [result for result in results.values() if not isinstance(result, Exception)])
+    if failures:
+        raise typer.Exit(1)
+
+
+def record_batch_run(results: dict, duration: float) -> None:
+    """Acrescenta o lote ao histórico como uma única execução (`kind: batch`)."""
+    from code_review.git_utils import GitError, find_repo_root
+    from code_review.history import append_run
+
+    reports = [result for result in results.values() if not isinstance(result, Exception)]
+    try:
+        root = find_repo_root()
+        append_run(root, {
+            "kind": "batch",
+            "version": APP_VERSION,
+            "repo": root.name,
+            "branches": len(results),
+            "failures": len(results) - len(reports),
+            "cached": sum(1 for result in reports if result.cached),
+            "diff_bytes": sum(result.path.stat().st_size for result in reports),
+            "duration_s": round(duration, 6),
+        })
+    except (GitError, OSError):
+        pass
+
+
+@app.command()
+def watch(
+    base: str = typer.Option("main", "--base", help="Branch base da comparação"),
+    remote: str = typer.Option("origin", "--remote", help="Remoto da branch base (vazio para usar a local)"),
+    branch_glob: str = typer.Option("*", "--glob", help="Branches locais observadas (ex: 'feature/*')"),
+    output_dir: Optional[Path] = typer.Option(None, "--output-dir", help="Pasta de saída (padrão: diffs/ na raiz do repo)"),
+    jobs: int = typer.Option(2, "--jobs", "-j", help="Relatórios gerados ao mesmo tempo"),
+    debounce: float = typer.Option(0.5, "--debounce", help="Segundos sem mudanças antes de gerar"),
+    polling: bool = typer.Option(False, "--polling", help="Usa polling mesmo com inotify disponível"),
+    poll_interval: float = typer.Option(1.0, "--poll-interval", help="Intervalo do polling, em segundos"),
+    initial: bool = typer.Option(False, "--initial", help="Gera os relatórios de todas as branches ao iniciar"),
+):
+    """
+    Observa as refs e pré-gera o relatório das branches que andaram (ou de todas, se a base andou).
+    """
+    from code_review.config import ConfigError, load_archive, load_compact, load_pathspec, load_scan_secrets
+    from code_review.git_utils import GitError, find_repo_root
+    from code_review.report import REPORT_DIR_NAME, ReportOptions, generate_report
+    from code_review.watch import ReportScheduler, watch_refs
+
+    try:
+        root = find_repo_root()
+        options = ReportOptions(
+            pathspec=load_pathspec(root),
+            compact=load_compact(root),
+            scan_secrets=load_scan_secrets(root),
+            archive=load_archive(root),
+        )
+    except (GitError, ConfigError) as e:
+        echo_status("Erro:", str(e), "red")
+        raise typer.Exit(1)
+    output_dir = output_dir or root / REPORT_DIR_NAME
+
+    def build(branch: str) -> None:
+        started = time.perf_counter()
+        try:
+            result = generate_report(branch, base=base, remote=remote, cwd=root, output_dir=output_dir, options=options)
+        except (GitError, OSError) as e:
+            echo_status(f"[{time.strftime('%H:%M:%S')}] {branch}:", str(e), "red")
+            return
+        origin = " (cache)" if result.cached else ""
+        elapsed = (time.perf_counter() - started) * 1000
+        echo_status(f"[{time.strftime('%H:%M:%S')}] {branch}:", f"{result.path.name}{origin} em {elapsed:.0f} ms")
+
+    def on_change(branches: list) -> None:
+        for branch in branches:
+            scheduler.request(branch)
+
+    scheduler = ReportScheduler(build, jobs=jobs)
+    echo_status("Observando:", f"{root} (Ctrl+C para sair)")
+    try:
+        watch_refs(
+            root,
+            on_change,
+            pattern=branch_glob,
+            base=base,
+            remote=remote,
+            debounce=debounce,
+            polling=polling,
+            poll_interval=poll_interval,
+            initial=initial,
+        )
+    except KeyboardInterrupt:
+        echo_status("Encerrando:", "aguardando os relatórios em andamento...", "yellow")
+    except GitError as e:
+        echo_status("Erro:", str(e), "red")
+        raise typer.Exit(1)
+    finally:
+        scheduler.shutdown()
+
+
+@app.command()
+def serve(
+    http: Optional[int] = typer.Option(None, "--http", help="Porta HTTP em 127.0.0.1 (0 = livre); sem ela, JSON-RPC pelo stdio"),
+    base: str = typer.Option("main", "--base", help="Branch base padrão das consultas"),
+    remote: str = typer.Option("origin", "--remote", help="Remoto da branch base (vazio para usar a local)"),
+    output_dir: Optional[Path] = typer.Option(None, "--output-dir", help="Pasta de saída (padrão: diffs/ na raiz do repo)"),
+    max_memory: int = typer.Option(256, "--max-memory", help="Limite do LRU em memória, em MB"),
+):
+    """
+    Servidor local de relatórios e hunks para agentes (JSON-RPC no stdio ou HTTP).
+    """
+    from code_review.config import ConfigError, load_archive, load_compact, load_pathspec, load_scan_secrets
+    from code_review.git_utils import GitError, find_repo_root
+    from code_review.report import ReportOptions
+    from code_review.serve import ReportService, make_http_server, remove_serve_info, serve_stdio, write_serve_info
+
+    try:
+        root = find_repo_root()
+        options = ReportOptions(
+            pathspec=load_pathspec(root),
+            compact=load_compact(root),
+            scan_secrets=load_scan_secrets(root),
+            archive=load_archive(root),
+        )
+    except (GitError, ConfigError) as e:
+        echo_status("Erro:", str(e), "red")
+        raise typer.Exit(1)
+    service = ReportService(
+        root,
+        base=base,
+        remote=remote,
+        output_dir=output_dir,
+        options=options,
+        max_bytes=max_memory * 1024 * 1024,
+    )
+    try:
+        if http is None:
+            serve_stdio(service)
+            return
+        import signal
+
+        def stop(signum, frame):
+            raise KeyboardInterrupt
+
+        # SIGTERM (kill, systemd, fim da sessão) também remove o serve.json
+        signal.signal(signal.SIGTERM, stop)
+        server = make_http_server(service, http)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        info_path = write_serve_info(root, url)
+        echo_status("Servindo:", f"{url} (endereço em {info_path}; Ctrl+C para sair)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            remove_serve_info(root)
+    finally:
+        service.close()
+
+
+@app.command()
+def show(
+    target: str = typer.Argument(..., help="Caminho do arquivo no diff, opcionalmente com :N para um único hunk"),
+    branch: Optional[str] = typer.Option(None, "--branch", help="Branch do relatório (padrão: branch atual)"),
+    output_dir: Optional[Path] = typer.Option(None, "--output-dir", help="Pasta dos relatórios (padrão: diffs/ na raiz do repo)"),
+    as_json: bool = typer.Option(False, "--json", help="Imprime os registros JSON em vez do texto do diff"),
+):
+    """
+    Mostra um arquivo (ou um hunk) de um relatório JSONL, lendo só os bytes dele pelo índice.
+    """
+    import json
+
+    from code_review.git_utils import GitError, find_repo_root, git_output
+    from code_review.jsonl_report import ReportIndex, index_filename, jsonl_filename
+    from code_review.report import REPORT_DIR_NAME, report_filename
+
+    path, hunk = target, None
+    head, sep, tail = target.rpartition(":")
+    if sep and head and tail.isdigit():
+        path, hunk = head, int(tail)
+
+    try:
+        output_dir = output_dir or find_repo_root() / REPORT_DIR_NAME
+        branch = branch or git_output(["rev-parse", "--abbrev-ref", "HEAD"])
+    except GitError as e:
+        echo_status("Erro:", str(e), "red")
+        raise typer.Exit(1)
+    index_path = index_filename(jsonl_filename(output_dir / report_filename(branch)))
+
+    try:
+        index = ReportIndex(index_path)
+        records = [index.hunk_record(path, hunk)] if hunk is not None else index.file_records(path)
+    except FileNotFoundError:
+        echo_status("Erro:", f"índice não encontrado: {index_path} (gere com 'report --format jsonl')", "red")
+        raise typer.Exit(1)
+    except KeyError:
+        echo_status("Erro:", f"'{path}' não está no relatório de '{branch}'.", "red")
+        raise typer.Exit(1)
+    except (IndexError, ValueError) as e:
+        echo_status("Erro:", str(e), "red")
+        raise typer.Exit(1)
+
+    for record in records:
+        if as_json:
+            typer.echo(json.dumps(record, ensure_ascii=False))
+        else:
+            sys.stdout.write(record["header"] if record["type"] == "file" else record["text"])
+
+
+@app.command()
+def stats(
+    repos: Optional[Path] = typer.Option(None, "--repos", help="Arquivo com um repositório por linha (padrão: repositório atual)"),
+    kind: str = typer.Option("report", "--kind", help="Tipo de execução: report, batch ou init"),
+    as_json: bool = typer.Option(False, "--json", help="Imprime o resumo em JSON"),
+):
+    """
+    Latência (p50/p95/máx) e tamanho dos relatórios a partir do histórico local.
+    """
+    import json
+
+    from code_review.files import read_list_file
+    from code_review.git_utils import GitError, find_repo_root
+    from code_review.history import read_runs, summarize
+
+    try:
+        roots = [Path(line).expanduser() for line in read_list_file(repos)] if repos else [find_repo_root()]
+    except (GitError, OSError) as e:
+        echo_status("Erro:", str(e), "red")
+        raise typer.Exit(1)
+
+    summaries = {str(root): summarize(read_runs(root, kind=kind)) for root in roots}
+
+    if as_json or not sys.stdout.isatty():
+        typer.echo(json.dumps({"kind": kind, "repos": summaries}, ensure_ascii=False, indent=2))
+        return
+
+    from rich.table import Table
+
+    table = Table(title=f"Histórico de execuções ({kind})")
+    table.add_column("Repositório", style="cyan")
+    table.add_column("Execuções", justify="right")
+    table.add_column("p50", justify="right")
+    table.add_column("p95", justify="right")
+    table.add_column("Máx", justify="right")
+    table.add_column("Tamanho p50", justify="right")
+    table.add_column("Tamanho máx", justify="right")
+    table.add_column("Tendência", justify="right")
+    for root, summary in summaries.items():
+        trend = summary["size_trend"]
+        table.add_row(
+            Path(root).name,
+            str(summary["runs"]),
+            f"{summary['duration_p50'] * 1000:.0f} ms",
+            f"{summary['duration_p95'] * 1000:.0f} ms",
+            f"{summary['duration_max'] * 1000:.0f} ms",
+            f"{summary['bytes_p50'] / 1024:.0f} KiB",
+            f"{summary['bytes_max'] / 1024:.0f} KiB",
+            f"{trend:.2f}x" if trend is not None else "-",
+        )
+    console.print(table)
+
+
+@app.command()
+def gc(
+    output_dir: Optional[Path] = typer.Option(None, "--output-dir", help="Pasta dos relatórios (padrão: diffs/ na raiz do repo)"),
+    max_age_days: Optional[float] = typer.Option(None, "--max-age-days", help="Idade máxima das versões arquivadas (padrão: [archive] do config.toml; 0 = sem limite)"),
+    max_versions: Optional[int] = typer.Option(None, "--max-versions", help="Versões arquivadas mantidas por branch (0 = sem limite)"),
+    max_bytes: Optional[int] = typer.Option(None, "--max-bytes", help="Tamanho máximo de diffs/.archive em bytes (0 = sem limite)"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Só mostra o que seria removido"),
+    as_json: bool = typer.Option(False, "--json", help="Imprime o resumo em JSON"),
+):
+    """
+    Aplica a retenção de diffs/.archive e os limites dos caches em diffs/.cache (só metadados do diretório).
+    """
+    import json
+    from dataclasses import replace
+
+    from code_review.archive import ReportArchive, RetentionPolicy
+    from code_review.config import ConfigError, load_archive
+    from code_review.git_utils import GitError, find_repo_root
+    from code_review.report import REPORT_DIR_NAME, file_patch_cache, report_cache
+    from code_review.semantic import semantic_cache
+
+    try:
+        root = find_repo_root()
+        policy = load_archive(root) or RetentionPolicy()
+    except (GitError, ConfigError) as e:
+        echo_status("Erro:", str(e), "red")
+        raise typer.Exit(1)
+    output_dir = output_dir or root / REPORT_DIR_NAME
+    overrides = {"max_age_days": max_age_days, "max_versions": max_versions, "max_bytes": max_bytes}
+    policy = replace(policy, **{key: value or None for key, value in overrides.items() if value is not None})
+
+    result = ReportArchive(output_dir, policy).collect(dry_run=dry_run)
+    evicted = 0
+    if not dry_run:
+        for cache in (report_cache(output_dir), file_patch_cache(output_dir), semantic_cache(output_dir)):
+            evicted += cache.evict()
+
+    if as_json or not sys.stdout.isatty():
+        typer.echo(json.dumps({
+            "dry_run": dry_run,
+            "removed": [str(path) for path in result.removed],
+            "freed_bytes": result.freed_bytes,
+            "kept": result.kept,
+            "kept_bytes": result.kept_bytes,
+            "cache_evicted": evicted,
+        }, ensure_ascii=False, indent=2))
+        return
+
+    mib = 1024 * 1024
+    if dry_run:
+        for path in result.removed:
+            echo_status("Removeria:", str(path), "yellow")
+    verb = "seriam removida(s)" if dry_run else "removida(s)"
+    echo_status(
+        "Arquivo:",
+        f"{len(result.removed)} versão(ões) {verb} ({result.freed_bytes / mib:.1f} MiB); "
+        f"{result.kept} mantida(s) ({result.kept_bytes / mib:.1f} MiB)",
+    )
+    if not dry_run:
+        echo_status("Cache:", f"{evicted} entrada(s) removida(s)")
+
+
 def main():
     app()
 
@@ -0,0 +1,234 @@
+"""
+Arquivo comprimido das versões anteriores dos relatórios (`diffs/.archive/`).
+
+O relatório atual de cada branch continua em texto puro em `diffs/`. Antes de
+ser substituído, o arquivo anterior ganha um hard link temporário (sem cópia);
+depois da publicação, se o conteúdo mudou, ele é comprimido em
+`diffs/.archive/<relatório>.<data>.md.zst` (zstd da biblioteca padrão, no
+Python 3.14+) ou `.md.gz`, com o mtime da versão original.
+
+A retenção olha só os dados do `scandir`/`stat` (nunca lê os arquivos):
+idade máxima, versões por branch e bytes totais, descartando as mais antigas.
+O `review-cli gc` aplica os mesmos limites sob demanda.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from code_review.files import temp_path_for
+from code_review.report_cache import STAMP_SEARCH_BYTES, stamp_span
+from code_review.shard import manifest_filename
+
+ARCHIVE_DIR_NAME = ".archive"
+DEFAULT_MAX_AGE_DAYS = 30
+DEFAULT_MAX_VERSIONS = 5
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+GZIP_LEVEL = 3
+ZSTD_LEVEL = 3
+# Hard links e temporários de execuções interrompidas saem depois disso
+STALE_TEMP_SECONDS = 3600
+COPY_BUFFER = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Limites do arquivo (None desliga o limite)."""
+
+    max_age_days: Optional[float] = DEFAULT_MAX_AGE_DAYS
+    # Versões arquivadas mantidas por branch
+    max_versions: Optional[int] = DEFAULT_MAX_VERSIONS
+    max_bytes: Optional[int] = DEFAULT_MAX_BYTES
+
+
+@dataclass
+class GcResult:
+    removed: list[Path] = field(default_factory=list)
+    freed_bytes: int = 0
+    kept: int = 0
+    kept_bytes: int = 0
+
+
+def _zstd():
+    try:
+        from compression import zstd
+    except ImportError:
+        return None
+    return zstd
+
+
+def compression_suffix() -> str:
+    return ".zst" if _zstd() is not None else ".gz"
+
+
+def _open_compressed(path: Path, suffix: str):
+    if suffix == ".zst":
+        return _zstd().open(path, "wb", level=ZSTD_LEVEL)
+    import gzip
+
+    return gzip.open(path, "wb", compresslevel=GZIP_LEVEL)
+
+
+def archive_dir(output_dir: Path) -> Path:
+    return output_dir / ARCHIVE_DIR_NAME
+
+
+def report_of(name: str) -> Optional[str]:
+    """Nome do relatório de uma versão arquivada (`<relatório>.<data>.md.gz` -> `<relatório>.md`)."""
+    stem, dot, suffix = name.rpartition(".")
+    if not dot or suffix not in ("gz", "zst") or not stem.endswith(".md"):
+        return None
+    report, dot, _stamp = stem[: -len(".md")].rpartition(".")
+    return f"{report}.md" if dot else None
+
+
+class ReportArchive:
+    """Versões anteriores dos relatórios de uma pasta `diffs/`."""
+
+    def __init__(self, output_dir: Path, policy: Optional[RetentionPolicy] = None):
+        self.root = archive_dir(output_dir)
+        self.policy = policy or RetentionPolicy()
+
+    def stash(self, path: Path) -> Optional[Path]:
+        """
+        Segura a versão atual de `path` com um hard link (ou cópia, se o
+        sistema de arquivos não tiver links) antes de ela ser substituída.
+        None se não houver relatório em Markdown completo (índices de partes
+        não são arquivados).
+        """
+        if not path.is_file() or path.with_name(manifest_filename(path.name)).exists():
+            return None
+        self.root.mkdir(parents=True, exist_ok=True)
+        held = temp_path_for(self.root / path.name)
+        held.unlink(missing_ok=True)
+        try:
+            os.link(path, held)
+        except OSError:
+            shutil.copy2(path, held)
+        return held
+
+    def store(self, held: Path, path: Path) -> Optional[Path]:
+        """
+        Comprime a versão segurada por `stash` se `path` mudou, aplica a
+        retenção e retorna o arquivo criado (None se nada mudou).
+        """
+        try:
+            if not _changed(held, path):
+                return None
+            st = held.stat()
+            stamp = datetime.fromtimestamp(st.st_mtime, tz=timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            suffix = compression_suffix()
+            dest = self.root / f"{path.stem}.{stamp}{path.suffix}{suffix}"
+            copy = 1
+            while dest.exists():
+                # Versões gravadas no mesmo segundo
+                dest = self.root / f"{path.stem}.{stamp}-{copy}{path.suffix}{suffix}"
+                copy += 1
+            tmp_path = temp_path_for(dest)
+            try:
+                with open(held, "rb") as src, _open_compressed(tmp_path, suffix) as out:
+                    shutil.copyfileobj(src, out, COPY_BUFFER)
+                os.replace(tmp_path, dest)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+            # A idade da versão é a do relatório original, não a do arquivamento
+            os.utime(dest, ns=(st.st_atime_ns, st.st_mtime_ns))
+        finally:
+            held.unlink(missing_ok=True)
+        self.collect()
+        return dest
+
+    def collect(
+        self,
+        policy: Optional[RetentionPolicy] = None,
+        dry_run: bool = False,
+        now: Optional[float] = None,
+    ) -> GcResult:
+        """Aplica a retenção (por `scandir`/`stat`) e retorna o que saiu e o que ficou."""
+        policy = policy or self.policy
+        now = time.time() if now is None else now
+        result = GcResult()
+        versions = []
+        try:
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    try:
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    if entry.name.startswith("."):
+                        # O ctime muda ao criar o link: o mtime é o do relatório antigo
+                        if now - max(st.st_mtime, st.st_ctime) > STALE_TEMP_SECONDS:
+                            self._remove(Path(entry.path), st.st_size, result, dry_run)
+                        continue
+                    report = report_of(entry.name)
+                    if report is not None:
+                        versions.append((st.st_mtime, st.st_size, report, Path(entry.path)))
+        except FileNotFoundError:
+            return result
+
+        # Mais novas primeiro: o que passa de algum limite sai
+        versions.sort(key=lambda version: version[0], reverse=True)
+        min_mtime = now - policy.max_age_days * 86400 if policy.max_age_days is not None else None
+        per_report: dict[str, int] = {}
+        for mtime, size, report, path in versions:
+            count = per_report.get(report, 0)
+            if (
+                (min_mtime is not None and mtime < min_mtime)
+                or (policy.max_versions is not None and count >= policy.max_versions)
+                or (policy.max_bytes is not None and result.kept_bytes + size > policy.max_bytes)
+            ):
+                self._remove(path, size, result, dry_run)
+                continue
+            per_report[report] = count + 1
+            result.kept += 1
+            result.kept_bytes += size
+        return result
+
+    @staticmethod
+    def _remove(path: Path, size: int, result: GcResult, dry_run: bool) -> None:
+        if not dry_run:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                return
+        result.removed.append(path)
+        result.freed_bytes += size
+
+
+def _changed(held: Path, path: Path) -> bool:
+    try:
+        if os.path.samefile(held, path):
+            return False
+        if held.stat().st_size == path.stat().st_size and _same_report(held, path):
+            return False
+    except FileNotFoundError:
+        # Relatório removido (ex.: virou índice de partes): a versão anterior vai para o arquivo
+        pass
+    return True
+
+
+def _same_report(a: Path, b: Path) -> bool:
+    """Mesmo conteúdo, ignorando a data de geração do cabeçalho."""
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        if _unstamped(fa.read(STAMP_SEARCH_BYTES)) != _unstamped(fb.read(STAMP_SEARCH_BYTES)):
+            return False
+        while True:
+            chunk = fa.read(COPY_BUFFER)
+            if chunk != fb.read(COPY_BUFFER):
+                return False
+            if not chunk:
+                return True
+
+
+def _unstamped(head: bytes) -> bytes:
+    span = stamp_span(head)
+    return head[: span[0]] + head[span[1] :] if span else head
@@ -0,0 +1,199 @@
+"""
+Relatórios em lote para várias branches de uma vez.
+
+Em vez de cada branch calcular o próprio merge-base e rodar o próprio
+`git log` (relendo os mesmos commits da base), o lote:
+
+- resolve todas as refs por um único `git cat-file --batch-check` de vida longa;
+- faz um único `git rev-list --boundary --parents` com todas as pontas, do qual
+  saem o merge-base e o histórico de commits de cada branch;
+- gera os relatórios em paralelo, reaproveitando o cache de relatórios, de
+  modo que branches sem mudanças não custam nada.
+
+O planejamento não lê objetos: refs saem do `--batch-check` e commits
+(pais e assunto) do `rev-list`, de modo que um `git cat-file --batch`
+compartilhado não teria leitura a economizar. Os blobs do diff são lidos
+pelos próprios processos `git diff` de cada relatório, e um leitor único
+serializaria as threads do lote sem tirar nenhum processo do caminho.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Union
+
+from code_review.checkpoints import since_checkpoint
+from code_review.files import read_list_file
+from code_review.git_utils import CatFileReader, GitError, git_output, merge_base, stream_git
+from code_review.report import ReportOptions, ReportRange, ReportResult, build_report, default_output_dir
+
+
+@dataclass
+class BranchPlan:
+    """Faixa resolvida e histórico de commits (formato `--oneline`) de uma branch."""
+
+    range: ReportRange
+    commit_lines: list[str]
+
+
+def read_branch_list(path: Path) -> list[str]:
+    """Lê uma branch por linha, ignorando linhas vazias e comentários (`#`)."""
+    return read_list_file(path)
+
+
+def list_branches(pattern: str, cwd: Optional[Path] = None) -> list[str]:
+    """Branches que casam com um glob de refs (ex.: `feature/*` ou `refs/remotes/origin/*`)."""
+    ref_pattern = pattern if pattern.startswith("refs/") else f"refs/heads/{pattern}"
+    output = git_output(["for-each-ref", "--format=%(refname:short)", ref_pattern], cwd=cwd)
+    return [line for line in output.splitlines() if line]
+
+
+def _resolve_refs(names: Iterable[str], reader: CatFileReader) -> dict[str, Optional[str]]:
+    resolved = {}
+    for name in names:
+        info = reader.info(f"{name}^{{commit}}")
+        resolved[name] = info[0] if info else None
+    return resolved
+
+
+def plan_branches(
+    branches: Sequence[str],
+    base: str = "main",
+    remote: str = "origin",
+    cwd: Optional[Path] = None,
+) -> tuple[list[BranchPlan], dict[str, str]]:
+    """
+    Resolve todas as branches contra a mesma base em uma passada.
+    Retorna (planos, erros por branch).
+    """
+    candidates = [f"{remote}/{base}", base] if remote else [base]
+    with CatFileReader(cwd=cwd, check_only=True) as reader:
+        resolved_bases = _resolve_refs(candidates, reader)
+        base_ref = next((ref for ref in candidates if resolved_bases[ref]), None)
+        if base_ref is None:
+            raise GitError(f"Branch base não encontrada: '{candidates[0]}' nem '{base}'.")
+        base_sha = resolved_bases[base_ref]
+        tips = _resolve_refs(dict.fromkeys(branches), reader)
+
+    errors = {name: f"Branch alvo não encontrada: '{name}'." for name, sha in tips.items() if sha is None}
+    unique_tips = list(dict.fromkeys(sha for sha in tips.values() if sha))
+
+    # Uma única caminhada: commits exclusivos de cada ponta + fronteira com a base
+    parents: dict[str, list[str]] = {}
+    order: list[str] = []
+    oneline: dict[str, str] = {}
+    if unique_tips:
+        args = ["rev-list", "--boundary", "--parents", "--format=%h %s", *unique_tips, f"^{base_sha}"]
+        with stream_git(args, cwd=cwd) as lines:
+            # Linhas alternadas: "commit <sha> <pais...>" e a linha do --format
+            for header in lines:
+                shas = header.rstrip("\n")[len("commit "):].split()
+                formatted = next(lines, "").rstrip("\n")
+                if shas[0].startswith("-"):
+                    # Commit de fronteira (alcançável pela base)
+                    continue
+                parents[shas[0]] = shas[1:]
+                order.append(shas[0])
+                oneline[shas[0]] = formatted
+
+    merge_bases: dict[str, Optional[str]] = {}
+    histories: dict[str, list[str]] = {}
+    for tip in unique_tips:
+        if tip not in parents:
+            # Ponta já alcançável pela base: não há commits exclusivos
+            merge_bases[tip] = tip
+            histories[tip] = []
+            continue
+        visited: set[str] = set()
+        reached: set[str] = set()
+        stack = [tip]
+        while stack:
+            sha = stack.pop()
+            if sha in visited:
+                continue
+            visited.add(sha)
+            for parent in parents[sha]:
+                if parent in parents:
+                    stack.append(parent)
+                else:
+                    reached.add(parent)
+        if len(reached) == 1:
+            merge_bases[tip] = reached.pop()
+        else:
+            # Sem fronteira única (merges cruzados ou históricos sem relação)
+            try:
+                merge_bases[tip] = merge_base(base_sha, tip, cwd=cwd)
+            except GitError:
+                merge_bases[tip] = None
+        histories[tip] = [
+            oneline[sha] for sha in order if sha in visited and len(parents[sha]) <= 1
+        ]
+
+    plans = []
+    for name in dict.fromkeys(branches):
+        tip = tips.get(name)
+        if not tip:
+            continue
+        if merge_bases[tip] is None:
+            errors[name] = f"Sem merge-base entre '{base_ref}' e '{name}'."
+            continue
+        rng = ReportRange(
+            target=name,
+            base=base,
+            base_ref=base_ref,
+            base_sha=base_sha,
+            tip_sha=tip,
+            merge_base=merge_bases[tip],
+        )
+        plans.append(BranchPlan(range=rng, commit_lines=histories[tip]))
+    return plans, errors
+
+
+def generate_batch(
+    branches: Sequence[str],
+    base: str = "main",
+    remote: str = "origin",
+    cwd: Optional[Path] = None,
+    output_dir: Optional[Path] = None,
+    options: Optional[ReportOptions] = None,
+    workers: int = 1,
+    checkpoints: Optional[dict[str, str]] = None,
+) -> dict[str, Union[ReportResult, Exception]]:
+    """
+    Gera o relatório de cada branch (em paralelo com `workers`), mantendo a
+    ordem de entrada. Falhas individuais são devolvidas no lugar do resultado.
+    Com `checkpoints` (ponta da revisão anterior por branch), cada relatório
+    cobre só o delta desde o checkpoint, quando ele ainda é ancestral da ponta.
+    """
+    output_dir = output_dir or default_output_dir(cwd)
+    plans, errors = plan_branches(branches, base=base, remote=remote, cwd=cwd)
+    results: dict[str, Union[ReportResult, Exception]] = {
+        name: GitError(message) for name, message in errors.items()
+    }
+
+    def run(plan: BranchPlan) -> Union[ReportResult, Exception]:
+        try:
+            rng, commit_lines = plan.range, plan.commit_lines
+            checkpoint = (checkpoints or {}).get(rng.target)
+            if checkpoint:
+                rng = since_checkpoint(rng, checkpoint, cwd=cwd)
+                if rng.checkpoint:
+                    # O histórico pré-calculado cobre a faixa completa
+                    commit_lines = None
+            return build_report(
+                rng,
+                cwd=cwd,
+                output_dir=output_dir,
+                options=options,
+                commit_lines=commit_lines,
+            )
+        except (GitError, OSError) as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        for plan, result in zip(plans, pool.map(run, plans)):
+            results[plan.range.target] = result
+
+    return {name: results[name] for name in dict.fromkeys(branches)}
@@ -0,0 +1,61 @@
+"""
+Pontos de revisão por branch (`.code_review/checkpoints.json`).
+
+Cada `report` registra a ponta (tip) que acabou de relatar. Com
+`--since-last`, o próximo relatório da mesma branch compara só
+`<checkpoint>..<tip>`: em branches longas, cada ciclo de revisão vira um
+delta pequeno. Se o checkpoint não é mais ancestral da ponta (rebase ou
+force-push) ou sumiu do repositório, o relatório volta a ser completo.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Iterable, Optional
+
+from code_review.files import write_lines_atomic
+from code_review.git_utils import is_ancestor
+from code_review.report import ReportRange
+
+CHECKPOINTS_PATH = Path(".code_review") / "checkpoints.json"
+CHECKPOINTS_FORMAT = 1
+
+
+def load_checkpoints(root: Path) -> dict[str, dict]:
+    """Checkpoints por branch (vazio se o arquivo não existir ou estiver ilegível)."""
+    try:
+        data = json.loads((root / CHECKPOINTS_PATH).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("format") != CHECKPOINTS_FORMAT:
+        return {}
+    branches = data.get("branches", {})
+    return branches if isinstance(branches, dict) else {}
+
+
+def save_checkpoints(root: Path, ranges: Iterable[ReportRange]) -> None:
+    """Registra a ponta relatada de cada faixa, preservando as demais branches."""
+    branches = load_checkpoints(root)
+    now = round(time.time(), 3)
+    for rng in ranges:
+        branches[rng.target] = {"tip": rng.tip_sha, "base": rng.base_ref, "ts": now}
+    data = {"format": CHECKPOINTS_FORMAT, "branches": dict(sorted(branches.items()))}
+    write_lines_atomic([json.dumps(data, ensure_ascii=False, indent=2), "\n"], root / CHECKPOINTS_PATH)
+
+
+def checkpoint_tip(checkpoints: dict[str, dict], target: str) -> Optional[str]:
+    entry = checkpoints.get(target)
+    return entry.get("tip") if isinstance(entry, dict) else None
+
+
+def since_checkpoint(rng: ReportRange, checkpoint: Optional[str], cwd: Optional[Path] = None) -> ReportRange:
+    """
+    Faixa `checkpoint..tip` quando o checkpoint ainda é ancestral da ponta;
+    caso contrário devolve `rng` inalterada (relatório completo).
+    """
+    if not checkpoint or not is_ancestor(checkpoint, rng.tip_sha, cwd=cwd):
+        return rng
+    return replace(rng, base_sha=checkpoint, merge_base=checkpoint, checkpoint=checkpoint)
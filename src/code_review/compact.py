@@ -0,0 +1,201 @@
+"""
+Modo compacto do diff de revisão (`review-cli report --compact`).
+
+Um pós-processador de uma única passada sobre o patch, igual em todas as
+plataformas (os scripts `.sh`/`.ps1` gerados não o aplicam):
+
+- contexto configurável (`-U<n>`) e contexto de função (`--function-context`),
+  repassados ao próprio git;
+- linhas removidas mantidas, descartadas (como o `grep -v '^-[^-]'` do
+  script) ou resumidas em uma linha por bloco;
+- blocos movidos ou copiados: um bloco de linhas adicionadas igual (a menos
+  de indentação) a um bloco já visto no patch, removido ou adicionado, vira
+  uma referência ao original. Só blocos anteriores no stream são conhecidos;
+  quando a cópia vem antes, é o bloco removido que aponta para ela.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+
+from code_review.diff_parser import parse_hunk_header, path_from_header
+
+REMOVED_MODES = ("keep", "drop", "summary")
+DEFAULT_MIN_MOVED_LINES = 4
+# Limite de blocos lembrados (os mais antigos saem primeiro)
+MAX_INDEXED_BLOCKS = 100_000
+
+
+@dataclass(frozen=True)
+class CompactOptions:
+    context: Optional[int] = None
+    function_context: bool = False
+    removed: str = "summary"
+    collapse_moved: bool = True
+    min_moved_lines: int = DEFAULT_MIN_MOVED_LINES
+
+    def __post_init__(self):
+        if self.removed not in REMOVED_MODES:
+            raise ValueError(f"Modo de linhas removidas inválido: {self.removed}. Opções: {', '.join(REMOVED_MODES)}")
+        if self.context is not None and self.context < 0:
+            raise ValueError("O contexto não pode ser negativo.")
+
+    def git_args(self) -> tuple[str, ...]:
+        """Opções repassadas ao `git diff`."""
+        args = []
+        if self.context is not None:
+            args.append(f"-U{self.context}")
+        if self.function_context:
+            args.append("--function-context")
+        return tuple(args)
+
+    def content_key(self) -> tuple:
+        return (self.context, self.function_context, self.removed, self.collapse_moved, self.min_moved_lines)
+
+
+def _block_key(lines: list[str], min_lines: int) -> Optional[str]:
+    """
+    Hash do bloco sem o prefixo +/-, indentação e linhas em branco (o git
+    costuma deslocar a linha em branco entre funções de um lado para o outro).
+    None se o bloco tiver menos de `min_lines` linhas com conteúdo.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    filled = 0
+    for line in lines:
+        text = line[1:].strip()
+        if text:
+            filled += 1
+            digest.update(text.encode("utf-8", "surrogateescape") + b"\n")
+    return digest.hexdigest() if filled >= min_lines else None
+
+
+class _Compactor:
+    def __init__(self, options: CompactOptions):
+        self.options = options
+        # hash do bloco -> ("+" ou "-", "caminho:linha")
+        self.blocks: dict[str, tuple[str, str]] = {}
+        self.path = ""
+        self.old_line = 0
+        self.new_line = 0
+        self.run: list[str] = []
+        self.run_kind = ""
+        self.run_start = 0
+        # Bloco removido logo antes (sem contexto no meio): o mesmo texto
+        # adicionado em seguida é só reindentação, não movimento
+        self.previous_removed: set[str] = set()
+
+    def _remember(self, key: str, kind: str, where: str) -> None:
+        if key in self.blocks:
+            return
+        if len(self.blocks) >= MAX_INDEXED_BLOCKS:
+            del self.blocks[next(iter(self.blocks))]
+        self.blocks[key] = (kind, where)
+
+    def _segments(self, run: list[str]) -> Iterator[tuple[int, list[str], Optional[str]]]:
+        """
+        Parágrafos do bloco (separados por linhas em branco) com o deslocamento
+        e o hash de cada um: uma função movida costuma vir colada a outras
+        remoções ou adições no mesmo bloco.
+        """
+        options = self.options
+        start = 0
+        for i, line in enumerate(run):
+            ends = i + 1 == len(run) or (not line[1:].strip() and run[i + 1][1:].strip())
+            if ends:
+                segment = run[start:i + 1]
+                key = _block_key(segment, options.min_moved_lines) if options.collapse_moved else None
+                yield start, segment, key
+                start = i + 1
+
+    def flush(self) -> Iterator[str]:
+        run, kind = self.run, self.run_kind
+        self.run, self.run_kind = [], ""
+        if not run:
+            return
+        segments = list(self._segments(run))
+        if kind == "+":
+            for offset, segment, key in segments:
+                seen = self.blocks.get(key) if key else None
+                if key:
+                    self._remember(key, "+", f"{self.path}:{self.run_start + offset}")
+                if seen is None or key in self.previous_removed:
+                    yield from segment
+                elif seen[0] == "-":
+                    yield f"+⟲ {len(segment)} linha(s) movida(s) de {seen[1]}\n"
+                else:
+                    yield f"+⟲ {len(segment)} linha(s) iguais a {seen[1]}\n"
+            return
+
+        self.previous_removed = {key for _, _, key in segments if key}
+        pending = 0
+        for offset, segment, key in segments:
+            seen = self.blocks.get(key) if key else None
+            if key:
+                self._remember(key, "-", f"{self.path}:{self.run_start + offset}")
+            if self.options.removed == "keep":
+                yield from segment
+            elif self.options.removed == "summary":
+                if seen is not None and seen[0] == "+":
+                    if pending:
+                        yield f"-⋯ {pending} linha(s) removida(s)\n"
+                        pending = 0
+                    yield f"-⟲ {len(segment)} linha(s) movida(s) para {seen[1]}\n"
+                else:
+                    pending += len(segment)
+        if pending:
+            yield f"-⋯ {pending} linha(s) removida(s)\n"
+
+    def end_run(self) -> Iterator[str]:
+        yield from self.flush()
+        self.previous_removed = set()
+
+    def process(self, lines: Iterable[str]) -> Iterator[str]:
+        header: Optional[list[str]] = None
+        for line in lines:
+            if line.startswith("diff "):
+                yield from self.end_run()
+                header = [line]
+                yield line
+                continue
+            if line.startswith("@@"):
+                yield from self.end_run()
+                if header is not None:
+                    self.path = path_from_header(header)
+                    header = None
+                ranges = parse_hunk_header(line)
+                if ranges:
+                    self.old_line, self.new_line = ranges[0], ranges[2]
+                yield line
+                continue
+            if header is not None:
+                # Cabeçalho do arquivo (inclui `--- a/...` e `+++ b/...`)
+                header.append(line)
+                yield line
+                continue
+
+            kind = line[:1]
+            if kind in ("+", "-"):
+                if kind != self.run_kind:
+                    yield from self.flush()
+                    self.run_kind = kind
+                    self.run_start = self.new_line if kind == "+" else self.old_line
+                self.run.append(line)
+                if kind == "+":
+                    self.new_line += 1
+                else:
+                    self.old_line += 1
+                continue
+
+            yield from self.end_run()
+            if kind == " ":
+                self.old_line += 1
+                self.new_line += 1
+            yield line
+        yield from self.end_run()
+
+
+def compact_patch(lines: Iterable[str], options: CompactOptions) -> Iterator[str]:
+    """Aplica o modo compacto a um patch unificado, linha a linha."""
+    return _Compactor(options).process(lines)
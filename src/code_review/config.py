@@ -0,0 +1,219 @@
+"""
+Perfil de caminhos do Review Kit em `.code_review/config.toml`.
+
+Exemplo:
+
+    [pathspec]
+    presets = ["docs", "lockfiles", "node"]
+    exclude = ["generated/", "*.pb.go"]
+    include = ["."]
+
+    [report]
+    compact = true          # modo compacto (ver `code_review.compact`)
+    context = 1
+    removed = "summary"     # keep, drop ou summary
+
+    [archive]
+    max_age_days = 30       # versões anteriores em diffs/.archive
+    max_versions = 5        # por branch
+    max_bytes = 268435456
+
+O perfil é compilado em pathspecs "mágicos" do git (`:(exclude)...`), de modo
+que o próprio git ignore essas árvores. O mesmo filtro compilado é usado pelo
+`review-cli report` e embutido nos scripts `.sh`/`.ps1` gerados pelo `init`.
+
+Padrões:
+- terminados em `/` são diretórios (em qualquer nível, ou a partir da raiz se
+  começarem com `/`);
+- sem `/` casam com o nome do arquivo em qualquer nível;
+- com `/` no meio são relativos à raiz.
+"""
+
+from __future__ import annotations
+
+import tomllib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from code_review.archive import RetentionPolicy
+from code_review.compact import CompactOptions
+from code_review.prefilter import GENERATED_PATTERNS, LOCKFILE_PATTERNS
+
+CONFIG_PATH = Path(".code_review") / "config.toml"
+
+PRESETS: dict[str, tuple[str, ...]] = {
+    "docs": ("*.md",),
+    "lockfiles": LOCKFILE_PATTERNS,
+    "node": ("node_modules/", "dist/", "coverage/", "*.min.js", "*.min.css", "*.map"),
+    "python": ("__pycache__/", ".venv/", "*.egg-info/", "*.pyc", "*_pb2.py", "*_pb2_grpc.py"),
+    "go": ("vendor/", "*.pb.go"),
+    "java": ("target/", "build/", "*.class"),
+    "dotnet": ("bin/", "obj/"),
+    # Tudo o que o pré-filtro trata como gerado (inclui lockfiles e vendor/)
+    "generated": GENERATED_PATTERNS,
+}
+# Sem configuração, o filtro é o mesmo dos scripts originais: tudo menos *.md
+DEFAULT_PRESETS = ("docs",)
+DEFAULT_INCLUDE = (".",)
+
+
+class ConfigError(ValueError):
+    """Configuração inválida em `.code_review/config.toml`."""
+
+
+def compile_pattern(pattern: str, exclude: bool = False) -> str:
+    """Converte um padrão do perfil em um pathspec do git."""
+    if pattern in (".", "./"):
+        return ":(exclude)." if exclude else "."
+    magic = ["exclude"] if exclude else []
+    anchored = pattern.startswith("/")
+    body = pattern.lstrip("/")
+    if body.endswith("/"):
+        body = f"{body}**" if anchored else f"**/{body}**"
+    elif not anchored and "/" not in body:
+        if body.startswith("*"):
+            # `*` sem a mágica glob também atravessa diretórios: `:(exclude)*.md`
+            return f":({','.join(magic)}){body}" if magic else body
+        body = f"**/{body}"
+    return f":({','.join([*magic, 'glob'])}){body}"
+
+
+@dataclass(frozen=True)
+class PathspecProfile:
+    include: tuple[str, ...] = DEFAULT_INCLUDE
+    exclude: tuple[str, ...] = ()
+    presets: tuple[str, ...] = DEFAULT_PRESETS
+
+    def patterns(self) -> tuple[str, ...]:
+        """Exclusões efetivas (presets + `exclude`), sem repetições."""
+        patterns: list[str] = []
+        for name in self.presets:
+            patterns.extend(PRESETS[name])
+        patterns.extend(self.exclude)
+        return tuple(dict.fromkeys(patterns))
+
+    def compile(self) -> tuple[str, ...]:
+        include = [compile_pattern(p) for p in self.include] or ["."]
+        return (*include, *(compile_pattern(p, exclude=True) for p in self.patterns()))
+
+
+def _string_list(table: dict, key: str, default: tuple[str, ...]) -> tuple[str, ...]:
+    value = table.get(key, list(default))
+    if not isinstance(value, list) or not all(isinstance(item, str) and item for item in value):
+        raise ConfigError(f"'pathspec.{key}' deve ser uma lista de textos não vazios.")
+    return tuple(value)
+
+
+def parse_profile(data: dict) -> PathspecProfile:
+    table = data.get("pathspec", {})
+    if not isinstance(table, dict):
+        raise ConfigError("'pathspec' deve ser uma tabela.")
+    presets = _string_list(table, "presets", DEFAULT_PRESETS)
+    unknown = [name for name in presets if name not in PRESETS]
+    if unknown:
+        raise ConfigError(
+            f"Preset desconhecido: {', '.join(unknown)}. Opções: {', '.join(PRESETS)}"
+        )
+    return PathspecProfile(
+        include=_string_list(table, "include", DEFAULT_INCLUDE),
+        exclude=_string_list(table, "exclude", ()),
+        presets=presets,
+    )
+
+
+def _load_config(root: Path) -> dict:
+    path = root / CONFIG_PATH
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except FileNotFoundError:
+        return {}
+    except tomllib.TOMLDecodeError as e:
+        raise ConfigError(f"{path}: {e}") from e
+
+
+def load_profile(root: Path) -> PathspecProfile:
+    """Perfil de `root/.code_review/config.toml` (padrão se o arquivo não existir)."""
+    return parse_profile(_load_config(root))
+
+
+def load_pathspec(root: Path) -> tuple[str, ...]:
+    """Atalho: pathspec compilado do perfil de `root`."""
+    return load_profile(root).compile()
+
+
+def parse_compact(data: dict) -> Optional[CompactOptions]:
+    """Modo compacto da tabela `[report]` (None quando `compact` não está ligado)."""
+    table = data.get("report", {})
+    if not isinstance(table, dict):
+        raise ConfigError("'report' deve ser uma tabela.")
+    if not table.get("compact", False):
+        return None
+    kinds = {
+        "context": int,
+        "function_context": bool,
+        "removed": str,
+        "moved": bool,
+        "min_moved_lines": int,
+    }
+    for key, kind in kinds.items():
+        value = table.get(key)
+        if value is not None and (not isinstance(value, kind) or (kind is int and isinstance(value, bool))):
+            raise ConfigError(f"'report.{key}' deve ser do tipo {kind.__name__}.")
+    defaults = CompactOptions()
+    try:
+        return CompactOptions(
+            context=table.get("context"),
+            function_context=table.get("function_context", defaults.function_context),
+            removed=table.get("removed", defaults.removed),
+            collapse_moved=table.get("moved", defaults.collapse_moved),
+            min_moved_lines=table.get("min_moved_lines", defaults.min_moved_lines),
+        )
+    except ValueError as e:
+        raise ConfigError(f"'report': {e}") from e
+
+
+def load_compact(root: Path) -> Optional[CompactOptions]:
+    """Modo compacto configurado em `root/.code_review/config.toml`, se houver."""
+    return parse_compact(_load_config(root))
+
+
+def parse_scan_secrets(data: dict) -> bool:
+    """Opção `scan_secrets` da tabela `[report]` (padrão: desligada)."""
+    table = data.get("report", {})
+    if not isinstance(table, dict):
+        raise ConfigError("'report' deve ser uma tabela.")
+    value = table.get("scan_secrets", False)
+    if not isinstance(value, bool):
+        raise ConfigError("'report.scan_secrets' deve ser do tipo bool.")
+    return value
+
+
+def load_scan_secrets(root: Path) -> bool:
+    """Se `root/.code_review/config.toml` liga a varredura de segredos."""
+    return parse_scan_secrets(_load_config(root))
+
+
+def parse_archive(data: dict) -> Optional[RetentionPolicy]:
+    """Retenção da tabela `[archive]` (None com `enabled = false`)."""
+    table = data.get("archive", {})
+    if not isinstance(table, dict):
+        raise ConfigError("'archive' deve ser uma tabela.")
+    if not table.get("enabled", True):
+        return None
+    kinds = {"max_age_days": (int, float), "max_versions": (int,), "max_bytes": (int,)}
+    defaults = RetentionPolicy()
+    limits = {}
+    for key, kind in kinds.items():
+        value = table.get(key, getattr(defaults, key))
+        if isinstance(value, bool) or not isinstance(value, kind) or value < 0:
+            raise ConfigError(f"'archive.{key}' deve ser um número não negativo.")
+        # 0 desliga o limite
+        limits[key] = value or None
+    return RetentionPolicy(**limits)
+
+
+def load_archive(root: Path) -> Optional[RetentionPolicy]:
+    """Retenção de `diffs/.archive` configurada em `root/.code_review/config.toml`."""
+    return parse_archive(_load_config(root))
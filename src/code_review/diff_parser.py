@@ -0,0 +1,183 @@
+"""
+Parser incremental de patches unificados do git.
+
+Agrupa as linhas do `git diff` por arquivo (cabeçalho + hunks) sem carregar o
+patch inteiro: apenas o arquivo corrente fica em memória.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+_C_ESCAPES = {
+    "a": 0x07,
+    "b": 0x08,
+    "t": 0x09,
+    "n": 0x0A,
+    "v": 0x0B,
+    "f": 0x0C,
+    "r": 0x0D,
+    '"': 0x22,
+    "\\": 0x5C,
+}
+
+
+def unquote_git_path(value: str) -> str:
+    """
+    Desfaz o "C-quoting" que o git aplica a caminhos com caracteres especiais
+    (`core.quotePath`), ex.: `"caf\\303\\251.txt"` -> `café.txt`.
+    """
+    if len(value) < 2 or not (value.startswith('"') and value.endswith('"')):
+        return value
+    body = value[1:-1]
+    out = bytearray()
+    i = 0
+    while i < len(body):
+        ch = body[i]
+        if ch != "\\":
+            out += ch.encode("utf-8", "surrogateescape")
+            i += 1
+            continue
+        nxt = body[i + 1 : i + 2]
+        if nxt in _C_ESCAPES:
+            out.append(_C_ESCAPES[nxt])
+            i += 2
+        elif body[i + 1 : i + 4].isdigit():
+            out.append(int(body[i + 1 : i + 4], 8))
+            i += 4
+        else:
+            out += b"\\"
+            i += 1
+    return out.decode("utf-8", "surrogateescape")
+
+
+@dataclass(frozen=True)
+class RawEntry:
+    """Uma linha do formato `--raw` (sem -z): modos, blobs, status e caminhos."""
+
+    old_mode: str
+    new_mode: str
+    old_sha: str
+    new_sha: str
+    status: str
+    display_path: str
+    old_display_path: Optional[str] = None
+
+    @property
+    def path(self) -> str:
+        return unquote_git_path(self.display_path)
+
+    @property
+    def old_path(self) -> str:
+        return unquote_git_path(self.old_display_path or self.display_path)
+
+    @property
+    def paths(self) -> tuple[str, ...]:
+        """Caminhos que precisam estar no pathspec para reproduzir esta entrada."""
+        if self.old_display_path is not None:
+            return (self.old_path, self.path)
+        return (self.path,)
+
+
+def parse_raw_line(line: str) -> RawEntry:
+    """Converte `:100644 100644 <sha> <sha> R050\\told\\tnovo` em `RawEntry`."""
+    meta, *paths = line.rstrip("\n").split("\t")
+    old_mode, new_mode, old_sha, new_sha, status = meta.lstrip(":").split(" ")
+    if len(paths) == 2:
+        return RawEntry(old_mode, new_mode, old_sha, new_sha, status, paths[1], paths[0])
+    return RawEntry(old_mode, new_mode, old_sha, new_sha, status, paths[0])
+
+
+@dataclass
+class FileDiff:
+    """Um arquivo do patch: linhas de cabeçalho e hunks (cada um começa com '@@')."""
+
+    header: list[str]
+    hunks: list[list[str]] = field(default_factory=list)
+
+    @property
+    def path(self) -> str:
+        return path_from_header(self.header)
+
+    @property
+    def lines(self) -> Iterator[str]:
+        yield from self.header
+        for hunk in self.hunks:
+            yield from hunk
+
+    def byte_size(self) -> int:
+        return sum(len(line.encode("utf-8", "surrogateescape")) for line in self.lines)
+
+
+def _strip_prefix(value: str, prefix: str) -> str:
+    return value[len(prefix):] if value.startswith(prefix) else value
+
+
+def path_from_header(header: list[str]) -> str:
+    """
+    Caminho atual do arquivo a partir do cabeçalho do patch.
+    Usa `+++ b/...` (ou `--- a/...` para remoções), `rename to` e, por último,
+    a linha `diff --git`.
+    """
+    old_path: Optional[str] = None
+    for line in header:
+        text = line.rstrip("\n")
+        if text.startswith("+++ "):
+            value = unquote_git_path(text[4:].rstrip("\t"))
+            if value != "/dev/null":
+                return _strip_prefix(value, "b/")
+        elif text.startswith("--- "):
+            value = unquote_git_path(text[4:].rstrip("\t"))
+            if value != "/dev/null":
+                old_path = _strip_prefix(value, "a/")
+        elif text.startswith("rename to "):
+            return unquote_git_path(text[len("rename to "):])
+    if old_path is not None:
+        return old_path
+
+    first = header[0].rstrip("\n") if header else ""
+    body = _strip_prefix(first, "diff --git ")
+    # "a/<p> b/<p>": sem rename os dois lados são iguais, então basta dividir ao meio
+    half = (len(body) - 1) // 2
+    if body[half:half + 1] == " " and body[:half][2:] == body[half + 1:][2:]:
+        return body[half + 1:][2:]
+    return _strip_prefix(body.rsplit(" b/", 1)[-1], "b/")
+
+
+def parse_hunk_header(line: str) -> Optional[tuple[int, int, int, int]]:
+    """Retorna (old_start, old_lines, new_start, new_lines) de uma linha '@@'."""
+    match = HUNK_HEADER_RE.match(line)
+    if not match:
+        return None
+    old_start, old_lines, new_start, new_lines = match.groups()
+    return (
+        int(old_start),
+        int(old_lines) if old_lines is not None else 1,
+        int(new_start),
+        int(new_lines) if new_lines is not None else 1,
+    )
+
+
+def iter_file_diffs(lines: Iterable[str]) -> Iterator[FileDiff]:
+    """Agrupa as linhas de um patch unificado em `FileDiff`s, na ordem do git."""
+    current: Optional[FileDiff] = None
+    for line in lines:
+        if line.startswith("diff --git ") or line.startswith("diff --cc ") or line.startswith("diff --combined "):
+            if current is not None:
+                yield current
+            current = FileDiff(header=[line])
+        elif current is None:
+            # Conteúdo antes do primeiro arquivo (não deveria ocorrer em `git diff`)
+            current = FileDiff(header=[line])
+        elif line.startswith("@@"):
+            current.hunks.append([line])
+        elif current.hunks:
+            current.hunks[-1].append(line)
+        else:
+            current.header.append(line)
+    if current is not None:
+        yield current
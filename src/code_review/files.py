@@ -0,0 +1,43 @@
+"""
+Escrita atômica de arquivos gerados (relatórios, índices, manifestos).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Iterable
+
+
+def temp_path_for(path: Path) -> Path:
+    """Arquivo temporário oculto ao lado de `path`, único por processo e thread."""
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def read_list_file(path: Path) -> list[str]:
+    """Lê um item por linha, ignorando linhas vazias e comentários (`#`)."""
+    items = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        item = line.strip()
+        if item and not item.startswith("#"):
+            items.append(item)
+    return items
+
+
+def write_lines_atomic(lines: Iterable[str], path: Path) -> int:
+    """
+    Grava as linhas em `path` via arquivo temporário + rename, preservando
+    bytes não-UTF-8 (`surrogateescape`) e sem traduzir quebras de linha.
+    Retorna o tamanho final em bytes.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = temp_path_for(path)
+    try:
+        with open(tmp_path, "w", encoding="utf-8", errors="surrogateescape", newline="\n") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return path.stat().st_size
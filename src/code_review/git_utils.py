@@ -0,0 +1,207 @@
+"""
+Utilitários para conversar com o git via subprocess (sem dependências externas).
+"""
+
+from __future__ import annotations
+
+import subprocess
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+
+class GitError(RuntimeError):
+    """Erro ao executar um comando git."""
+
+
+_spawn_lock = threading.Lock()
+_spawned = 0
+
+
+def _git_command(args: Sequence[str]) -> list[str]:
+    global _spawned
+    with _spawn_lock:
+        _spawned += 1
+    return ["git", *args]
+
+
+def spawned_processes() -> int:
+    """Total de processos git iniciados até agora por este processo (ver `--profile`)."""
+    return _spawned
+
+
+def run_git(args: Sequence[str], cwd: Optional[Path] = None, check: bool = True) -> bytes:
+    """
+    Executa `git <args>` e retorna a saída padrão (bytes).
+    Levanta GitError quando o comando falha e `check` é verdadeiro.
+    """
+    proc = subprocess.run(
+        _git_command(args),
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if check and proc.returncode != 0:
+        message = proc.stderr.decode("utf-8", "replace").strip()
+        raise GitError(f"git {' '.join(args)}: {message or f'código {proc.returncode}'}")
+    return proc.stdout
+
+
+def git_output(args: Sequence[str], cwd: Optional[Path] = None) -> str:
+    """Atalho para `run_git` retornando texto sem a quebra de linha final."""
+    return run_git(args, cwd=cwd).decode("utf-8", "surrogateescape").strip()
+
+
+@contextmanager
+def stream_git(args: Sequence[str], cwd: Optional[Path] = None) -> Iterator[Iterator[str]]:
+    """
+    Inicia `git <args>` e entrega um iterador de linhas (com '\\n') lido
+    diretamente do pipe, sem acumular a saída em memória.
+
+    Bytes inválidos em UTF-8 são preservados via `surrogateescape`, então
+    gravar as linhas com o mesmo tratamento reproduz a saída do git byte a byte.
+    O stderr vai para um arquivo temporário, lido depois que o git termina:
+    num pipe, avisos longos encheriam o buffer e travariam o git antes do fim
+    do stdout.
+    """
+    stderr_file = tempfile.TemporaryFile()
+    try:
+        proc = subprocess.Popen(
+            _git_command(args),
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file,
+        )
+    except BaseException:
+        stderr_file.close()
+        raise
+
+    exhausted = False
+
+    def lines() -> Iterator[str]:
+        nonlocal exhausted
+        for raw in proc.stdout:
+            yield raw.decode("utf-8", "surrogateescape")
+        exhausted = True
+
+    try:
+        yield lines()
+    finally:
+        # Consumidor parou antes do fim (ou falhou): encerra o git sem esperar
+        if not exhausted:
+            proc.kill()
+        proc.stdout.close()
+        returncode = proc.wait()
+        stderr_file.seek(0)
+        stderr = stderr_file.read()
+        stderr_file.close()
+    if exhausted and returncode != 0:
+        message = stderr.decode("utf-8", "replace").strip()
+        raise GitError(f"git {' '.join(args)}: {message or f'código {returncode}'}")
+
+
+def find_repo_root(path: Optional[Path] = None) -> Path:
+    """Retorna a raiz do working tree que contém `path` (padrão: cwd)."""
+    return Path(git_output(["rev-parse", "--show-toplevel"], cwd=path))
+
+
+def ref_exists(ref: str, cwd: Optional[Path] = None) -> bool:
+    """Indica se `ref` resolve para um commit."""
+    result = subprocess.run(
+        _git_command(["rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"]),
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return result.returncode == 0
+
+
+def is_ancestor(ancestor: str, commit: str, cwd: Optional[Path] = None) -> bool:
+    """Indica se `ancestor` é ancestral de (ou igual a) `commit`; objetos ausentes contam como não."""
+    result = subprocess.run(
+        _git_command(["merge-base", "--is-ancestor", ancestor, commit]),
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return result.returncode == 0
+
+
+def rev_parse(*refs: str, cwd: Optional[Path] = None) -> list[str]:
+    """Resolve várias refs para SHAs de commit em uma única chamada."""
+    if any(ref.startswith("-") for ref in refs):
+        raise GitError(f"Ref inválida: {' '.join(refs)}")
+    output = git_output(["rev-parse", *(f"{ref}^{{commit}}" for ref in refs)], cwd=cwd)
+    return output.split()
+
+
+def merge_base(a: str, b: str, cwd: Optional[Path] = None) -> str:
+    """SHA do merge-base entre `a` e `b`."""
+    return git_output(["merge-base", a, b], cwd=cwd)
+
+
+class CatFileReader:
+    """
+    Processo `git cat-file --batch` (ou `--batch-check`) de vida longa.
+
+    Evita iniciar um git por objeto: as consultas são escritas no stdin e as
+    respostas lidas do stdout do mesmo processo. Seguro para uso entre threads.
+    """
+
+    def __init__(self, cwd: Optional[Path] = None, check_only: bool = False):
+        self.check_only = check_only
+        mode = "--batch-check" if check_only else "--batch"
+        self._proc = subprocess.Popen(
+            _git_command(["cat-file", mode]),
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._lock = threading.Lock()
+
+    def _query(self, name: str) -> tuple[Optional[tuple[str, str, int]], Optional[bytes]]:
+        if "\n" in name:
+            raise GitError(f"Nome de objeto inválido: {name!r}")
+        with self._lock:
+            self._proc.stdin.write(name.encode("utf-8", "surrogateescape") + b"\n")
+            self._proc.stdin.flush()
+            header = self._proc.stdout.readline()
+            if not header:
+                raise GitError("git cat-file encerrou inesperadamente.")
+            parts = header.decode("utf-8", "surrogateescape").split()
+            if len(parts) != 3 or parts[1] in ("missing", "ambiguous"):
+                return None, None
+            sha, obj_type, size = parts[0], parts[1], int(parts[2])
+            content = None
+            if not self.check_only:
+                content = self._proc.stdout.read(size)
+                self._proc.stdout.read(1)  # '\n' que encerra o objeto
+            return (sha, obj_type, size), content
+
+    def info(self, name: str) -> Optional[tuple[str, str, int]]:
+        """(sha, tipo, tamanho) do objeto, ou None se não existir."""
+        return self._query(name)[0]
+
+    def read(self, name: str) -> Optional[tuple[str, bytes]]:
+        """(tipo, conteúdo) do objeto, ou None se não existir."""
+        if self.check_only:
+            raise GitError("Leitor aberto em modo --batch-check não devolve conteúdo.")
+        header, content = self._query(name)
+        if header is None:
+            return None
+        return header[1], content
+
+    def close(self) -> None:
+        if self._proc.poll() is None:
+            self._proc.stdin.close()
+            self._proc.stdout.close()
+            self._proc.wait()
+
+    def __enter__(self) -> "CatFileReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
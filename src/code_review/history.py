@@ -0,0 +1,86 @@
+"""
+Histórico local de execuções em `.code_review/history.jsonl`.
+
+Cada `init` e cada `report` acrescenta uma linha JSON com duração (total e
+por etapa), tamanhos e contagens. O arquivo só cresce por `append`; ao passar
+de `MAX_HISTORY_BYTES` ele é rotacionado para `history.jsonl.1`.
+`review-cli stats` lê o histórico e calcula p50/p95/máximo.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence
+
+HISTORY_PATH = Path(".code_review") / "history.jsonl"
+MAX_HISTORY_BYTES = 10 * 1024 * 1024
+# Quantidade de execuções comparadas no início e no fim para a tendência de tamanho
+TREND_WINDOW = 5
+
+
+def append_run(root: Path, record: dict) -> None:
+    """Acrescenta uma execução ao histórico de `root` (uma única escrita com O_APPEND)."""
+    path = root / HISTORY_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        if path.stat().st_size > MAX_HISTORY_BYTES:
+            os.replace(path, path.with_name(path.name + ".1"))
+    except FileNotFoundError:
+        pass
+    line = json.dumps({"ts": round(time.time(), 3), **record}, ensure_ascii=False) + "\n"
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode("utf-8", "surrogateescape"))
+    finally:
+        os.close(fd)
+
+
+def read_runs(root: Path, kind: Optional[str] = None) -> Iterator[dict]:
+    """Execuções registradas em `root`, das mais antigas às mais recentes."""
+    path = root / HISTORY_PATH
+    for candidate in (path.with_name(path.name + ".1"), path):
+        try:
+            f = open(candidate, encoding="utf-8", errors="surrogateescape")
+        except FileNotFoundError:
+            continue
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # linha truncada por uma execução interrompida
+                if kind is None or record.get("kind") == kind:
+                    yield record
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Percentil pelo método nearest-rank (`pct` entre 0 e 100)."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(runs: Iterable[dict]) -> dict:
+    """p50/p95/máximo de duração e tamanho, mais a tendência de tamanho."""
+    runs = list(runs)
+    durations = [r.get("duration_s", 0.0) for r in runs]
+    sizes = [r["diff_bytes"] for r in runs if "diff_bytes" in r]
+    summary = {
+        "runs": len(runs),
+        "duration_p50": percentile(durations, 50),
+        "duration_p95": percentile(durations, 95),
+        "duration_max": max(durations, default=0.0),
+        "bytes_p50": percentile(sizes, 50),
+        "bytes_max": max(sizes, default=0),
+        "size_trend": None,
+    }
+    if len(sizes) >= 2 * TREND_WINDOW:
+        first = percentile(sizes[:TREND_WINDOW], 50)
+        last = percentile(sizes[-TREND_WINDOW:], 50)
+        summary["size_trend"] = round(last / first, 2) if first else None
+    return summary
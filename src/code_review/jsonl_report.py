@@ -0,0 +1,238 @@
+"""
+Relatório estruturado em JSONL com índice de offsets.
+
+Um registro JSON por linha: `meta` (faixa e commits), depois, para cada
+arquivo, um registro `file` (cabeçalho do patch) seguido dos registros
+`hunk` dele. O índice `relatorio_diff_<branch>.idx.json` guarda, por caminho,
+o offset e o tamanho em bytes do bloco do arquivo e de cada hunk, de modo que
+`review-cli show caminho[:hunk]` lê só os bytes necessários com um `seek`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from itertools import takewhile
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from code_review.diff_parser import FileDiff, RawEntry, iter_file_diffs, parse_hunk_header, parse_raw_line
+from code_review.files import temp_path_for
+from code_review.git_utils import run_git, stream_git
+from code_review.patches import iter_raw_entries, iter_teed_patch, prefer_cached
+from code_review.prefilter import iter_file_stats, partition
+from code_review.report import ReportOptions, ReportRange, entries_patch, is_removed_line
+from code_review.report_cache import DiskLRU
+
+INDEX_FORMAT = 1
+
+
+def jsonl_filename(report_path: Path) -> Path:
+    """`relatorio_diff_<branch>.jsonl` no lugar do `.md`."""
+    stem = report_path.name[: -len(".md")] if report_path.name.endswith(".md") else report_path.name
+    return report_path.with_name(f"{stem}.jsonl")
+
+
+def index_filename(jsonl_path: Path) -> Path:
+    return jsonl_path.with_name(jsonl_path.name[: -len(".jsonl")] + ".idx.json")
+
+
+def _encode(record: dict) -> bytes:
+    """Uma linha JSON em UTF-8; bytes inválidos do git viram escapes `\\udcXX`."""
+    text = json.dumps(record, ensure_ascii=False)
+    try:
+        return text.encode("utf-8") + b"\n"
+    except UnicodeEncodeError:
+        return json.dumps(record).encode("ascii") + b"\n"
+
+
+def hunk_record(path: str, index: int, hunk: list[str], keep_removed: bool) -> dict:
+    """Registro `hunk`: faixas do cabeçalho `@@`, contagens e texto (sem remoções, por padrão)."""
+    old_start, old_lines, new_start, new_lines = parse_hunk_header(hunk[0]) or (0, 0, 0, 0)
+    added = removed = 0
+    body = []
+    for line in hunk[1:]:
+        if line.startswith("+"):
+            added += 1
+        elif line.startswith("-"):
+            removed += 1
+        if keep_removed or not is_removed_line(line):
+            body.append(line)
+    return {
+        "type": "hunk",
+        "path": path,
+        "hunk": index,
+        "old_start": old_start,
+        "old_lines": old_lines,
+        "new_start": new_start,
+        "new_lines": new_lines,
+        "added": added,
+        "removed": removed,
+        "text": hunk[0] + "".join(body),
+    }
+
+
+def patch_source(
+    rng: ReportRange,
+    cwd: Optional[Path],
+    options: ReportOptions,
+    file_cache: Optional[DiskLRU] = None,
+    file_counts: Optional[dict] = None,
+) -> Iterator[tuple[list[RawEntry], Iterable[str]]]:
+    """
+    Entrega uma única vez (entradas raw, linhas do patch), escolhendo a fonte
+    como o relatório Markdown: pré-filtro, lotes paralelos ou um único stream
+    `--patch-with-raw`. Com `file_cache`, o stream guarda cada bloco enquanto
+    passa, ou o patch é montado do cache se a maior parte já estiver nele. O
+    stream fica aberto enquanto o laço do chamador roda.
+    """
+    if options.prefilter is not None:
+        stats = iter_file_stats(rng.merge_base, rng.tip_sha, options.pathspec, cwd=cwd)
+        kept, _ = partition(stats, options.prefilter, cwd=cwd)
+        entries = [stat.entry for stat in kept]
+    elif options.workers > 1:
+        entries = list(iter_raw_entries(rng.merge_base, rng.tip_sha, options.pathspec, cwd=cwd))
+    else:
+        args = [
+            "diff",
+            "--patch-with-raw",
+            "--no-abbrev",
+            *options.diff_args(),
+            rng.merge_base,
+            rng.tip_sha,
+            "--",
+            *options.pathspec,
+        ]
+        with stream_git(args, cwd=cwd) as lines:
+            entries = [parse_raw_line(line) for line in takewhile(lambda line: line.startswith(":"), lines)]
+            if file_cache is None or not entries:
+                yield entries, lines
+                return
+            if not prefer_cached(entries, file_cache, options.diff_args()):
+                # Cache frio: o stream segue e cada bloco é guardado enquanto passa
+                patch = iter_teed_patch(lines, entries, file_cache, options.diff_args(), counts=file_counts)
+                try:
+                    yield entries, patch
+                finally:
+                    patch.close()
+                return
+    patch = entries_patch(rng, entries, options, cwd, file_cache, file_counts)
+    try:
+        yield entries, patch
+    finally:
+        patch.close()
+
+
+def write_jsonl_report(
+    rng: ReportRange,
+    path: Path,
+    cwd: Optional[Path] = None,
+    options: Optional[ReportOptions] = None,
+    file_cache: Optional[DiskLRU] = None,
+    file_counts: Optional[dict] = None,
+) -> tuple[Path, int]:
+    """
+    Grava `path` (JSONL) e o índice ao lado, de forma atômica.
+    Retorna (caminho do índice, quantidade de arquivos).
+    """
+    options = options or ReportOptions()
+    commits = run_git(["log", "--no-merges", "--oneline", f"{rng.base_sha}..{rng.tip_sha}"], cwd=cwd)
+    index: dict[str, list] = {}
+    tmp_path = temp_path_for(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with open(tmp_path, "wb") as f:
+            offset = 0
+
+            def emit(record: dict) -> tuple[int, int]:
+                nonlocal offset
+                data = _encode(record)
+                f.write(data)
+                start = offset
+                offset += len(data)
+                return start, len(data)
+
+            for entries, patch in patch_source(rng, cwd, options, file_cache, file_counts):
+                by_path = {entry.path: entry for entry in entries}
+                emit({
+                    "type": "meta",
+                    "target": rng.target,
+                    "base": rng.base_ref,
+                    "merge_base": rng.merge_base,
+                    "tip": rng.tip_sha,
+                    "since": rng.checkpoint,
+                    "files": [entry.path for entry in entries],
+                    "commits": commits.decode("utf-8", "surrogateescape").splitlines(),
+                })
+                for file_diff in iter_file_diffs(patch):
+                    _emit_file(file_diff, by_path, index, emit, options.keep_removed)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    index_path = index_filename(path)
+    data = {"format": INDEX_FORMAT, "report": path.name, "files": index}
+    index_tmp = temp_path_for(index_path)
+    try:
+        # ensure_ascii: caminhos com bytes inválidos viram escapes e o JSON continua válido
+        index_tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="ascii")
+        os.replace(index_tmp, index_path)
+    finally:
+        if index_tmp.exists():
+            index_tmp.unlink()
+    return index_path, len(index)
+
+
+def file_record(file_diff: FileDiff, entry: Optional[RawEntry]) -> dict:
+    """Registro `file`: caminhos, status do `--raw`, quantidade de hunks e cabeçalho do patch."""
+    return {
+        "type": "file",
+        "path": file_diff.path,
+        "old_path": entry.old_path if entry else file_diff.path,
+        "status": entry.status if entry else None,
+        "hunks": len(file_diff.hunks),
+        "header": "".join(file_diff.header),
+    }
+
+
+def _emit_file(file_diff: FileDiff, by_path: dict, index: dict, emit, keep_removed: bool) -> None:
+    if not file_diff.header[0].startswith("diff "):
+        return
+    path = file_diff.path
+    start, length = emit(file_record(file_diff, by_path.get(path)))
+    hunks = []
+    for number, hunk in enumerate(file_diff.hunks, start=1):
+        hunks.append(emit(hunk_record(path, number, hunk, keep_removed)))
+        length = hunks[-1][0] + hunks[-1][1] - start
+    # [offset do bloco, tamanho do bloco (arquivo + hunks), [[offset, tamanho] por hunk]]
+    index[path] = [start, length, [list(h) for h in hunks]]
+
+
+class ReportIndex:
+    """Leitura aleatória de um relatório JSONL pelo índice de offsets."""
+
+    def __init__(self, index_path: Path):
+        data = json.loads(index_path.read_text(encoding="utf-8"))
+        if data.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Formato de índice não suportado: {index_path}")
+        self.path = index_path.with_name(data["report"])
+        self.files: dict[str, list] = data["files"]
+
+    def _read(self, offset: int, length: int) -> bytes:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def file_records(self, path: str) -> list[dict]:
+        """Registro `file` e todos os `hunk` do caminho."""
+        offset, length, _ = self.files[path]
+        return [json.loads(line) for line in self._read(offset, length).splitlines()]
+
+    def hunk_record(self, path: str, number: int) -> dict:
+        """Hunk `number` (a partir de 1) do caminho."""
+        hunks = self.files[path][2]
+        if not 1 <= number <= len(hunks):
+            raise IndexError(f"'{path}' tem {len(hunks)} hunk(s).")
+        offset, length = hunks[number - 1]
+        return json.loads(self._read(offset, length))
@@ -0,0 +1,89 @@
+"""
+Manifesto dos arquivos gerados pelo `init` (`.code_review/manifest`).
+
+Guarda SHA-256, tamanho e mtime (ns) de cada arquivo gravado. Numa nova
+execução, um `stat` igual ao registrado basta para classificar o arquivo, sem
+ler o conteúdo. Se só o mtime mudou (clone, checkout, `touch`), o arquivo é
+lido e o hash decide; o `stat` registrado é então atualizado pelo chamador.
+
+- `unchanged`: intacto desde a última gravação e igual ao template atual;
+- `drifted`: intacto, mas gerado por um template anterior (pode ser atualizado);
+- `user-modified`: conteúdo diferente do registrado (edição local);
+- `untracked`: sem entrada no manifesto (instalação anterior a ele) e
+  diferente do template atual.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from code_review.files import write_lines_atomic
+
+MANIFEST_PATH = Path(".code_review") / "manifest"
+MANIFEST_FORMAT = 1
+
+CREATED = "created"
+UNCHANGED = "unchanged"
+DRIFTED = "drifted"
+USER_MODIFIED = "user-modified"
+UNTRACKED = "untracked"
+
+
+def load_manifest(root: Path) -> dict[str, dict]:
+    """Entradas do manifesto por caminho relativo (vazio se ausente ou ilegível)."""
+    try:
+        data = json.loads((root / MANIFEST_PATH).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("format") != MANIFEST_FORMAT:
+        return {}
+    return {entry["path"]: entry for entry in data.get("files", []) if "path" in entry}
+
+
+def save_manifest(root: Path, entries: dict[str, dict], version: str) -> None:
+    data = {
+        "format": MANIFEST_FORMAT,
+        "version": version,
+        "files": [entries[path] for path in sorted(entries)],
+    }
+    write_lines_atomic([json.dumps(data, ensure_ascii=False, indent=2), "\n"], root / MANIFEST_PATH)
+
+
+def make_entry(rel_path: str, st: os.stat_result, sha256: str) -> dict:
+    return {"path": rel_path, "sha256": sha256, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def stat_matches(entry: Optional[dict], st: os.stat_result) -> bool:
+    """True se tamanho e mtime de `st` são os registrados em `entry`."""
+    return entry is not None and st.st_size == entry.get("size") and st.st_mtime_ns == entry.get("mtime_ns")
+
+
+def classify(path: Path, entry: Optional[dict], sha256: str, payload: bytes) -> tuple[str, Optional[os.stat_result]]:
+    """
+    Classifica o arquivo em disco frente ao manifesto e ao conteúdo desejado.
+    Retorna (status, stat). O arquivo só é lido quando não há entrada no
+    manifesto ou quando o mtime mudou sem mudar o tamanho; tamanho diferente
+    já é edição local.
+    """
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return CREATED, None
+
+    if entry is None:
+        if st.st_size == len(payload) and path.read_bytes() == payload:
+            return UNCHANGED, st
+        return UNTRACKED, st
+
+    if st.st_size != entry.get("size"):
+        return USER_MODIFIED, st
+    if st.st_mtime_ns != entry.get("mtime_ns"):
+        if hashlib.sha256(path.read_bytes()).hexdigest() != entry.get("sha256"):
+            return USER_MODIFIED, st
+    if entry.get("sha256") == sha256:
+        return UNCHANGED, st
+    return DRIFTED, st
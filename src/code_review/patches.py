@@ -0,0 +1,318 @@
+"""
+Geração do patch em lotes de caminhos, opcionalmente em paralelo.
+
+A lista de arquivos alterados (formato raw) é dividida em lotes contíguos;
+cada lote vira um `git diff` limitado a caminhos literais e as saídas são
+concatenadas na ordem original. Como o git ordena o patch pelos caminhos,
+a concatenação é idêntica, byte a byte, ao diff serial.
+
+Com um cache de arquivos, o bloco renderizado de cada arquivo é guardado sob
+uma chave de (blobs, modos, caminhos, opções do diff). Sem acertos, o patch
+continua vindo de um único `git diff` e cada bloco é copiado para o cache
+enquanto passa (`iter_teed_patch`); quando a maior parte já está no cache,
+branches com as mesmas mudanças (PRs empilhados, cherry-picks, rebases)
+montam o patch a partir dele e só os arquivos novos vão para o git
+(`iter_cached_patch`).
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import re
+from collections import deque
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence
+
+from code_review.diff_parser import RawEntry, parse_raw_line
+from code_review.git_utils import run_git, stream_git
+from code_review.report_cache import DiskLRU, make_cache_key
+from code_review.version import get_app_version
+
+MAX_BATCH_PATHS = 256
+# Margem segura para o limite de ~32k caracteres da linha de comando no Windows
+MAX_BATCH_CHARS = 24_000
+
+
+def literal_pathspec(path: str) -> str:
+    """Pathspec que casa exatamente `path` (sem glob nem mágica)."""
+    return f":(literal){path}"
+
+
+def resolve_workers(workers: int) -> int:
+    """`0` significa "um por núcleo"; valores negativos viram 1."""
+    if workers == 0:
+        return os.cpu_count() or 1
+    return max(workers, 1)
+
+
+def iter_raw_entries(
+    old: str,
+    new: str,
+    pathspec: Sequence[str],
+    cwd: Optional[Path] = None,
+) -> Iterator[RawEntry]:
+    """Lista barata dos arquivos alterados (`git diff --raw`), sem gerar patch."""
+    with stream_git(["diff", "--raw", "--no-abbrev", old, new, "--", *pathspec], cwd=cwd) as lines:
+        for line in lines:
+            if line.startswith(":"):
+                yield parse_raw_line(line)
+
+
+def plan_batches(entries: Sequence[RawEntry], workers: int) -> list[list[RawEntry]]:
+    """
+    Divide as entradas em lotes contíguos (~4 lotes por worker para balancear),
+    respeitando os limites de caminhos e de tamanho da linha de comando.
+    Renames mantêm origem e destino no mesmo lote.
+    """
+    if not entries:
+        return []
+    target = max(1, -(-len(entries) // (workers * 4)))
+    per_batch = min(target, MAX_BATCH_PATHS)
+
+    batches: list[list[RawEntry]] = []
+    current: list[RawEntry] = []
+    chars = 0
+    for entry in entries:
+        entry_chars = sum(len(literal_pathspec(p)) + 1 for p in entry.paths)
+        if current and (len(current) >= per_batch or chars + entry_chars > MAX_BATCH_CHARS):
+            batches.append(current)
+            current = []
+            chars = 0
+        current.append(entry)
+        chars += entry_chars
+    if current:
+        batches.append(current)
+    return batches
+
+
+def fetch_patch(
+    old: str,
+    new: str,
+    entries: Iterable[RawEntry],
+    cwd: Optional[Path] = None,
+    diff_options: Sequence[str] = (),
+) -> bytes:
+    """Patch de um lote de entradas (um processo git)."""
+    pathspec = [literal_pathspec(p) for entry in entries for p in entry.paths]
+    return run_git(["diff", *diff_options, old, new, "--", *pathspec], cwd=cwd)
+
+
+def _iter_batch_outputs(
+    old: str,
+    new: str,
+    batches: Sequence[Sequence[RawEntry]],
+    workers: int = 1,
+    cwd: Optional[Path] = None,
+    diff_options: Sequence[str] = (),
+) -> Iterator[bytes]:
+    """Saída de cada lote, na ordem, com no máximo `2 * workers` lotes em voo."""
+    if not batches:
+        return
+    # Importado aqui: o modo serial (padrão) não precisa do pool
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        queue: deque = deque()
+        pending = iter(batches)
+
+        def submit_next() -> None:
+            batch = next(pending, None)
+            if batch is not None:
+                queue.append(pool.submit(fetch_patch, old, new, batch, cwd, diff_options))
+
+        for _ in range(workers * 2):
+            submit_next()
+        try:
+            while queue:
+                output = queue.popleft().result()
+                submit_next()
+                yield output
+        finally:
+            for future in queue:
+                future.cancel()
+
+
+def _decode_lines(output: bytes) -> Iterator[str]:
+    # BytesIO quebra apenas em '\n', como a leitura do pipe no modo serial
+    for raw in io.BytesIO(output):
+        yield raw.decode("utf-8", "surrogateescape")
+
+
+def iter_batched_patch(
+    old: str,
+    new: str,
+    batches: Sequence[Sequence[RawEntry]],
+    workers: int = 1,
+    cwd: Optional[Path] = None,
+    diff_options: Sequence[str] = (),
+) -> Iterator[str]:
+    """
+    Executa os lotes em um pool de threads (o trabalho real acontece nos
+    processos git) e entrega as linhas na ordem original. No máximo
+    `2 * workers` lotes ficam em voo, limitando a memória.
+    """
+    for output in _iter_batch_outputs(old, new, batches, workers=workers, cwd=cwd, diff_options=diff_options):
+        yield from _decode_lines(output)
+
+
+FILE_HEADER = re.compile(rb"^diff --git ", re.MULTILINE)
+
+
+def split_file_patches(output: bytes) -> list[bytes]:
+    """Divide a saída de um `git diff` nos blocos de cada arquivo (`diff --git ...`)."""
+    starts = [match.start() for match in FILE_HEADER.finditer(output)]
+    return [output[start:end] for start, end in zip(starts, [*starts[1:], len(output)])]
+
+
+def file_patch_key(entry: RawEntry, diff_options: Sequence[str] = ()) -> str:
+    """Chave do bloco renderizado de um arquivo: não depende da branch nem do commit."""
+    return make_cache_key(
+        "file-patch",
+        get_app_version(),
+        entry.old_mode,
+        entry.new_mode,
+        entry.old_sha,
+        entry.new_sha,
+        entry.status,
+        entry.old_display_path or "",
+        entry.display_path,
+        *diff_options,
+    )
+
+
+def _expected_blocks(entry: RawEntry) -> int:
+    # Mudança de tipo (arquivo <-> symlink) vira remoção + criação no patch
+    return 2 if entry.status.startswith("T") else 1
+
+
+def prefer_cached(entries: Sequence[RawEntry], cache: DiskLRU, diff_options: Sequence[str] = ()) -> bool:
+    """
+    True se ao menos metade dos blocos já está no cache: só então vale montar
+    o patch por arquivo em vez de ler o stream único do git.
+    """
+    if not entries:
+        return False
+    hits = sum(1 for entry in entries if cache.path_for(file_patch_key(entry, diff_options)).exists())
+    return hits * 2 >= len(entries)
+
+
+def _git_header(entry: RawEntry) -> Optional[str]:
+    # Caminhos com aspas (core.quotePath) não são comparados: o bloco só não vai para o cache
+    old = entry.old_display_path or entry.display_path
+    if old.startswith('"') or entry.display_path.startswith('"'):
+        return None
+    return f"diff --git a/{old} b/{entry.display_path}\n"
+
+
+def iter_teed_patch(
+    lines: Iterable[str],
+    entries: Sequence[RawEntry],
+    cache: DiskLRU,
+    diff_options: Sequence[str] = (),
+    counts: Optional[dict] = None,
+) -> Iterator[str]:
+    """
+    Repassa o patch de um único `git diff` guardando no cache o bloco de cada
+    arquivo enquanto ele passa. Os blocos seguem a ordem de `entries`; um bloco
+    cujo cabeçalho `diff --git` não for o esperado não é guardado.
+    """
+    if counts is not None:
+        counts["hits"] = 0
+        counts["misses"] = len(entries)
+    pending = iter(entries)
+    entry: Optional[RawEntry] = None
+    header: Optional[str] = None
+    remaining = 0
+    block: list[str] = []
+    written = False
+
+    def store() -> bool:
+        if entry is None or header is None or remaining or not block:
+            return False
+        payload = "".join(block).encode("utf-8", "surrogateescape")
+        cache.put_bytes(file_patch_key(entry, diff_options), payload, evict=False)
+        return True
+
+    try:
+        for line in lines:
+            if line.startswith("diff --git "):
+                if not remaining:
+                    written = store() or written
+                    entry = next(pending, None)
+                    header = _git_header(entry) if entry is not None else None
+                    remaining = _expected_blocks(entry) if entry is not None else 0
+                    block = []
+                if line != header:
+                    header = None
+                remaining -= 1
+            if header is not None:
+                block.append(line)
+            yield line
+        written = store() or written
+    finally:
+        if written:
+            cache.evict()
+
+
+def iter_cached_patch(
+    old: str,
+    new: str,
+    entries: Sequence[RawEntry],
+    cache: DiskLRU,
+    workers: int = 1,
+    cwd: Optional[Path] = None,
+    diff_options: Sequence[str] = (),
+    counts: Optional[dict] = None,
+) -> Iterator[str]:
+    """
+    Patch montado arquivo a arquivo: blocos já renderizados vêm do cache e só
+    os ausentes são pedidos ao git, em lotes (em paralelo com `workers`). A
+    saída é a mesma do diff serial. `counts` recebe `hits` e `misses`.
+    """
+    keys = [file_patch_key(entry, diff_options) for entry in entries]
+    hits = [cache.get(key) for key in keys]
+    misses = [(entry, key) for entry, key, hit in zip(entries, keys, hits) if hit is None]
+    if counts is not None:
+        counts["hits"] = len(entries) - len(misses)
+        counts["misses"] = len(misses)
+    batches = plan_batches([entry for entry, _ in misses], max(workers, 1))
+
+    def fetched() -> Iterator[bytes]:
+        miss_keys = iter(key for _, key in misses)
+        outputs = _iter_batch_outputs(old, new, batches, workers=max(workers, 1), cwd=cwd, diff_options=diff_options)
+        try:
+            for batch, output in zip(batches, outputs):
+                batch_keys = [next(miss_keys) for _ in batch]
+                blocks = split_file_patches(output)
+                if len(blocks) != sum(_expected_blocks(entry) for entry in batch):
+                    # Saída inesperada: entrega o lote inteiro, sem guardar no cache
+                    yield output
+                    yield from (b"" for _ in batch[1:])
+                    continue
+                position = 0
+                for entry, key in zip(batch, batch_keys):
+                    size = _expected_blocks(entry)
+                    block = b"".join(blocks[position:position + size])
+                    position += size
+                    cache.put_bytes(key, block, evict=False)
+                    yield block
+        finally:
+            outputs.close()
+
+    pending = fetched()
+    try:
+        for entry, hit in zip(entries, hits):
+            if hit is None:
+                yield from _decode_lines(next(pending))
+                continue
+            try:
+                block = hit.read_bytes()
+            except FileNotFoundError:
+                # Removido por outra execução entre o `get` e a leitura
+                block = fetch_patch(old, new, [entry], cwd=cwd, diff_options=diff_options)
+            yield from _decode_lines(block)
+    finally:
+        pending.close()
+        if misses:
+            cache.evict()
@@ -0,0 +1,206 @@
+"""
+Pré-filtro de arquivos grandes, binários e gerados.
+
+Antes de pedir o texto do patch, uma passada barata (`git diff --raw
+--numstat`, mais os tamanhos dos blobs via `cat-file --batch-check`) decide
+quais arquivos entram no diff. Os omitidos aparecem no relatório com uma
+linha de resumo, e o git nem chega a gerar o patch deles.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+from code_review.diff_parser import RawEntry, parse_raw_line
+from code_review.git_utils import CatFileReader, GitError, stream_git
+
+DEFAULT_MAX_LINES = 2000
+DEFAULT_MAX_BYTES = 512 * 1024
+NULL_SHA = "0" * 40
+
+# Padrões de arquivos gerados/vendorizados. Terminados em "/" casam com
+# qualquer diretório do caminho; sem "/" casam com o nome do arquivo. São
+# também os presets `lockfiles` e `generated` do `config.toml`.
+LOCKFILE_PATTERNS = (
+    "package-lock.json",
+    "npm-shrinkwrap.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "poetry.lock",
+    "Pipfile.lock",
+    "uv.lock",
+    "Cargo.lock",
+    "go.sum",
+    "composer.lock",
+    "Gemfile.lock",
+)
+GENERATED_PATTERNS = (
+    *LOCKFILE_PATTERNS,
+    "*.min.js",
+    "*.min.css",
+    "*.map",
+    "*.snap",
+    "*_pb2.py",
+    "*_pb2_grpc.py",
+    "*.pb.go",
+    "*.generated.*",
+    "vendor/",
+    "node_modules/",
+    "dist/",
+    "__snapshots__/",
+)
+
+
+@dataclass(frozen=True)
+class FilterRules:
+    """Limites do pré-filtro; `None` desliga o respectivo critério."""
+
+    max_lines: Optional[int] = DEFAULT_MAX_LINES
+    max_bytes: Optional[int] = DEFAULT_MAX_BYTES
+    skip_binary: bool = True
+    skip_generated: bool = True
+    generated_patterns: tuple[str, ...] = GENERATED_PATTERNS
+
+    def content_key(self) -> tuple:
+        return (
+            self.max_lines,
+            self.max_bytes,
+            self.skip_binary,
+            self.skip_generated,
+            "\0".join(self.generated_patterns),
+        )
+
+
+@dataclass(frozen=True)
+class FileStat:
+    """Entrada raw com as contagens do numstat (None = binário) e o tamanho do blob."""
+
+    entry: RawEntry
+    added: Optional[int]
+    deleted: Optional[int]
+    size: Optional[int] = None
+
+    @property
+    def binary(self) -> bool:
+        return self.added is None
+
+
+@dataclass(frozen=True)
+class SkippedFile:
+    stat: FileStat
+    reason: str
+
+    def summary_line(self) -> str:
+        stat = self.stat
+        details = [self.reason]
+        if not stat.binary:
+            details.append(f"+{stat.added}/-{stat.deleted} linhas")
+        if stat.size is not None:
+            details.append(format_size(stat.size))
+        return f"- {stat.entry.display_path} — {', '.join(details)}\n"
+
+
+def format_size(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    if size >= 1024:
+        return f"{size / 1024:.0f} KB"
+    return f"{size} B"
+
+
+def _parse_count(value: str) -> Optional[int]:
+    return None if value == "-" else int(value)
+
+
+def iter_file_stats(
+    old: str,
+    new: str,
+    pathspec: Sequence[str],
+    cwd: Optional[Path] = None,
+) -> list[FileStat]:
+    """
+    Entradas raw + numstat de um único `git diff`. O git emite as duas listas
+    na mesma ordem, uma linha de cada por arquivo (inclusive renames e trocas
+    de tipo), então elas são pareadas por posição, sem depender do formato
+    `a => b` que o numstat usa para renames. Se as contagens divergirem, o
+    pareamento estaria errado: levanta GitError em vez de atribuir números
+    ao arquivo errado.
+    """
+    entries: list[RawEntry] = []
+    counts: list[tuple[Optional[int], Optional[int]]] = []
+    args = ["diff", "--raw", "--numstat", "--no-abbrev", old, new, "--", *pathspec]
+    with stream_git(args, cwd=cwd) as lines:
+        for line in lines:
+            if line.startswith(":"):
+                entries.append(parse_raw_line(line))
+            elif line.strip():
+                added, deleted, _ = line.split("\t", 2)
+                counts.append((_parse_count(added), _parse_count(deleted)))
+    if len(entries) != len(counts):
+        raise GitError(
+            f"git {' '.join(args)}: {len(entries)} linha(s) raw e {len(counts)} de numstat."
+        )
+    return [FileStat(entry, added, deleted) for entry, (added, deleted) in zip(entries, counts)]
+
+
+def with_blob_sizes(stats: Sequence[FileStat], cwd: Optional[Path] = None) -> list[FileStat]:
+    """Preenche o tamanho do blob novo (ou do antigo, em remoções) com um único cat-file."""
+    result = []
+    with CatFileReader(cwd=cwd, check_only=True) as reader:
+        for stat in stats:
+            sha = stat.entry.new_sha if stat.entry.new_sha != NULL_SHA else stat.entry.old_sha
+            info = reader.info(sha) if sha != NULL_SHA else None
+            size = info[2] if info else None
+            result.append(FileStat(stat.entry, stat.added, stat.deleted, size))
+    return result
+
+
+def generated_pattern(path: str, patterns: Iterable[str]) -> Optional[str]:
+    """Primeiro padrão de `patterns` que casa com `path` (ou None)."""
+    parts = path.split("/")
+    for pattern in patterns:
+        if pattern.endswith("/"):
+            if pattern[:-1] in parts[:-1]:
+                return pattern
+        elif "/" in pattern:
+            if fnmatch.fnmatchcase(path, pattern):
+                return pattern
+        elif fnmatch.fnmatchcase(parts[-1], pattern):
+            return pattern
+    return None
+
+
+def skip_reason(stat: FileStat, rules: FilterRules) -> Optional[str]:
+    if rules.skip_generated:
+        pattern = generated_pattern(stat.entry.path, rules.generated_patterns)
+        if pattern:
+            return f"gerado ({pattern})"
+    if stat.binary:
+        return "binário" if rules.skip_binary else None
+    if rules.max_lines is not None and stat.added + stat.deleted > rules.max_lines:
+        return f"acima de {rules.max_lines} linhas alteradas"
+    if rules.max_bytes is not None and stat.size is not None and stat.size > rules.max_bytes:
+        return f"acima de {format_size(rules.max_bytes)}"
+    return None
+
+
+def partition(
+    stats: Sequence[FileStat],
+    rules: FilterRules,
+    cwd: Optional[Path] = None,
+) -> tuple[list[FileStat], list[SkippedFile]]:
+    """Separa os arquivos que entram no diff dos omitidos (com o motivo)."""
+    if rules.max_bytes is not None and stats:
+        stats = with_blob_sizes(stats, cwd=cwd)
+    kept: list[FileStat] = []
+    skipped: list[SkippedFile] = []
+    for stat in stats:
+        reason = skip_reason(stat, rules)
+        if reason:
+            skipped.append(SkippedFile(stat, reason))
+        else:
+            kept.append(stat)
+    return kept, skipped
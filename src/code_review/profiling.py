@@ -0,0 +1,147 @@
+"""
+Medição por etapa da geração do relatório (`review-cli report --profile`).
+
+Cada etapa acumula duração, bytes produzidos e processos git iniciados. As
+etapas podem ser blocos (`stage`) ou geradores (`wrap`): no segundo caso só
+conta o tempo gasto dentro de `next()`, então seções consumidas sob demanda
+pelo gravador não se misturam. O tempo das etapas aninhadas é descontado da
+etapa externa, de modo que a soma das durações fecha com o total.
+
+Processos são contados pela diferença de `spawned_processes()` durante a
+etapa; com `--workers`, lotes disparados pelas threads do pool podem cair na
+etapa que estiver ativa naquele momento (em geral `write`).
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Generator, Iterable, Iterator, Optional, TypeVar
+
+from code_review.files import write_lines_atomic
+from code_review.git_utils import spawned_processes
+
+T = TypeVar("T")
+
+
+@dataclass
+class StageStats:
+    name: str
+    seconds: float = 0.0
+    bytes: int = 0
+    processes: int = 0
+
+
+class StageProfiler:
+    """Acumula estatísticas por etapa, na ordem em que as etapas terminam pela primeira vez."""
+
+    def __init__(self, sections: bool = True):
+        # Sem `sections`, só os blocos são medidos: as seções ficam somadas em `write`
+        self.sections = sections
+        self.stages: dict[str, StageStats] = {}
+        self._order: list[str] = []
+        # Pilha de [etapa, tempo e processos consumidos por etapas aninhadas]
+        self._stack: list[list] = []
+        self._started = time.perf_counter()
+        self._processes_at_start = spawned_processes()
+
+    def _stats(self, name: str) -> StageStats:
+        if name not in self.stages:
+            self.stages[name] = StageStats(name)
+        return self.stages[name]
+
+    def _enter(self, name: str) -> list:
+        frame = [name, 0.0, 0]
+        self._stack.append(frame)
+        return frame
+
+    def _leave(self, frame: list, elapsed: float, processes: int, size: int = 0) -> None:
+        self._stack.pop()
+        stats = self._stats(frame[0])
+        if stats.name not in self._order:
+            self._order.append(stats.name)
+        stats.seconds += elapsed - frame[1]
+        stats.processes += processes - frame[2]
+        stats.bytes += size
+        if self._stack:
+            parent = self._stack[-1]
+            parent[1] += elapsed
+            parent[2] += processes
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        """Mede um bloco; `bytes` pode ser preenchido pelo chamador no objeto entregue."""
+        frame = self._enter(name)
+        stats = self._stats(name)
+        start = time.perf_counter()
+        processes = spawned_processes()
+        try:
+            yield stats
+        finally:
+            self._leave(frame, time.perf_counter() - start, spawned_processes() - processes)
+
+    def wrap(self, name: str, lines: Iterable[str]) -> Generator[str, None, object]:
+        """Mede um gerador de linhas, repassando o valor de retorno dele."""
+        it = iter(lines)
+        while True:
+            frame = self._enter(name)
+            start = time.perf_counter()
+            processes = spawned_processes()
+            try:
+                line = next(it)
+            except StopIteration as stop:
+                self._leave(frame, time.perf_counter() - start, spawned_processes() - processes)
+                return stop.value
+            except BaseException:
+                self._leave(frame, time.perf_counter() - start, spawned_processes() - processes)
+                raise
+            self._leave(
+                frame,
+                time.perf_counter() - start,
+                spawned_processes() - processes,
+                len(line.encode("utf-8", "surrogateescape")),
+            )
+            yield line
+
+    def durations(self) -> dict[str, float]:
+        return {name: round(self.stages[name].seconds, 6) for name in self._order}
+
+    def summary(self) -> dict:
+        total = time.perf_counter() - self._started
+        return {
+            "total_seconds": round(total, 6),
+            "total_processes": spawned_processes() - self._processes_at_start,
+            "stages": [
+                {**asdict(self.stages[name]), "seconds": round(self.stages[name].seconds, 6)}
+                for name in self._order
+            ],
+        }
+
+
+def profiled(profiler: Optional[StageProfiler], name: str, lines: Iterable[T]) -> Iterable[T]:
+    """`profiler.wrap` quando há profiler de seções; caso contrário devolve `lines` intacto."""
+    if profiler is None or not profiler.sections:
+        return lines
+    return profiler.wrap(name, lines)
+
+
+@contextmanager
+def maybe_stage(profiler: Optional[StageProfiler], name: str) -> Iterator[Optional[StageStats]]:
+    if profiler is None:
+        yield None
+        return
+    with profiler.stage(name) as stats:
+        yield stats
+
+
+def profile_filename(report_path: Path) -> Path:
+    """`relatorio_diff_<branch>.profile.json` ao lado do relatório."""
+    stem = report_path.name[: -len(".md")] if report_path.name.endswith(".md") else report_path.name
+    return report_path.with_name(f"{stem}.profile.json")
+
+
+def write_profile(summary: dict, path: Path) -> None:
+    write_lines_atomic([json.dumps(summary, ensure_ascii=False, indent=2), "\n"], path)
@@ -0,0 +1,707 @@
+"""
+Gerador nativo do relatório de diff (equivalente aos scripts embedados).
+
+Em vez de três processos git (`diff --name-only`, `log` e `diff`), o relatório
+lê um único stream `git diff --patch-with-raw`: a parte "raw" alimenta a lista
+de arquivos e o patch vem logo em seguida. O Markdown é produzido por um
+gerador e gravado direto no disco, com uso de memória constante.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from datetime import datetime
+from itertools import takewhile
+from pathlib import Path
+from typing import TYPE_CHECKING, Generator, Iterable, Iterator, Optional, Sequence
+
+from code_review.archive import ReportArchive, RetentionPolicy
+from code_review.compact import CompactOptions, compact_patch
+from code_review.diff_parser import RawEntry, parse_raw_line
+from code_review.files import write_lines_atomic
+from code_review.git_utils import (
+    GitError,
+    find_repo_root,
+    merge_base,
+    ref_exists,
+    rev_parse,
+    run_git,
+    stream_git,
+)
+from code_review.patches import (
+    iter_batched_patch,
+    iter_cached_patch,
+    iter_raw_entries,
+    iter_teed_patch,
+    plan_batches,
+    prefer_cached,
+)
+from code_review.powershell_utils import sanitize_branch_name
+from code_review.prefilter import FilterRules, SkippedFile, iter_file_stats, partition
+from code_review.profiling import StageProfiler, maybe_stage, profiled
+from code_review.report_cache import CACHE_DIR_NAME, STAMP_LABEL, DiskLRU, make_cache_key, publish_copy
+from code_review.shard import remove_shard_files, write_sharded_report
+from code_review.version import get_app_version
+
+if TYPE_CHECKING:
+    from code_review.secret_scan import SecretScanner
+
+DEFAULT_PATHSPEC = (".", ":(exclude)*.md")
+REPORT_DIR_NAME = "diffs"
+REPORT_PREFIX = "relatorio_diff_"
+FILE_CACHE_MAX_ENTRIES = 50_000
+FILE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+def report_filename(branch: str, suffix: str = ".md") -> str:
+    """Nome do arquivo de relatório para a branch (`relatorio_diff_<branch>.md`)."""
+    return f"{REPORT_PREFIX}{sanitize_branch_name(branch)}{suffix}"
+
+
+def is_removed_line(line: str) -> bool:
+    """Mesmo critério do `grep -v '^-[^-]'` usado no script shell."""
+    return len(line) > 1 and line[0] == "-" and line[1] not in "-\n"
+
+
+@dataclass(frozen=True)
+class ReportRange:
+    """Faixa `base...target` já resolvida para SHAs."""
+
+    target: str
+    base: str
+    base_ref: str
+    base_sha: str
+    tip_sha: str
+    merge_base: str
+    # Com `--since-last`: ponta da revisão anterior, usada no lugar do merge-base
+    checkpoint: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ReportOptions:
+    """Opções que controlam o conteúdo e a forma de gravação do relatório."""
+
+    pathspec: tuple[str, ...] = DEFAULT_PATHSPEC
+    keep_removed: bool = False
+    workers: int = 1
+    use_cache: bool = True
+    shard_bytes: Optional[int] = None
+    prefilter: Optional[FilterRules] = None
+    # "md" (padrão) ou "jsonl" (um registro por arquivo/hunk + índice de offsets)
+    output_format: str = "md"
+    # Cache de blocos por arquivo (opcional; só vale junto com `use_cache`)
+    file_cache: bool = False
+    # Modo compacto (contexto, linhas removidas, blocos movidos); None = saída dos scripts
+    compact: Optional[CompactOptions] = None
+    # Omite arquivos e hunks só de formatação (árvores sintáticas iguais)
+    semantic: bool = False
+    # Procura segredos nas linhas adicionadas e lista os achados no topo
+    scan_secrets: bool = False
+    # Versões anteriores do relatório vão comprimidas para `diffs/.archive` (None desliga)
+    archive: Optional[RetentionPolicy] = RetentionPolicy()
+
+    def content_key(self) -> tuple:
+        """Partes que alteram o conteúdo (entram na chave do cache)."""
+        rules = self.prefilter.content_key() if self.prefilter else None
+        key = ("\0".join(self.pathspec), self.keep_removed, rules)
+        if self.compact:
+            key = (*key, *self.compact.content_key())
+        if self.semantic:
+            key = (*key, "semantic")
+        return (*key, "secrets") if self.scan_secrets else key
+
+    def diff_args(self) -> tuple[str, ...]:
+        """Opções extras do `git diff` que gera o patch."""
+        return self.compact.git_args() if self.compact else ()
+
+
+def resolve_range(
+    target: str,
+    base: str = "main",
+    remote: str = "origin",
+    cwd: Optional[Path] = None,
+) -> ReportRange:
+    """
+    Resolve base e alvo com o mínimo de processos git (rev-parse + merge-base).
+
+    Os scripts comparam com `origin/<base>`; mantemos o mesmo comportamento,
+    mas caímos para a branch local quando o remoto não existe (repos sem rede).
+    """
+    candidates = [f"{remote}/{base}", base] if remote else [base]
+    for base_ref in candidates:
+        try:
+            base_sha, tip_sha = rev_parse(base_ref, target, cwd=cwd)
+            break
+        except GitError:
+            continue
+    else:
+        if not ref_exists(target, cwd=cwd):
+            raise GitError(f"Branch alvo não encontrada: '{target}'.")
+        raise GitError(f"Branch base não encontrada: '{candidates[0]}' nem '{base}'.")
+
+    return ReportRange(
+        target=target,
+        base=base,
+        base_ref=base_ref,
+        base_sha=base_sha,
+        tip_sha=tip_sha,
+        merge_base=merge_base(base_sha, tip_sha, cwd=cwd),
+    )
+
+
+def iter_report_lines(
+    rng: ReportRange,
+    cwd: Optional[Path] = None,
+    options: Optional[ReportOptions] = None,
+    commit_lines: Optional[Sequence[str]] = None,
+    profiler: Optional[StageProfiler] = None,
+    file_cache: Optional[DiskLRU] = None,
+    file_counts: Optional[dict] = None,
+    semantic_cache: Optional[DiskLRU] = None,
+    scanner: Optional[SecretScanner] = None,
+) -> Iterator[str]:
+    """
+    Gera as linhas (com '\\n') do relatório Markdown para a faixa `rng`.
+
+    As seções são as mesmas de `relatorio_diff_<branch>.md`. No modo serial a
+    lista de arquivos e o diff vêm do mesmo processo git; com `workers > 1` o
+    patch é gerado em lotes paralelos e remontado na ordem original, com
+    saída idêntica à do modo serial. `commit_lines` permite reaproveitar um
+    histórico já calculado (modo em lote) em vez de rodar `git log`.
+    Com `profiler`, cada seção é medida como uma etapa (`files`, `commits`, `diff`).
+    Com `file_cache`, os blocos por arquivo são guardados enquanto o stream
+    passa, ou o patch é montado a partir deles quando a maior parte já está
+    no cache; `file_counts` recebe os acertos e faltas. Com `semantic`,
+    as decisões do filtro de formatação ficam em `semantic_cache`. Com
+    `scanner`, as linhas do patch passam pelo scanner de segredos.
+    """
+    options = options or ReportOptions()
+    pathspec = options.pathspec
+    yield from profiled(profiler, "header", _iter_header(rng, cwd))
+
+    if options.prefilter is not None or options.semantic:
+        yield from _iter_prefiltered(
+            rng, cwd, options, commit_lines, profiler, file_cache, file_counts, semantic_cache, scanner
+        )
+        return
+
+    if options.workers > 1:
+        entries = []
+
+        def file_list() -> Generator[str, None, int]:
+            entries.extend(iter_raw_entries(rng.merge_base, rng.tip_sha, pathspec, cwd=cwd))
+            return (yield from _iter_file_list(entry.display_path for entry in entries))
+
+        yield from profiled(profiler, "files", file_list())
+        yield from profiled(profiler, "commits", _iter_commits(rng, cwd, commit_lines))
+        patch = entries_patch(rng, entries, options, cwd, file_cache, file_counts)
+        try:
+            diff = _iter_diff_section(patch, options, empty=not entries, scanner=scanner)
+            yield from profiled(profiler, "diff", diff)
+        finally:
+            patch.close()
+        return
+
+    diff_args = [
+        "diff", "--patch-with-raw", "--no-abbrev", *options.diff_args(), rng.merge_base, rng.tip_sha, "--", *pathspec
+    ]
+    # O git só é iniciado na primeira leitura, dentro da etapa `files`
+    lines = _iter_stream(diff_args, cwd)
+    patch = lines
+    try:
+        # A parte raw termina na linha em branco que antecede o patch
+        raw_lines = takewhile(lambda line: line.startswith(":"), lines)
+        entries = [parse_raw_line(line) for line in raw_lines] if file_cache is not None else None
+        paths = (entry.display_path for entry in entries) if entries is not None else (
+            parse_raw_line(line).display_path for line in raw_lines
+        )
+        listed = yield from profiled(profiler, "files", _iter_file_list(paths))
+        if entries:
+            patch = _cached_or_teed(rng, entries, lines, options, cwd, file_cache, file_counts)
+        # O git diff segue produzindo em paralelo enquanto o log (pequeno) é lido
+        yield from profiled(profiler, "commits", _iter_commits(rng, cwd, commit_lines))
+        diff = _iter_diff_section(patch, options, empty=not listed, scanner=scanner)
+        yield from profiled(profiler, "diff", diff)
+    finally:
+        patch.close()
+        lines.close()
+
+
+def _cached_or_teed(
+    rng: ReportRange,
+    entries: Sequence[RawEntry],
+    lines: Generator[str, None, None],
+    options: ReportOptions,
+    cwd: Optional[Path],
+    file_cache: DiskLRU,
+    file_counts: Optional[dict],
+) -> Generator[str, None, None]:
+    """
+    Patch do modo serial com o cache de arquivos: se a maior parte dos blocos
+    já está no cache, o stream do git é fechado e o patch é montado por
+    arquivo; senão o stream segue e cada bloco é guardado enquanto passa.
+    """
+    if prefer_cached(entries, file_cache, options.diff_args()):
+        lines.close()
+        return entries_patch(rng, entries, options, cwd, file_cache, file_counts)
+    return iter_teed_patch(lines, entries, file_cache, options.diff_args(), counts=file_counts)
+
+
+def _iter_prefiltered(
+    rng: ReportRange,
+    cwd: Optional[Path],
+    options: ReportOptions,
+    commit_lines: Optional[Sequence[str]],
+    profiler: Optional[StageProfiler],
+    file_cache: Optional[DiskLRU] = None,
+    file_counts: Optional[dict] = None,
+    semantic_cache: Optional[DiskLRU] = None,
+    scanner: Optional[SecretScanner] = None,
+) -> Iterator[str]:
+    """
+    Variante com pré-filtro: numstat + tamanhos decidem os arquivos antes do
+    patch, que é pedido só para os mantidos. Sem omissões, o patch vem do
+    pathspec original (sem listar caminhos na linha de comando).
+
+    Com `semantic`, os arquivos só de formatação também são omitidos, e os
+    hunks só de formatação dos demais são resumidos no próprio patch.
+    """
+    kept: list = []
+    skipped: list = []
+    semantic = None
+    if options.semantic:
+        from code_review.semantic import SemanticFilter
+
+        semantic = SemanticFilter(semantic_cache, cwd=cwd, diff_options=options.diff_args())
+
+    def file_list() -> Generator[str, None, int]:
+        with maybe_stage(profiler, "prefilter"):
+            stats = iter_file_stats(rng.merge_base, rng.tip_sha, options.pathspec, cwd=cwd)
+            if options.prefilter is not None:
+                result = partition(stats, options.prefilter, cwd=cwd)
+            else:
+                result = (stats, [])
+        kept.extend(result[0])
+        skipped.extend(result[1])
+        if semantic is not None:
+            with maybe_stage(profiler, "semantic"):
+                result = semantic.split(kept)
+            kept[:] = result[0]
+            skipped.extend(result[1])
+        return (yield from _iter_file_list(stat.entry.display_path for stat in stats))
+
+    try:
+        yield from profiled(profiler, "files", file_list())
+        yield from profiled(profiler, "commits", _iter_commits(rng, cwd, commit_lines))
+        if skipped:
+            yield from _iter_skipped(skipped)
+
+        entries = [stat.entry for stat in kept]
+        if (
+            not skipped
+            and options.workers <= 1
+            and (file_cache is None or not prefer_cached(entries, file_cache, options.diff_args()))
+        ):
+            diff_args = ["diff", *options.diff_args(), rng.merge_base, rng.tip_sha, "--", *options.pathspec]
+            source = _iter_stream(diff_args, cwd)
+            patch = source
+            if file_cache is not None:
+                patch = iter_teed_patch(source, entries, file_cache, options.diff_args(), counts=file_counts)
+        else:
+            source = patch = entries_patch(rng, entries, options, cwd, file_cache, file_counts)
+        try:
+            lines = semantic.filter_patch(patch, entries) if semantic else patch
+            diff = _iter_diff_section(lines, options, empty=not kept, scanner=scanner)
+            yield from profiled(profiler, "diff", diff)
+        finally:
+            patch.close()
+            source.close()
+    finally:
+        if semantic is not None:
+            semantic.close()
+
+
+def entries_patch(
+    rng: ReportRange,
+    entries: Sequence[RawEntry],
+    options: ReportOptions,
+    cwd: Optional[Path] = None,
+    file_cache: Optional[DiskLRU] = None,
+    file_counts: Optional[dict] = None,
+) -> Generator[str, None, None]:
+    """Patch das entradas já listadas: pelo cache de arquivos ou em lotes (paralelos com `workers`)."""
+    workers = max(options.workers, 1)
+    diff_options = options.diff_args()
+    if file_cache is not None:
+        return iter_cached_patch(
+            rng.merge_base,
+            rng.tip_sha,
+            entries,
+            file_cache,
+            workers=workers,
+            cwd=cwd,
+            diff_options=diff_options,
+            counts=file_counts,
+        )
+    batches = plan_batches(entries, workers)
+    return iter_batched_patch(
+        rng.merge_base, rng.tip_sha, batches, workers=workers, cwd=cwd, diff_options=diff_options
+    )
+
+
+def _iter_skipped(skipped: Sequence[SkippedFile]) -> Iterator[str]:
+    yield "## 🚫 Arquivos Omitidos do Diff\n"
+    yield "\n"
+    for item in skipped:
+        yield item.summary_line()
+    yield "\n"
+
+
+def _iter_stream(args: Sequence[str], cwd: Optional[Path]) -> Generator[str, None, None]:
+    with stream_git(args, cwd=cwd) as lines:
+        yield from lines
+
+
+def _iter_header(rng: ReportRange, cwd: Optional[Path]) -> Iterator[str]:
+    project = (cwd or Path.cwd()).resolve().name
+    yield f"# Relatório de Alterações: {rng.target}\n"
+    yield f"**Projeto:** {project}\n"
+    yield f"{STAMP_LABEL}{_now()}\n"
+    yield f"**Branch Base:** {rng.base}\n"
+    yield f"**Branch Alvo:** {rng.target}\n"
+    if rng.checkpoint:
+        yield f"**Desde a revisão:** {rng.checkpoint[:12]} (apenas alterações novas)\n"
+    yield "\n"
+    yield "---\n"
+    yield "\n"
+
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _restamped(lines: Iterable[str], stamp: str) -> Iterator[str]:
+    """Linhas de um relatório do cache com a data de geração atual no cabeçalho."""
+    lines = iter(lines)
+    for line in lines:
+        if line.startswith(STAMP_LABEL):
+            yield f"{STAMP_LABEL}{stamp}\n"
+            break
+        yield line
+    yield from lines
+
+
+def _iter_file_list(paths: Iterable[str]) -> Generator[str, None, int]:
+    yield "## 📂 Arquivos Alterados\n"
+    yield "\n"
+    count = 0
+    for path in paths:
+        count += 1
+        yield f"- {path}\n"
+    if not count:
+        yield "- Nenhum arquivo alterado\n"
+    yield "\n"
+    return count
+
+
+def _iter_commits(rng: ReportRange, cwd: Optional[Path], commit_lines: Optional[Sequence[str]] = None) -> Iterator[str]:
+    yield "## 📝 Histórico de Commits\n"
+    yield "\n"
+    if commit_lines is None:
+        commits = run_git(["log", "--no-merges", "--oneline", f"{rng.base_sha}..{rng.tip_sha}"], cwd=cwd)
+        commit_lines = commits.decode("utf-8", "surrogateescape").splitlines()
+    for commit in commit_lines:
+        yield f"- {commit}\n"
+    if not commit_lines:
+        yield "- Nenhum commit encontrado\n"
+    yield "\n"
+
+
+def _iter_diff_section(
+    lines: Iterable[str],
+    options: ReportOptions,
+    empty: bool,
+    scanner: Optional[SecretScanner] = None,
+) -> Iterator[str]:
+    yield "## 💻 Detalhes do Código (Diff)\n"
+    yield "\n"
+    yield "```diff\n"
+    if scanner is not None and not empty:
+        # Antes do modo compacto: os números de linha vêm do patch original
+        lines = scanner.scan(lines)
+    if options.compact and not empty:
+        yield from compact_patch(lines, options.compact)
+    else:
+        yield from _iter_patch(lines, keep_removed=options.keep_removed, empty=empty)
+    yield "```\n"
+
+
+def _iter_patch(lines: Iterable[str], keep_removed: bool, empty: bool) -> Iterator[str]:
+    if empty:
+        yield "# Nenhum diff gerado\n"
+        return
+    for line in lines:
+        if not keep_removed and is_removed_line(line):
+            continue
+        yield line
+
+
+def write_report(lines: Iterable[str], path: Path) -> int:
+    """Grava o relatório de forma atômica e retorna o tamanho em bytes."""
+    return write_lines_atomic(lines, path)
+
+
+def read_report_lines(path: Path) -> Iterator[str]:
+    """Lê um relatório gravado por `write_report`, linha a linha e sem conversões."""
+    with open(path, "r", encoding="utf-8", errors="surrogateescape", newline="") as f:
+        yield from f
+
+
+def count_changed_files(path: Path) -> int:
+    """Quantidade de itens na seção "Arquivos Alterados" de um relatório (ou índice) gravado."""
+    count = 0
+    in_section = False
+    for line in read_report_lines(path):
+        if line.startswith("## "):
+            if in_section:
+                break
+            in_section = line.startswith("## 📂")
+        elif in_section and line.startswith("- ") and line != "- Nenhum arquivo alterado\n":
+            count += 1
+    return count
+
+
+def default_output_dir(cwd: Optional[Path] = None) -> Path:
+    """Pasta `diffs/` na raiz do repositório (mesmo destino dos scripts)."""
+    return find_repo_root(cwd) / REPORT_DIR_NAME
+
+
+@dataclass(frozen=True)
+class ReportResult:
+    """Resultado de `generate_report`."""
+
+    path: Path
+    range: ReportRange
+    cached: bool = False
+    manifest: Optional[Path] = None
+    index: Optional[Path] = None
+    files_changed: Optional[int] = None
+    # Acertos e faltas do cache de arquivos (`{"hits": n, "misses": n}`), quando usado
+    file_cache: Optional[dict] = None
+    # Versão anterior comprimida em `diffs/.archive`, quando houve mudança
+    archived: Optional[Path] = None
+
+
+def report_cache(output_dir: Path) -> DiskLRU:
+    """Cache de relatórios completos em `diffs/.cache/reports`."""
+    return DiskLRU(output_dir / CACHE_DIR_NAME / "reports", suffix=".md")
+
+
+def file_patch_cache(output_dir: Path) -> DiskLRU:
+    """Cache de blocos do patch por arquivo em `diffs/.cache/files`, compartilhado entre branches."""
+    return DiskLRU(
+        output_dir / CACHE_DIR_NAME / "files",
+        suffix=".patch",
+        max_entries=FILE_CACHE_MAX_ENTRIES,
+        max_bytes=FILE_CACHE_MAX_BYTES,
+    )
+
+
+def generate_report(
+    target: str,
+    base: str = "main",
+    remote: str = "origin",
+    cwd: Optional[Path] = None,
+    output_dir: Optional[Path] = None,
+    options: Optional[ReportOptions] = None,
+    profiler: Optional[StageProfiler] = None,
+    checkpoint: Optional[str] = None,
+) -> ReportResult:
+    """
+    Resolve a faixa `base...target` e gera `diffs/relatorio_diff_<branch>.md`.
+    Com `checkpoint` (ponta da revisão anterior), relata só `checkpoint..tip`,
+    ou a faixa completa se o histórico foi reescrito desde então.
+    """
+    with maybe_stage(profiler, "resolve"):
+        rng = resolve_range(target, base=base, remote=remote, cwd=cwd)
+        if checkpoint:
+            from code_review.checkpoints import since_checkpoint
+
+            rng = since_checkpoint(rng, checkpoint, cwd=cwd)
+    return build_report(rng, cwd=cwd, output_dir=output_dir, options=options, profiler=profiler)
+
+
+def build_report(
+    rng: ReportRange,
+    cwd: Optional[Path] = None,
+    output_dir: Optional[Path] = None,
+    options: Optional[ReportOptions] = None,
+    commit_lines: Optional[Sequence[str]] = None,
+    profiler: Optional[StageProfiler] = None,
+) -> ReportResult:
+    """
+    Gera o relatório de uma faixa já resolvida e retorna onde ele foi salvo.
+
+    Com `use_cache`, o relatório é endereçado por (merge-base, tip, pathspec,
+    opções, versão): se nada mudou desde a última execução, o arquivo em cache
+    é publicado sem rodar o diff novamente.
+
+    Com `shard_bytes`, o arquivo principal vira um índice e o diff é dividido
+    em partes de até `shard_bytes` bytes, descritas por um manifesto JSON.
+
+    Com `use_cache` e `file_cache`, os blocos por arquivo ficam em
+    `diffs/.cache/files`; quando a maior parte já está lá, o patch é montado
+    a partir deles e só os arquivos inéditos (por blobs, modos e caminhos)
+    vão para o git.
+
+    Com `semantic` e `use_cache`, as decisões do filtro de formatação ficam
+    em `diffs/.cache/semantic`.
+
+    Com `archive`, a versão anterior do relatório Markdown (se mudou) é
+    comprimida em `diffs/.archive` e a retenção é aplicada em seguida.
+
+    Com `profiler`, as seções do relatório e a gravação (`write`, `shard`,
+    `cache`, `publish`, `archive`) são medidas como etapas.
+    """
+    options = options or ReportOptions()
+    with maybe_stage(profiler, "resolve"):
+        output_dir = output_dir or default_output_dir(cwd)
+    path = output_dir / report_filename(rng.target)
+    file_cache = file_patch_cache(output_dir) if options.use_cache and options.file_cache else None
+    file_counts: dict = {}
+    semantic_cache = None
+    if options.semantic and options.use_cache:
+        from code_review.semantic import semantic_cache as make_semantic_cache
+
+        semantic_cache = make_semantic_cache(output_dir)
+    if options.output_format == "jsonl":
+        # Formato estruturado: sempre gerado do zero (sem cache de relatório nem partes)
+        from code_review.jsonl_report import jsonl_filename, write_jsonl_report
+
+        jsonl_path = jsonl_filename(path)
+        with maybe_stage(profiler, "write") as stats:
+            index, files_changed = write_jsonl_report(
+                rng, jsonl_path, cwd=cwd, options=options, file_cache=file_cache, file_counts=file_counts
+            )
+            if stats:
+                stats.bytes += jsonl_path.stat().st_size
+        return ReportResult(
+            path=jsonl_path,
+            range=rng,
+            index=index,
+            files_changed=files_changed,
+            file_cache=file_counts or None,
+        )
+
+    archive = ReportArchive(output_dir, options.archive) if options.archive else None
+    with maybe_stage(profiler, "archive"):
+        held = archive.stash(path) if archive else None
+    try:
+        result = _build_markdown(
+            rng, path, output_dir, options, cwd, commit_lines, profiler, file_cache, file_counts, semantic_cache
+        )
+    except BaseException:
+        if held is not None:
+            held.unlink(missing_ok=True)
+        raise
+    if held is None:
+        return result
+    with maybe_stage(profiler, "archive"):
+        archived = archive.store(held, path)
+    return replace(result, archived=archived)
+
+
+def _build_markdown(
+    rng: ReportRange,
+    path: Path,
+    output_dir: Path,
+    options: ReportOptions,
+    cwd: Optional[Path],
+    commit_lines: Optional[Sequence[str]],
+    profiler: Optional[StageProfiler],
+    file_cache: Optional[DiskLRU],
+    file_counts: dict,
+    semantic_cache: Optional[DiskLRU],
+) -> ReportResult:
+    shard_bytes = options.shard_bytes
+    scanner = None
+    if options.scan_secrets:
+        from code_review.secret_scan import SecretScanner
+
+        scanner = SecretScanner()
+    lines = iter_report_lines(
+        rng,
+        cwd=cwd,
+        options=options,
+        commit_lines=commit_lines,
+        profiler=profiler,
+        file_cache=file_cache,
+        file_counts=file_counts,
+        semantic_cache=semantic_cache,
+        scanner=scanner,
+    )
+    if scanner is not None:
+        from code_review.secret_scan import with_findings_section
+
+        lines = with_findings_section(lines, scanner)
+
+    if not options.use_cache:
+        if shard_bytes:
+            with maybe_stage(profiler, "shard"):
+                manifest = _write_shards(lines, path, rng, shard_bytes)
+            return ReportResult(path=path, range=rng, manifest=manifest)
+        remove_shard_files(path)
+        with maybe_stage(profiler, "write") as stats:
+            size = write_report(lines, path)
+            if stats:
+                stats.bytes += size
+        return ReportResult(path=path, range=rng)
+
+    cache = report_cache(output_dir)
+    key = make_cache_key(
+        "report",
+        get_app_version(),
+        rng.target,
+        rng.base,
+        rng.merge_base,
+        rng.tip_sha,
+        *options.content_key(),
+        *((rng.checkpoint,) if rng.checkpoint else ()),
+    )
+    with maybe_stage(profiler, "cache"):
+        entry = cache.get(key)
+    cached = entry is not None
+    if entry is None:
+        entry = cache.path_for(key)
+        with maybe_stage(profiler, "write") as stats:
+            size = write_report(lines, entry)
+            if stats:
+                stats.bytes += size
+        with maybe_stage(profiler, "cache"):
+            cache.evict()
+    # Um acerto é publicado com a data desta geração, não a da entrada do cache
+    stamp = _now() if cached else None
+    if shard_bytes:
+        with maybe_stage(profiler, "shard"):
+            lines = read_report_lines(entry)
+            if stamp is not None:
+                lines = _restamped(lines, stamp)
+            manifest = _write_shards(lines, path, rng, shard_bytes)
+        return ReportResult(
+            path=path, range=rng, cached=cached, manifest=manifest, file_cache=file_counts or None
+        )
+    with maybe_stage(profiler, "publish"):
+        remove_shard_files(path)
+        publish_copy(entry, path, stamp=stamp)
+    return ReportResult(path=path, range=rng, cached=cached, file_cache=file_counts or None)
+
+
+def _write_shards(lines: Iterable[str], path: Path, rng: ReportRange, shard_bytes: int) -> Path:
+    meta = {
+        "target": rng.target,
+        "base": rng.base,
+        "merge_base": rng.merge_base,
+        "tip": rng.tip_sha,
+    }
+    title = f"Relatório de Alterações: {rng.target}"
+    return write_sharded_report(lines, path, shard_bytes, title=title, meta=meta)
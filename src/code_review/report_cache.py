@@ -0,0 +1,205 @@
+"""
+Cache endereçado por conteúdo para os relatórios em `diffs/.cache/`.
+
+Cada entrada é um arquivo nomeado pelo hash da chave. O mtime funciona como
+"último acesso": um acerto atualiza o mtime e a eviction remove as entradas
+mais antigas quando os limites de quantidade ou bytes são ultrapassados.
+
+`MemoryLRU` é a versão em memória (usada pelo `review-cli serve`), com o
+mesmo critério de limites por quantidade e bytes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Hashable, Iterable, Optional
+
+from code_review.files import temp_path_for
+
+CACHE_DIR_NAME = ".cache"
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Linha do cabeçalho com a data de geração (reescrita ao publicar um acerto)
+STAMP_LABEL = "**Gerado em:** "
+STAMP_SEARCH_BYTES = 4096
+
+
+def make_cache_key(*parts: object) -> str:
+    """Hash SHA-256 estável de uma sequência de partes (separadas por NUL)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8", "surrogateescape"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class DiskLRU:
+    """Diretório de entradas com eviction LRU (por mtime) e limites de tamanho."""
+
+    def __init__(
+        self,
+        root: Path,
+        suffix: str = "",
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.root = root
+        self.suffix = suffix
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def path_for(self, key: str) -> Path:
+        return self.root / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Retorna o caminho da entrada (marcando o acesso) ou None."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put_bytes(self, key: str, payload: bytes, evict: bool = True) -> Path:
+        """
+        Grava a entrada de forma atômica e aplica a eviction (com `evict=False`,
+        quem grava muitas entradas seguidas chama `evict()` uma vez no final).
+        """
+        path = self.path_for(key)
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = temp_path_for(path)
+        try:
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        if evict:
+            self.evict()
+        return path
+
+    def _entries(self) -> Iterable[os.DirEntry]:
+        try:
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    if entry.name.startswith(".") or not entry.name.endswith(self.suffix):
+                        continue
+                    if entry.is_file(follow_symlinks=False):
+                        yield entry
+        except FileNotFoundError:
+            return
+
+    def evict(self) -> int:
+        """Remove as entradas menos usadas até caber nos limites. Retorna quantas saíram."""
+        entries = []
+        total = 0
+        for entry in self._entries():
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, entry.path))
+            total += st.st_size
+
+        if len(entries) <= self.max_entries and total <= self.max_bytes:
+            return 0
+
+        entries.sort()
+        removed = 0
+        count = len(entries)
+        for _, size, entry_path in entries:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            try:
+                os.unlink(entry_path)
+            except FileNotFoundError:
+                pass
+            count -= 1
+            total -= size
+            removed += 1
+        return removed
+
+
+class MemoryLRU:
+    """Dicionário LRU limitado por quantidade e por bytes (tamanho informado no `put`); thread-safe."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> None:
+        """Guarda `value`; itens maiores que o limite inteiro não entram."""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._items[key] = (value, size)
+            self.bytes += size
+            while len(self._items) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.bytes -= evicted
+
+
+def publish_copy(src: Path, dest: Path, stamp: Optional[str] = None) -> None:
+    """
+    Publica uma cópia de `src` em `dest` (cópia do kernel via `shutil`, troca
+    atômica). O arquivo publicado é independente da entrada do cache: editá-lo
+    não altera o cache. Com `stamp`, o valor da linha `**Gerado em:**` do
+    cabeçalho é reescrito no lugar (mesma largura), sem reler o resto.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = temp_path_for(dest)
+    try:
+        shutil.copyfile(src, tmp_path)
+        if stamp is not None:
+            _restamp(tmp_path, stamp.encode("utf-8"))
+        os.replace(tmp_path, dest)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def stamp_span(head: bytes) -> Optional[tuple[int, int]]:
+    """Início e fim do valor de `**Gerado em:**` em `head` (o começo do relatório)."""
+    label = STAMP_LABEL.encode("utf-8")
+    start = head.find(label, 0, STAMP_SEARCH_BYTES)
+    if start < 0:
+        return None
+    start += len(label)
+    end = head.find(b"\n", start)
+    return (start, end) if end >= 0 else None
+
+
+def _restamp(path: Path, stamp: bytes) -> None:
+    with open(path, "r+b") as f:
+        head = f.read(STAMP_SEARCH_BYTES)
+        span = stamp_span(head)
+        if span is None or span[1] - span[0] != len(stamp):
+            return
+        f.seek(span[0])
+        f.write(stamp)
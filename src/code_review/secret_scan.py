@@ -0,0 +1,295 @@
+"""
+Varredura de segredos nas linhas adicionadas (`review-cli report --scan-secrets`).
+
+O scanner observa o patch enquanto ele passa para o relatório, sem reler o
+diff. As linhas `+` são acumuladas em blocos (um arquivo por bloco) e cada
+bloco passa por poucas varreduras em C sobre bytes, sem regex por linha:
+
+- `bytes.translate` marca os caracteres de token e um `find` acha as
+  sequências longas; só elas são classificadas (prefixos de provedores,
+  JWT, entropia alta);
+- `find` de literais para chaves privadas, strings de conexão (`://`) e
+  nomes de variáveis sensíveis (na cópia em minúsculas).
+
+As regras (regex) só rodam nas poucas linhas candidatas. Os achados viram uma
+seção curta no topo do relatório, com `arquivo:linha` e o valor mascarado.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import string
+import tempfile
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Iterable, Iterator, Optional
+
+from code_review.diff_parser import parse_hunk_header, path_from_header
+
+MAX_FINDINGS = 100
+CHUNK_LINES = 4096
+# Acima disso o corpo do relatório vai do spool em memória para um arquivo temporário
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+SECTION_TITLE = "## 🔐 Possíveis Segredos Expostos\n"
+
+# Sequências de token: o menor segredo com prefixo (chave AWS) tem 20 caracteres.
+# Sem `=`: em `CHAVE=valor` (linhas de .env) o valor é um token separado do nome
+TOKEN_CHARS = (string.ascii_letters + string.digits + "_+/-").encode()
+MIN_TOKEN = 20
+MIN_ENTROPY_TOKEN = 32
+HIGH_ENTROPY = 4.2
+_TOKEN_TABLE = bytes(ord("a") if byte in TOKEN_CHARS else ord(" ") for byte in range(256))
+_TOKEN_NEEDLE = b"a" * MIN_TOKEN
+# Partes de nomes de variáveis sensíveis (procuradas em minúsculas)
+KEYWORDS = (b"passw", b"pwd", b"secret", b"token", b"api_key", b"apikey")
+
+
+@dataclass(frozen=True)
+class SecretRule:
+    name: str
+    label: str
+    pattern: re.Pattern
+
+
+def _rule(name: str, label: str, pattern, flags: int = 0) -> SecretRule:
+    return SecretRule(name, label, re.compile(pattern, flags))
+
+
+# Tokens com prefixo conhecido (casados no início da sequência de token)
+TOKEN_RULES = (
+    _rule("aws_access_key", "Chave de acesso AWS", r"(?:AKIA|ASIA|AGPA|AIDA|AROA)[0-9A-Z]{16}(?![0-9A-Za-z])"),
+    _rule("github_token", "Token do GitHub", r"(?:gh[pousr]_[A-Za-z0-9]{36,}|github_pat_[A-Za-z0-9_]{40,})"),
+    _rule("gitlab_token", "Token do GitLab", r"glpat-[A-Za-z0-9_-]{20,}"),
+    _rule("slack_token", "Token do Slack", r"xox[abposr]-[A-Za-z0-9-]{10,}"),
+    _rule("google_api_key", "Chave de API do Google", r"AIza[0-9A-Za-z_-]{35}"),
+    _rule("stripe_key", "Chave do Stripe", r"[rs]k_live_[0-9A-Za-z]{20,}"),
+    _rule("llm_api_key", "Chave de API (OpenAI/Anthropic)", r"sk-(?:ant-|proj-)?[A-Za-z0-9_-]{32,}"),
+)
+TOKEN_PREFIXES = frozenset({"AK", "AS", "AG", "AI", "AR", "gh", "gl", "xo", "rk", "sk"})
+JWT = _rule("jwt", "Token JWT", r"eyJ[A-Za-z0-9_-]{8,}\.eyJ[A-Za-z0-9_-]{8,}\.[A-Za-z0-9_-]{8,}")
+HIGH_ENTROPY_RULE = _rule("high_entropy", "Token de alta entropia", r"[A-Za-z0-9_+/-]+")
+# Regras de linha: rodam sobre os bytes do bloco, ancoradas onde o literal foi achado
+PRIVATE_KEY = _rule("private_key", "Chave privada", rb"-----BEGIN (?:[A-Z0-9]+ )*PRIVATE KEY(?: BLOCK)?-----")
+CONNECTION_STRING = _rule(
+    "connection_string",
+    "String de conexão com senha",
+    rb"://[^\s:/@'\"`]+:([^\s:/@'\"`]{3,})@[^\s'\"`]+",
+)
+ASSIGNMENT = _rule(
+    "assignment",
+    "Senha/segredo atribuído no código",
+    # Valor entre aspas (grupo 1) ou sem aspas até o fim da palavra (grupo 2, como no .env)
+    rb"(?:passw(?:or)?d|pwd|secret|token|api[_-]?key)[A-Za-z0-9_-]*[\"']?\s*[:=]+\s*"
+    rb"(?:[\"']([^\"'\s]{8,})[\"']|([^\"'\s.()\[\]{},;]{8,})(?=[\s,;]|$))",
+    re.IGNORECASE,
+)
+MIN_ASSIGNMENT_ENTROPY = 3.0
+# Literal procurado no bloco (em minúsculas, para os nomes de variáveis) -> regra
+LINE_ANCHORS = (
+    (b"PRIVATE KEY", PRIVATE_KEY, False),
+    (b"://", CONNECTION_STRING, False),
+    *((keyword, ASSIGNMENT, True) for keyword in KEYWORDS),
+)
+
+
+def shannon_entropy(text: str) -> float:
+    if not text:
+        return 0.0
+    length = len(text)
+    return -sum(count / length * math.log2(count / length) for count in Counter(text).values())
+
+
+def mask(value: str) -> str:
+    """Mostra só o começo e o fim do valor (o relatório não deve repetir o segredo)."""
+    if len(value) <= 8:
+        return "*" * len(value)
+    return f"{value[:4]}…{value[-2:]}"
+
+
+@dataclass(frozen=True)
+class Finding:
+    path: str
+    line: int
+    rule: SecretRule
+    value: str
+
+    def summary_line(self) -> str:
+        return f"- `{self.path}:{self.line}` — {self.rule.label} (`{mask(self.value)}`)\n"
+
+
+def classify_token(token: str, line: str) -> Optional[tuple[SecretRule, str]]:
+    """Regra e valor de uma sequência longa de token (None se parecer inofensiva)."""
+    if token[:2] in TOKEN_PREFIXES:
+        for rule in TOKEN_RULES:
+            match = rule.pattern.match(token)
+            if match:
+                return rule, match.group(0)
+    if token.startswith("eyJ"):
+        match = JWT.pattern.search(line)
+        if match:
+            return JWT, match.group(0)
+    if (
+        len(token) >= MIN_ENTROPY_TOKEN
+        and any(char.isdigit() for char in token)
+        and shannon_entropy(token) >= HIGH_ENTROPY
+    ):
+        return HIGH_ENTROPY_RULE, token
+    return None
+
+
+def match_line_rule(data: bytes, rule: SecretRule, offset: int, start: int, end: int) -> Optional[str]:
+    """Valor casado por uma regra de linha a partir de `offset` (a linha é `data[start:end]`)."""
+    if rule is PRIVATE_KEY:
+        match = rule.pattern.search(data, start, end)
+    else:
+        match = rule.pattern.match(data, offset, end)
+    if not match:
+        return None
+    value = match.group(match.lastindex or 0).decode("utf-8", "surrogateescape")
+    if rule is ASSIGNMENT:
+        if shannon_entropy(value) < MIN_ASSIGNMENT_ENTROPY:
+            return None
+        # Sem aspas, um nome (`password = new_password`) não é segredo: exige um dígito
+        if match.lastindex == 2 and not any(char.isdigit() for char in value):
+            return None
+    return value
+
+
+def _find_all(data: bytes, needle: bytes) -> Iterator[int]:
+    pos = data.find(needle)
+    while pos >= 0:
+        yield pos
+        pos = data.find(needle, pos + len(needle))
+
+
+class SecretScanner:
+    """Acumula os achados das linhas adicionadas de um patch."""
+
+    def __init__(self, max_findings: int = MAX_FINDINGS):
+        self.max_findings = max_findings
+        self.findings: list[Finding] = []
+        self.total = 0
+        self._path = ""
+        self._lines: list[str] = []
+        self._numbers: list[int] = []
+
+    def scan(self, lines: Iterable[str]) -> Iterator[str]:
+        """Repassa `lines` sem alterar, registrando os achados das linhas `+`."""
+        pending, numbers = self._lines, self._numbers
+        header: Optional[list[str]] = None
+        new_line = 0
+        for line in lines:
+            yield line
+            first = line[:1]
+            if first == "+":
+                if header is not None:
+                    header.append(line)
+                    continue
+                # Sem o prefixo do diff ("+" também é caractere de token)
+                pending.append(line[1:])
+                numbers.append(new_line)
+                new_line += 1
+                if len(pending) >= CHUNK_LINES:
+                    self._flush()
+            elif first == " ":
+                new_line += 1
+            elif first == "@" and line.startswith("@@"):
+                if header is not None:
+                    self._flush()
+                    self._path = path_from_header(header)
+                    header = None
+                ranges = parse_hunk_header(line)
+                new_line = ranges[2] if ranges else 0
+            elif first == "d" and line.startswith("diff "):
+                header = [line]
+            elif header is not None:
+                header.append(line)
+        self._flush()
+
+    def _flush(self) -> None:
+        lines = self._lines
+        if not lines:
+            return
+        data = "".join(lines).encode("utf-8", "surrogateescape")
+        ends: list[int] = []
+
+        def line_of(offset: int) -> int:
+            if not ends:
+                if len(data) == sum(map(len, lines)):
+                    # Só ASCII: o tamanho em bytes de cada linha é o da string
+                    ends.extend(accumulate(map(len, lines)))
+                else:
+                    ends.extend(match.end() for match in re.finditer(b"\n", data))
+            return bisect_right(ends, offset)
+
+        # Linha (no bloco) -> {valor: regra}
+        found: dict[int, dict[str, SecretRule]] = {}
+        marks = data.translate(_TOKEN_TABLE)
+        pos = marks.find(_TOKEN_NEEDLE)
+        while pos >= 0:
+            end = marks.find(b" ", pos)
+            end = len(marks) if end < 0 else end
+            index = line_of(pos)
+            result = classify_token(data[pos:end].decode("utf-8", "surrogateescape"), lines[index])
+            if result:
+                found.setdefault(index, {}).setdefault(result[1], result[0])
+            pos = marks.find(_TOKEN_NEEDLE, end)
+        lowered = None
+        for needle, rule, lower in LINE_ANCHORS:
+            if lower and lowered is None:
+                lowered = data.lower()
+            for offset in _find_all(lowered if lower else data, needle):
+                index = line_of(offset)
+                start = ends[index - 1] if index else 0
+                end = ends[index] if index < len(ends) else len(data)
+                value = match_line_rule(data, rule, offset, start, end)
+                if value:
+                    found.setdefault(index, {}).setdefault(value, rule)
+
+        for index in sorted(found):
+            values = found[index]
+            for value, rule in values.items():
+                # Trecho de um valor maior da mesma linha (ex.: assinatura de um JWT)
+                if any(value != other and value in other for other in values):
+                    continue
+                self.total += 1
+                if len(self.findings) < self.max_findings:
+                    self.findings.append(Finding(self._path, self._numbers[index], rule, value))
+        lines.clear()
+        self._numbers.clear()
+
+    def iter_section(self) -> Iterator[str]:
+        yield SECTION_TITLE
+        yield "\n"
+        if not self.total:
+            yield "- Nenhum possível segredo nas linhas adicionadas\n"
+        for finding in self.findings:
+            yield finding.summary_line()
+        if self.total > len(self.findings):
+            yield f"- … e mais {self.total - len(self.findings)} ocorrência(s)\n"
+        yield "\n"
+
+
+def with_findings_section(lines: Iterable[str], scanner: SecretScanner) -> Iterator[str]:
+    """
+    Relatório com a seção de achados logo após o cabeçalho. O cabeçalho sai
+    direto; o restante vai para um spool (memória até `SPOOL_MAX_BYTES`, depois
+    disco) enquanto o scanner observa o diff, e é repassado depois da seção.
+    """
+    it = iter(lines)
+    for line in it:
+        yield line
+        if line == "---\n":
+            # Linha em branco que encerra o cabeçalho
+            yield next(it, "")
+            break
+    with tempfile.SpooledTemporaryFile(
+        max_size=SPOOL_MAX_BYTES, mode="w+", encoding="utf-8", errors="surrogateescape", newline="\n"
+    ) as spool:
+        spool.writelines(it)
+        yield from scanner.iter_section()
+        spool.seek(0)
+        yield from spool
@@ -0,0 +1,285 @@
+"""
+Filtro semântico de mudanças só de formatação (`review-cli report --semantic`).
+
+Para as linguagens suportadas (por ora Python, via `ast`), compara as árvores
+sintáticas dos blobs antigo e novo de cada arquivo modificado. Como o `ast`
+descarta comentários, o texto dos comentários (via `tokenize`) também entra
+na comparação: `# noqa`, `# type: ignore` e código comentado contam como
+mudança.
+
+- árvores iguais (black, ruff format, quebras de linha, aspas...): o arquivo
+  sai do diff e aparece em "Arquivos Omitidos do Diff" com o motivo;
+- árvores diferentes: cada hunk é aplicado sozinho sobre o blob antigo, e os
+  que não mudam a árvore viram uma linha de resumo `+⋯` no lugar do texto
+  (com prefixo de diff, como as linhas do modo compacto).
+
+As decisões ficam em cache em `diffs/.cache/semantic`, por (blob antigo, blob
+novo) e versão do Python, então relatórios repetidos não fazem parse de novo.
+Arquivos que não compilam, renomeados ou com mudança de modo nunca são omitidos.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import io
+import json
+import sys
+import tokenize
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+from code_review.diff_parser import RawEntry, parse_hunk_header, path_from_header
+from code_review.git_utils import CatFileReader
+from code_review.prefilter import FileStat, SkippedFile
+from code_review.report_cache import CACHE_DIR_NAME, DiskLRU, make_cache_key
+
+SEMANTIC_VERSION = "2"
+CACHE_MAX_ENTRIES = 200_000
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+FORMATTING_REASON = "apenas formatação (AST e comentários iguais)"
+# Extensão -> linguagem com comparação sintática
+LANGUAGES = {".py": "python", ".pyi": "python"}
+
+
+def _clean_docstring(text: str) -> str:
+    # Formatadores reindentam docstrings e tiram espaços no fim das linhas
+    import inspect
+
+    return "\n".join(line.rstrip() for line in inspect.cleandoc(text).splitlines())
+
+
+def _comments(source: bytes) -> list[str]:
+    # Sem o `#` e os espaços: formatadores trocam `#x` por `# x`
+    tokens = tokenize.tokenize(io.BytesIO(source).readline)
+    return [token.string.lstrip("#").strip() for token in tokens if token.type == tokenize.COMMENT]
+
+
+def python_fingerprint(source: bytes) -> Optional[str]:
+    """
+    Hash da árvore sintática (docstrings normalizadas) e do texto dos
+    comentários, ou None se não compilar.
+    """
+    try:
+        tree = ast.parse(source)
+        comments = _comments(source)
+    except (SyntaxError, ValueError, RecursionError, MemoryError, tokenize.TokenError):
+        return None
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)) and node.body:
+            first = node.body[0]
+            if (
+                isinstance(first, ast.Expr)
+                and isinstance(first.value, ast.Constant)
+                and isinstance(first.value.value, str)
+            ):
+                first.value.value = _clean_docstring(first.value.value)
+    digest = hashlib.blake2b(ast.dump(tree).encode("utf-8", "surrogatepass"), digest_size=16)
+    for comment in comments:
+        digest.update(b"\0")
+        digest.update(comment.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+FINGERPRINTS: dict[str, Callable[[bytes], Optional[str]]] = {"python": python_fingerprint}
+
+
+def language_for(path: str) -> Optional[str]:
+    return LANGUAGES.get(Path(path).suffix.lower())
+
+
+def semantic_candidate(entry: RawEntry) -> bool:
+    """Só modificações no lugar, sem mudança de modo, em linguagem suportada."""
+    return entry.status == "M" and entry.old_mode == entry.new_mode and language_for(entry.path) is not None
+
+
+def apply_hunk(old_lines: list[str], hunk: Sequence[str]) -> Optional[list[str]]:
+    """
+    Linhas de `old_lines` com apenas este hunk aplicado (None se o hunk não
+    casar com o texto antigo).
+    """
+    ranges = parse_hunk_header(hunk[0])
+    if ranges is None:
+        return None
+    old_start, old_count = ranges[0], ranges[1]
+    start = old_start - 1 if old_count else old_start
+    expected: list[str] = []
+    replacement: list[str] = []
+    for line in hunk[1:]:
+        kind, text = line[:1], line[1:]
+        if kind == " ":
+            expected.append(text)
+            replacement.append(text)
+        elif kind == "-":
+            expected.append(text)
+        elif kind == "+":
+            replacement.append(text)
+    current = old_lines[start:start + old_count]
+    if [line.rstrip("\r\n") for line in current] != [line.rstrip("\r\n") for line in expected]:
+        return None
+    return old_lines[:start] + replacement + old_lines[start + old_count:]
+
+
+def semantic_cache(output_dir: Path) -> DiskLRU:
+    """Decisões do filtro semântico em `diffs/.cache/semantic`."""
+    return DiskLRU(
+        output_dir / CACHE_DIR_NAME / "semantic",
+        suffix=".json",
+        max_entries=CACHE_MAX_ENTRIES,
+        max_bytes=CACHE_MAX_BYTES,
+    )
+
+
+class SemanticFilter:
+    """
+    Decide o que é só formatação, lendo os blobs por um único `cat-file
+    --batch` e consultando/gravando o cache (quando há um).
+    """
+
+    def __init__(self, cache: Optional[DiskLRU] = None, cwd: Optional[Path] = None, diff_options: Sequence[str] = ()):
+        self.cache = cache
+        self.cwd = cwd
+        self.diff_options = tuple(diff_options)
+        self._reader: Optional[CatFileReader] = None
+        self._fingerprints: dict[str, Optional[str]] = {}
+        self._written = False
+
+    def _read(self, sha: str) -> Optional[bytes]:
+        if self._reader is None:
+            self._reader = CatFileReader(cwd=self.cwd)
+        found = self._reader.read(sha)
+        return found[1] if found else None
+
+    def _fingerprint(self, path: str, sha: str) -> Optional[str]:
+        if sha not in self._fingerprints:
+            content = self._read(sha)
+            self._fingerprints[sha] = FINGERPRINTS[language_for(path)](content) if content is not None else None
+        return self._fingerprints[sha]
+
+    def _cached(self, key: str, compute: Callable[[], object]) -> object:
+        if self.cache is not None:
+            entry = self.cache.get(key)
+            if entry is not None:
+                try:
+                    return json.loads(entry.read_bytes())
+                except (OSError, ValueError):
+                    pass
+        value = compute()
+        if self.cache is not None:
+            self.cache.put_bytes(key, json.dumps(value).encode("utf-8"), evict=False)
+            self._written = True
+        return value
+
+    def _key(self, kind: str, entry: RawEntry, *extra: str) -> str:
+        python = "%d.%d" % sys.version_info[:2]
+        return make_cache_key("semantic", SEMANTIC_VERSION, python, kind, entry.old_sha, entry.new_sha, *extra)
+
+    def formatting_only(self, entry: RawEntry) -> bool:
+        """True se as árvores dos dois blobs forem iguais."""
+        if not semantic_candidate(entry):
+            return False
+
+        def compute() -> bool:
+            old = self._fingerprint(entry.path, entry.old_sha)
+            return old is not None and old == self._fingerprint(entry.path, entry.new_sha)
+
+        return bool(self._cached(self._key("file", entry), compute))
+
+    def split(self, stats: Sequence[FileStat]) -> tuple[list[FileStat], list[SkippedFile]]:
+        """Separa os arquivos só de formatação (omitidos) dos demais."""
+        kept: list[FileStat] = []
+        skipped: list[SkippedFile] = []
+        for stat in stats:
+            if self.formatting_only(stat.entry):
+                skipped.append(SkippedFile(stat, FORMATTING_REASON))
+            else:
+                kept.append(stat)
+        return kept, skipped
+
+    def formatting_hunks(self, entry: RawEntry, hunks: Sequence[Sequence[str]]) -> set[int]:
+        """Índices dos hunks que, aplicados sozinhos, não mudam a árvore do blob antigo."""
+
+        def compute() -> list[int]:
+            base = self._fingerprint(entry.path, entry.old_sha)
+            content = self._read(entry.old_sha) if base is not None else None
+            if content is None:
+                return []
+            old_lines = content.decode("utf-8", "surrogateescape").splitlines(keepends=True)
+            fingerprint = FINGERPRINTS[language_for(entry.path)]
+            dropped = []
+            for number, hunk in enumerate(hunks):
+                patched = apply_hunk(old_lines, hunk)
+                if patched is None:
+                    continue
+                source = "".join(patched).encode("utf-8", "surrogateescape")
+                if fingerprint(source) == base:
+                    dropped.append(number)
+            return dropped
+
+        # Os hunks dependem das opções do diff (contexto), que entram na chave
+        return set(self._cached(self._key("hunks", entry, *self.diff_options), compute))
+
+    def filter_patch(self, lines: Iterable[str], entries: Iterable[RawEntry]) -> Iterator[str]:
+        """
+        Repassa o patch trocando os hunks só de formatação por uma linha de
+        resumo. Só os arquivos candidatos são acumulados (um por vez).
+        """
+        candidates = {entry.path: entry for entry in entries if semantic_candidate(entry)}
+        header: list[str] = []
+        hunks: list[list[str]] = []
+        entry: Optional[RawEntry] = None
+        in_header = False
+        for line in lines:
+            if line.startswith("diff "):
+                if entry is not None:
+                    yield from self._render(entry, header, hunks)
+                else:
+                    # Cabeçalho sem hunks (binário, só modo, rename puro)
+                    yield from header
+                header, hunks, entry, in_header = [line], [], None, True
+                continue
+            if in_header and line.startswith("@@"):
+                in_header = False
+                entry = candidates.get(path_from_header(header))
+                if entry is None:
+                    yield from header
+                    header = []
+            if in_header:
+                header.append(line)
+            elif entry is None:
+                yield line
+            elif line.startswith("@@"):
+                hunks.append([line])
+            else:
+                hunks[-1].append(line)
+        if entry is not None:
+            yield from self._render(entry, header, hunks)
+        else:
+            yield from header
+
+    def _render(self, entry: RawEntry, header: list[str], hunks: list[list[str]]) -> Iterator[str]:
+        dropped = self.formatting_hunks(entry, hunks)
+        yield from header
+        pending = 0
+        for number, hunk in enumerate(hunks):
+            if number in dropped:
+                pending += 1
+                continue
+            if pending:
+                yield _dropped_line(pending)
+                pending = 0
+            yield from hunk
+        if pending:
+            yield _dropped_line(pending)
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self.cache is not None and self._written:
+            self.cache.evict()
+
+
+def _dropped_line(count: int) -> str:
+    # Com prefixo de diff (como `-⋯`/`+⟲` no modo compacto) para o bloco continuar analisável
+    return f"+⋯ {count} hunk(s) omitido(s): {FORMATTING_REASON}\n"
@@ -0,0 +1,393 @@
+"""
+Servidor local de relatórios (`review-cli serve`).
+
+Mantém o repositório "quente" para chamadas de ferramentas de agentes: as
+refs são resolvidas por um `git cat-file --batch-check` de vida longa e
+relatórios, listas de arquivos e hunks recentes ficam num LRU em memória
+limitado por bytes. Dois transportes, com os mesmos métodos:
+
+- stdio: JSON-RPC 2.0, uma requisição por linha no stdin e uma resposta por
+  linha no stdout;
+- HTTP (`--http PORTA`, só em 127.0.0.1): `POST /rpc` com JSON-RPC, ou
+  `GET /report`, `/files`, `/file`, `/hunk`, `/stats` com parâmetros na
+  query. Requisições com Host diferente de `127.0.0.1`/`localhost` recebem
+  403. O endereço fica em `.code_review/serve.json` enquanto o servidor roda.
+
+Métodos: `report` (texto Markdown e metadados), `files`, `file`, `hunk`,
+`stats` e `ping`. Os relatórios passam pelos caches em disco do `report`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, TextIO
+
+from code_review.checkpoints import checkpoint_tip, load_checkpoints, save_checkpoints, since_checkpoint
+from code_review.diff_parser import iter_file_diffs
+from code_review.files import write_lines_atomic
+from code_review.git_utils import CatFileReader, GitError, git_output, merge_base
+from code_review.jsonl_report import file_record, hunk_record, patch_source
+from code_review.report import (
+    REPORT_DIR_NAME,
+    ReportOptions,
+    ReportRange,
+    build_report,
+    file_patch_cache,
+)
+from code_review.report_cache import MemoryLRU
+
+SERVE_INFO_PATH = Path(".code_review") / "serve.json"
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024
+MAX_MEMORY_ITEMS = 1024
+ALLOWED_HOSTS = ("127.0.0.1", "localhost")
+
+# Códigos de erro do JSON-RPC 2.0
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+
+class ReportService:
+    """Resolve refs, gera relatórios e entrega arquivos/hunks, com LRU em memória."""
+
+    def __init__(
+        self,
+        root: Path,
+        base: str = "main",
+        remote: str = "origin",
+        output_dir: Optional[Path] = None,
+        options: Optional[ReportOptions] = None,
+        max_bytes: int = DEFAULT_MEMORY_BYTES,
+    ):
+        self.root = root
+        self.base = base
+        self.remote = remote
+        self.output_dir = output_dir or root / REPORT_DIR_NAME
+        self.options = options or ReportOptions()
+        self.memory = MemoryLRU(max_entries=MAX_MEMORY_ITEMS, max_bytes=max_bytes)
+        self.file_cache = file_patch_cache(self.output_dir) if self.options.use_cache and self.options.file_cache else None
+        self._reader = CatFileReader(cwd=root, check_only=True)
+        self.methods: dict[str, Callable[..., Any]] = {
+            "report": self.report,
+            "files": self.files,
+            "file": self.file,
+            "hunk": self.hunk,
+            "stats": self.stats,
+            "ping": lambda: "pong",
+        }
+
+    def close(self) -> None:
+        self._reader.close()
+
+    def _commit(self, name: str) -> Optional[str]:
+        info = self._reader.info(f"{name}^{{commit}}")
+        return info[0] if info else None
+
+    def resolve(self, branch: Optional[str] = None, base: Optional[str] = None) -> ReportRange:
+        """Como `resolve_range`, mas pelo cat-file já aberto e com merge-base em memória."""
+        base = base or self.base
+        target = branch or git_output(["rev-parse", "--abbrev-ref", "HEAD"], cwd=self.root)
+        tip_sha = self._commit(target)
+        if tip_sha is None:
+            raise GitError(f"Branch alvo não encontrada: '{target}'.")
+        candidates = [f"{self.remote}/{base}", base] if self.remote else [base]
+        for base_ref in candidates:
+            base_sha = self._commit(base_ref)
+            if base_sha:
+                break
+        else:
+            raise GitError(f"Branch base não encontrada: '{candidates[0]}' nem '{base}'.")
+
+        key = ("merge-base", base_sha, tip_sha)
+        fork_point = self.memory.get(key)
+        if fork_point is None:
+            fork_point = merge_base(base_sha, tip_sha, cwd=self.root)
+            self.memory.put(key, fork_point, len(fork_point))
+        return ReportRange(
+            target=target,
+            base=base,
+            base_ref=base_ref,
+            base_sha=base_sha,
+            tip_sha=tip_sha,
+            merge_base=fork_point,
+        )
+
+    def report(
+        self,
+        branch: Optional[str] = None,
+        base: Optional[str] = None,
+        since_last: bool = False,
+        text: bool = True,
+        checkpoint: Optional[bool] = None,
+    ) -> dict:
+        """
+        Gera (ou reaproveita) o relatório Markdown.
+
+        O checkpoint do `--since-last` é gravado quando o relatório é gerado de
+        fato; acertos do LRU não regravam `.code_review/checkpoints`. Com
+        `checkpoint=True` ele é gravado sempre, e com `False`, nunca.
+        """
+        rng = self.resolve(branch, base)
+        if since_last:
+            checkpoint = checkpoint_tip(load_checkpoints(self.root), rng.target)
+            rng = since_checkpoint(rng, checkpoint, cwd=self.root)
+        key = ("report", rng, self.options)
+        entry = self.memory.get(key)
+        memory = entry is not None
+        if entry is None:
+            result = build_report(rng, cwd=self.root, output_dir=self.output_dir, options=self.options)
+            content = result.path.read_text(encoding="utf-8", errors="surrogateescape")
+            entry = {"path": str(result.path), "cached": result.cached, "text": content}
+            self.memory.put(key, entry, len(content))
+        if (not memory) if checkpoint is None else checkpoint:
+            save_checkpoints(self.root, [rng])
+        response = {
+            "target": rng.target,
+            "base": rng.base_ref,
+            "merge_base": rng.merge_base,
+            "tip": rng.tip_sha,
+            "since": rng.checkpoint,
+            "path": entry["path"],
+            "cached": entry["cached"] or memory,
+        }
+        if text:
+            response["text"] = entry["text"]
+        return response
+
+    def _diff(self, rng: ReportRange) -> dict[str, tuple[dict, list[dict]]]:
+        """Registros `file` e `hunk` de cada arquivo da faixa (em memória, por merge-base e ponta)."""
+        key = ("diff", rng.merge_base, rng.tip_sha, self.options)
+        diff = self.memory.get(key)
+        if diff is not None:
+            return diff
+        diff = {}
+        size = 0
+        for entries, patch in patch_source(rng, self.root, self.options, self.file_cache):
+            by_path = {entry.path: entry for entry in entries}
+            for file_diff in iter_file_diffs(patch):
+                if not file_diff.header[0].startswith("diff "):
+                    continue
+                record = file_record(file_diff, by_path.get(file_diff.path))
+                hunks = [
+                    hunk_record(file_diff.path, number, hunk, self.options.keep_removed)
+                    for number, hunk in enumerate(file_diff.hunks, start=1)
+                ]
+                diff[file_diff.path] = (record, hunks)
+                size += len(record["header"]) + sum(len(hunk["text"]) for hunk in hunks)
+        self.memory.put(key, diff, size)
+        return diff
+
+    def _file(self, branch: Optional[str], path: str, base: Optional[str]) -> tuple[dict, list[dict]]:
+        rng = self.resolve(branch, base)
+        try:
+            return self._diff(rng)[path]
+        except KeyError:
+            raise ValueError(f"'{path}' não está no diff de '{rng.target}'.") from None
+
+    def files(self, branch: Optional[str] = None, base: Optional[str] = None) -> list[dict]:
+        """Arquivos alterados, com status, hunks e linhas adicionadas/removidas."""
+        return [
+            {
+                "path": record["path"],
+                "old_path": record["old_path"],
+                "status": record["status"],
+                "hunks": record["hunks"],
+                "added": sum(hunk["added"] for hunk in hunks),
+                "removed": sum(hunk["removed"] for hunk in hunks),
+            }
+            for record, hunks in self._diff(self.resolve(branch, base)).values()
+        ]
+
+    def file(self, path: str, branch: Optional[str] = None, base: Optional[str] = None) -> dict:
+        record, hunks = self._file(branch, path, base)
+        return {**record, "text": record["header"] + "".join(hunk["text"] for hunk in hunks)}
+
+    def hunk(self, path: str, n: int, branch: Optional[str] = None, base: Optional[str] = None) -> dict:
+        _, hunks = self._file(branch, path, base)
+        if not 1 <= n <= len(hunks):
+            raise ValueError(f"'{path}' tem {len(hunks)} hunk(s).")
+        return hunks[n - 1]
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.memory),
+            "bytes": self.memory.bytes,
+            "max_bytes": self.memory.max_bytes,
+            "hits": self.memory.hits,
+            "misses": self.memory.misses,
+        }
+
+    def call(self, method: str, params: Any) -> Any:
+        handler = self.methods[method]
+        if isinstance(params, list):
+            return handler(*params)
+        return handler(**(params or {}))
+
+
+def _rpc_error(request_id: Any, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def handle_rpc(service: ReportService, payload: str) -> Optional[dict]:
+    """Processa uma requisição JSON-RPC; notificações (sem `id`) não têm resposta."""
+    try:
+        request = json.loads(payload)
+    except ValueError:
+        return _rpc_error(None, PARSE_ERROR, "JSON inválido.")
+    if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+        return _rpc_error(None, INVALID_REQUEST, "Requisição inválida.")
+    request_id = request.get("id")
+    method = request["method"]
+    if method not in service.methods:
+        return _rpc_error(request_id, METHOD_NOT_FOUND, f"Método desconhecido: {method}")
+    try:
+        result = service.call(method, request.get("params"))
+    except TypeError as e:
+        response = _rpc_error(request_id, INVALID_PARAMS, str(e))
+    except (GitError, ValueError, OSError) as e:
+        response = _rpc_error(request_id, SERVER_ERROR, str(e))
+    else:
+        response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+    return response if "id" in request else None
+
+
+def serve_stdio(service: ReportService, stdin: TextIO = sys.stdin, stdout: TextIO = sys.stdout) -> None:
+    """Uma requisição JSON-RPC por linha até o fim do stdin."""
+    for line in stdin:
+        if not line.strip():
+            continue
+        response = handle_rpc(service, line)
+        if response is not None:
+            stdout.write(json.dumps(response) + "\n")
+            stdout.flush()
+
+
+def _flag(value: Optional[str]) -> bool:
+    return value is not None and value.lower() in ("1", "true", "yes", "sim")
+
+
+def _flag_or_none(value: Optional[str]) -> Optional[bool]:
+    return None if value is None else _flag(value)
+
+
+def allowed_host(host: Optional[str]) -> bool:
+    """
+    Só `127.0.0.1` e `localhost` (com ou sem porta): uma página que aponte o
+    próprio domínio para 127.0.0.1 (DNS rebinding) manda o domínio dela no Host.
+    """
+    if not host:
+        return False
+    name = host.strip().lower()
+    name = name.rpartition(":")[0] or name
+    return name in ALLOWED_HOSTS
+
+
+def make_http_server(service: ReportService, port: int = 0):
+    """`ThreadingHTTPServer` em 127.0.0.1 com `POST /rpc` e os atalhos `GET`."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlsplit
+
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "review-cli"
+
+        def log_message(self, format: str, *args) -> None:
+            pass  # uma linha por chamada de ferramenta só atrapalharia
+
+        def _send(self, status: int, body: str, content_type: str) -> None:
+            data = body.encode("utf-8", "surrogateescape")
+            self.send_response(status)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_json(self, status: int, value: Any) -> None:
+            self._send(status, json.dumps(value), "application/json")
+
+        def _check_host(self) -> bool:
+            if allowed_host(self.headers.get("Host")):
+                return True
+            self._send(403, "Host não permitido: use 127.0.0.1 ou localhost.\n", "text/plain")
+            return False
+
+        def do_POST(self) -> None:
+            if not self._check_host():
+                return
+            if urlsplit(self.path).path != "/rpc":
+                self._send(404, "Use POST /rpc.\n", "text/plain")
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = self.rfile.read(length).decode("utf-8", "surrogateescape")
+            response = handle_rpc(service, payload)
+            if response is None:
+                self.send_response(204)
+                self.end_headers()
+            else:
+                self._send_json(200, response)
+
+        def do_GET(self) -> None:
+            if not self._check_host():
+                return
+            url = urlsplit(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            as_json = query.get("format") == "json"
+            branch, base = query.get("branch"), query.get("base")
+            try:
+                if url.path == "/report":
+                    result = service.report(
+                        branch,
+                        base,
+                        since_last=_flag(query.get("since_last")),
+                        checkpoint=_flag_or_none(query.get("checkpoint")),
+                    )
+                    if as_json:
+                        self._send_json(200, result)
+                    else:
+                        self._send(200, result["text"], "text/markdown")
+                elif url.path == "/files":
+                    self._send_json(200, service.files(branch, base))
+                elif url.path in ("/file", "/hunk"):
+                    if url.path == "/file":
+                        result = service.file(query["path"], branch, base)
+                    else:
+                        result = service.hunk(query["path"], int(query.get("n", "1")), branch, base)
+                    if as_json:
+                        self._send_json(200, result)
+                    else:
+                        self._send(200, result["text"], "text/x-diff")
+                elif url.path == "/stats":
+                    self._send_json(200, service.stats())
+                elif url.path == "/ping":
+                    self._send(200, "pong\n", "text/plain")
+                else:
+                    self._send(404, "Rotas: /report /files /file /hunk /stats /ping e POST /rpc\n", "text/plain")
+            except KeyError as e:
+                self._send(400, f"Parâmetro obrigatório ausente: {e}\n", "text/plain")
+            except (GitError, ValueError, OSError) as e:
+                self._send(404 if isinstance(e, ValueError) else 500, f"{e}\n", "text/plain")
+
+    return ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+
+def write_serve_info(root: Path, url: str) -> Path:
+    """Grava `.code_review/serve.json` para que prompts e scripts achem o servidor."""
+    path = root / SERVE_INFO_PATH
+    info = {"url": url, "pid": os.getpid(), "started": round(time.time(), 3)}
+    write_lines_atomic([json.dumps(info, indent=2), "\n"], path)
+    return path
+
+
+def remove_serve_info(root: Path) -> None:
+    path = root / SERVE_INFO_PATH
+    try:
+        info = json.loads(path.read_text(encoding="utf-8"))
+        if info.get("pid") == os.getpid():
+            path.unlink()
+    except (OSError, ValueError):
+        pass
@@ -0,0 +1,223 @@
+"""
+Divisão do relatório em partes que cabem em um orçamento de bytes/tokens.
+
+O relatório principal vira um índice (cabeçalho, arquivos, commits e lista de
+partes) e o diff é distribuído em `relatorio_diff_<branch>.part-NNN.md`,
+sempre quebrando em fronteiras de arquivo ou de hunk. Um manifesto JSON
+descreve cada parte para que o agente carregue apenas o que precisa.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from code_review.diff_parser import FileDiff, iter_file_diffs
+from code_review.files import write_lines_atomic
+
+# Estimativa usual de ~4 bytes por token para código/diff
+BYTES_PER_TOKEN = 4
+DIFF_FENCE = "```diff\n"
+FENCE_END = "```\n"
+
+
+def tokens_to_bytes(tokens: int) -> int:
+    return tokens * BYTES_PER_TOKEN
+
+
+def _size(lines: Iterable[str]) -> int:
+    return sum(len(line.encode("utf-8", "surrogateescape")) for line in lines)
+
+
+@dataclass
+class Shard:
+    index: int
+    lines: list[str] = field(default_factory=list)
+    size: int = 0
+    files: dict[str, int] = field(default_factory=dict)
+
+    def add(self, path: str, lines: list[str], size: int, hunks: int) -> None:
+        self.lines.extend(lines)
+        self.size += size
+        self.files[path] = self.files.get(path, 0) + hunks
+
+
+@dataclass
+class FileEntry:
+    path: str
+    hunks: int
+    bytes: int
+    shards: list[int] = field(default_factory=list)
+
+
+def split_report_stream(lines: Iterable[str]) -> tuple[list[str], Iterator[str], list[str]]:
+    """
+    Separa o relatório Markdown em (preâmbulo, linhas do patch, epílogo).
+    O patch é consumido sob demanda; o epílogo só fica completo após esgotá-lo.
+    """
+    it = iter(lines)
+    preamble: list[str] = []
+    for line in it:
+        if line == DIFF_FENCE:
+            break
+        preamble.append(line)
+
+    epilogue: list[str] = []
+
+    def patch() -> Iterator[str]:
+        for line in it:
+            if line == FENCE_END:
+                break
+            yield line
+        epilogue.extend(it)
+
+    return preamble, patch(), epilogue
+
+
+def _chunks_for_file(file_diff: FileDiff, budget: int) -> Iterator[tuple[list[str], int, int]]:
+    """
+    Quebra um arquivo maior que o orçamento em blocos de hunks consecutivos,
+    repetindo o cabeçalho em cada bloco para que cada parte seja um patch válido.
+    Um hunk sozinho maior que o orçamento vira um bloco próprio.
+    """
+    header_size = _size(file_diff.header)
+    chunk: list[str] = list(file_diff.header)
+    chunk_size = header_size
+    chunk_hunks = 0
+    for hunk in file_diff.hunks:
+        hunk_size = _size(hunk)
+        if chunk_hunks and chunk_size + hunk_size > budget:
+            yield chunk, chunk_size, chunk_hunks
+            chunk = list(file_diff.header)
+            chunk_size = header_size
+            chunk_hunks = 0
+        chunk.extend(hunk)
+        chunk_size += hunk_size
+        chunk_hunks += 1
+    if chunk_hunks or not file_diff.hunks:
+        yield chunk, chunk_size, chunk_hunks
+
+
+def iter_shards(patch_lines: Iterable[str], budget: int, files: dict[str, FileEntry]) -> Iterator[Shard]:
+    """Agrupa o patch em partes de até `budget` bytes (exceto hunks gigantes)."""
+    shard = Shard(index=1)
+    for file_diff in iter_file_diffs(patch_lines):
+        if not file_diff.header[0].startswith("diff "):
+            # Marcadores como "# Nenhum diff gerado" não pertencem a nenhum arquivo
+            continue
+        path = file_diff.path
+        size = file_diff.byte_size()
+        entry = files.setdefault(path, FileEntry(path=path, hunks=0, bytes=0))
+        entry.hunks += len(file_diff.hunks)
+        entry.bytes += size
+
+        if size <= budget:
+            pieces = [(list(file_diff.lines), size, len(file_diff.hunks))]
+        else:
+            pieces = list(_chunks_for_file(file_diff, budget))
+
+        for lines, piece_size, hunks in pieces:
+            if shard.lines and shard.size + piece_size > budget:
+                yield shard
+                shard = Shard(index=shard.index + 1)
+            shard.add(path, lines, piece_size, hunks)
+            if shard.index not in entry.shards:
+                entry.shards.append(shard.index)
+    if shard.lines:
+        yield shard
+
+
+def shard_filename(branch_file: str, index: int) -> str:
+    stem = branch_file[: -len(".md")] if branch_file.endswith(".md") else branch_file
+    return f"{stem}.part-{index:03d}.md"
+
+
+def manifest_filename(branch_file: str) -> str:
+    stem = branch_file[: -len(".md")] if branch_file.endswith(".md") else branch_file
+    return f"{stem}.manifest.json"
+
+
+def _remove_stale_parts(path: Path) -> None:
+    stem = path.name[: -len(".md")]
+    for old in path.parent.glob(f"{stem}.part-*.md"):
+        old.unlink()
+
+
+def remove_shard_files(path: Path) -> None:
+    """Remove partes e manifesto de uma execução anterior em modo dividido."""
+    _remove_stale_parts(path)
+    path.with_name(manifest_filename(path.name)).unlink(missing_ok=True)
+
+
+def write_sharded_report(
+    lines: Iterable[str],
+    path: Path,
+    budget_bytes: int,
+    title: str,
+    meta: Optional[dict] = None,
+) -> Path:
+    """
+    Grava o relatório em partes. `path` recebe o índice; as partes e o
+    manifesto ficam ao lado. Retorna o caminho do manifesto.
+    """
+    if not path.name.endswith(".md"):
+        raise ValueError(f"Nome de relatório inesperado: {path.name}")
+
+    preamble, patch_lines, epilogue = split_report_stream(lines)
+    files: dict[str, FileEntry] = {}
+    shards_meta = []
+
+    def shard_frame(index: int) -> list[str]:
+        return [f"# {title} (parte {index})\n", "\n", DIFF_FENCE]
+
+    # Desconta o cabeçalho/cercas de cada parte do orçamento do patch
+    overhead = _size(shard_frame(999)) + len(FENCE_END)
+    patch_budget = max(budget_bytes - overhead, 1)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _remove_stale_parts(path)
+    for shard in iter_shards(patch_lines, patch_budget, files):
+        shard_path = path.with_name(shard_filename(path.name, shard.index))
+        shard_lines = [*shard_frame(shard.index), *shard.lines, FENCE_END]
+        size = write_lines_atomic(shard_lines, shard_path)
+        shards_meta.append({
+            "index": shard.index,
+            "file": shard_path.name,
+            "bytes": size,
+            "approx_tokens": size // BYTES_PER_TOKEN,
+            "files": [{"path": p, "hunks": h} for p, h in shard.files.items()],
+        })
+
+    index_lines = list(preamble)
+    if shards_meta:
+        index_lines.append(
+            f"O diff foi dividido em {len(shards_meta)} parte(s) de até {budget_bytes} bytes. "
+            f"Consulte `{manifest_filename(path.name)}` para localizar cada arquivo.\n"
+        )
+        index_lines.append("\n")
+        index_lines.append("| Parte | Arquivo | Tamanho | Arquivos alterados |\n")
+        index_lines.append("| :--- | :--- | ---: | :--- |\n")
+        for item in shards_meta:
+            names = ", ".join(f"`{f['path']}`" for f in item["files"])
+            index_lines.append(f"| {item['index']} | {item['file']} | {item['bytes']} B | {names} |\n")
+    else:
+        index_lines.append("- Nenhum diff gerado\n")
+    index_lines.append("\n")
+    index_lines.extend(epilogue)
+    write_lines_atomic(index_lines, path)
+
+    manifest_path = path.with_name(manifest_filename(path.name))
+    manifest = {
+        **(meta or {}),
+        "report": path.name,
+        "budget_bytes": budget_bytes,
+        "shards": shards_meta,
+        "files": [
+            {"path": e.path, "hunks": e.hunks, "bytes": e.bytes, "shards": e.shards}
+            for e in files.values()
+        ],
+    }
+    write_lines_atomic([json.dumps(manifest, ensure_ascii=False, indent=2), "\n"], manifest_path)
+    return manifest_path
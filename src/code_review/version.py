@@ -0,0 +1,15 @@
+"""
+Versão do review-cli.
+
+Fonte única da versão: o `pyproject.toml` lê este arquivo (hatch), então a
+CLI não precisa consultar `importlib.metadata` em tempo de execução.
+"""
+
+from __future__ import annotations
+
+__version__ = "0.1.2"
+
+
+def get_app_version() -> str:
+    """Versão do review-cli (constante, sem custo de importação)."""
+    return __version__
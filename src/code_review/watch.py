@@ -0,0 +1,308 @@
+"""
+Pré-geração de relatórios quando as refs mudam (`review-cli watch`).
+
+Observa `refs/heads`, `refs/remotes/<remoto>`, `packed-refs` e `FETCH_HEAD`
+(inotify via ctypes no Linux; nos demais sistemas, comparação periódica de
+`stat`). Depois de um intervalo sem eventos (debounce), um único
+`git for-each-ref` diz o que mudou: a branch que andou é regenerada, e se a
+base andou todas as branches observadas são. Os relatórios rodam em segundo
+plano com limite de concorrência e passam pelos caches normais, então o
+`review-cli report` seguinte só publica o que já está pronto. Nada aqui usa a
+rede: com `fetch` o FETCH_HEAD e as refs remotas mudam, sem ele só as locais.
+"""
+
+from __future__ import annotations
+
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+from code_review.git_utils import git_output
+
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_POLL_INTERVAL = 1.0
+# Arquivos da pasta do git que interessam; o resto (index, logs...) é ignorado
+WATCHED_FILES = ("packed-refs", "FETCH_HEAD")
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def git_dirs(root: Path) -> tuple[Path, Path]:
+    """(pasta do git, pasta comum): em worktrees as refs ficam na comum."""
+    git_dir, common_dir = git_output(["rev-parse", "--git-dir", "--git-common-dir"], cwd=root).splitlines()
+    return (root / git_dir).resolve(), (root / common_dir).resolve()
+
+
+def ref_dirs(common_dir: Path, remote: str) -> list[Path]:
+    """Pastas das refs observadas (`refs/heads` e `refs/remotes/<remoto>`, com subpastas)."""
+    trees = [common_dir / "refs" / "heads"]
+    if remote:
+        trees.append(common_dir / "refs" / "remotes" / remote)
+    return [Path(current) for tree in trees for current, _, _ in os.walk(tree)]
+
+
+class PollingWatcher:
+    """Compara `stat` das refs a cada `interval` segundos."""
+
+    def __init__(self, git_dir: Path, common_dir: Path, remote: str, interval: float = DEFAULT_POLL_INTERVAL):
+        self.git_dir = git_dir
+        self.common_dir = common_dir
+        self.remote = remote
+        self.interval = interval
+        self._signature = self._scan()
+
+    def _scan(self) -> frozenset:
+        files = [self.git_dir / name for name in WATCHED_FILES]
+        files.append(self.common_dir / "packed-refs")
+        for directory in ref_dirs(self.common_dir, self.remote):
+            try:
+                with os.scandir(directory) as it:
+                    files.extend(Path(entry.path) for entry in it if entry.is_file(follow_symlinks=False))
+            except FileNotFoundError:
+                continue
+        signature = set()
+        for path in files:
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            signature.add((str(path), st.st_mtime_ns, st.st_size))
+        return frozenset(signature)
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """True se algo mudou em até `timeout` segundos (None = espera indefinida)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            time.sleep(self.interval if remaining is None else min(self.interval, remaining))
+            signature = self._scan()
+            if signature != self._signature:
+                self._signature = signature
+                return True
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """inotify via ctypes: acorda só quando uma ref é escrita ou renomeada."""
+
+    def __init__(self, git_dir: Path, common_dir: Path, remote: str):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.git_dir = git_dir
+        self.common_dir = common_dir
+        self.remote = remote
+        self.fd = self._libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        self._roots = {git_dir, common_dir}
+        # Só para descobrir pastas novas (ex.: `refs/remotes/<remoto>` no primeiro fetch)
+        self._parents = {common_dir / "refs", common_dir / "refs" / "remotes"}
+        self._watches: dict[int, Path] = {}
+        self._add_watches()
+
+    def _add_watches(self) -> None:
+        watched = set(self._watches.values())
+        for directory in [*self._roots, *self._parents, *ref_dirs(self.common_dir, self.remote)]:
+            if directory in watched or not directory.is_dir():
+                continue
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_MASK)
+            if wd >= 0:
+                self._watches[wd] = directory
+                watched.add(directory)
+
+    def _relevant(self, wd: int, name: str) -> bool:
+        directory = self._watches.get(wd)
+        if directory is None or directory in self._parents:
+            return False
+        if directory in self._roots:
+            # Na pasta do git o resto (index, logs, HEAD...) não interessa
+            return name in WATCHED_FILES
+        # Escrita de ref: `<nome>.lock` seguido de rename para `<nome>`
+        return not name.endswith(".lock")
+
+    def _drain(self) -> bool:
+        relevant = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+                offset += length
+                if mask & IN_IGNORED:
+                    # Pasta removida (ex.: última branch `feature/...` apagada)
+                    self._watches.pop(wd, None)
+                    continue
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    # Nova subpasta de refs (ex.: primeira branch `feature/...`)
+                    self._add_watches()
+                relevant = self._relevant(wd, name) or relevant
+        return relevant
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """True se uma ref relevante mudou em até `timeout` segundos (None = espera indefinida)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return False
+            if self._drain():
+                return True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def make_watcher(
+    git_dir: Path,
+    common_dir: Path,
+    remote: str,
+    polling: bool = False,
+    interval: float = DEFAULT_POLL_INTERVAL,
+) -> "InotifyWatcher | PollingWatcher":
+    """inotify quando disponível (Linux); caso contrário, polling."""
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(git_dir, common_dir, remote)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(git_dir, common_dir, remote, interval=interval)
+
+
+def snapshot_refs(root: Path, pattern: str, base: str, remote: str) -> tuple[dict[str, str], Optional[str]]:
+    """
+    SHAs das branches observadas e da base (remota se existir, senão local)
+    com um único `git for-each-ref`.
+    """
+    # `refs/heads` sem glob casa todas as branches (inclusive `feature/...`)
+    ref_pattern = "refs/heads" if pattern in ("", "*") else f"refs/heads/{pattern}"
+    base_refs = [f"refs/remotes/{remote}/{base}"] if remote else []
+    base_refs.append(f"refs/heads/{base}")
+    output = git_output(
+        ["for-each-ref", "--format=%(objectname) %(refname)", ref_pattern, *base_refs],
+        cwd=root,
+    )
+    refs = {}
+    for line in output.splitlines():
+        sha, _, ref = line.partition(" ")
+        refs[ref] = sha
+    base_sha = next((refs[ref] for ref in base_refs if ref in refs), None)
+    branches = {
+        ref[len("refs/heads/"):]: sha
+        for ref, sha in refs.items()
+        if ref.startswith("refs/heads/") and ref not in base_refs
+    }
+    return branches, base_sha
+
+
+def changed_branches(
+    before: tuple[dict[str, str], Optional[str]],
+    after: tuple[dict[str, str], Optional[str]],
+) -> list[str]:
+    """Branches novas ou que andaram; todas, se a base andou."""
+    old_branches, old_base = before
+    new_branches, new_base = after
+    if new_base != old_base:
+        return list(new_branches)
+    return [name for name, sha in new_branches.items() if old_branches.get(name) != sha]
+
+
+class ReportScheduler:
+    """
+    Executa `build(branch)` em até `jobs` threads. Um pedido para uma branch
+    que já está gerando não abre outra execução: marca a branch como suja e
+    ela roda de novo ao terminar (só o estado mais recente importa).
+    """
+
+    def __init__(self, build: Callable[[str], None], jobs: int = 2):
+        self._build = build
+        self._pool = ThreadPoolExecutor(max_workers=max(jobs, 1))
+        self._lock = threading.Lock()
+        self._running: set[str] = set()
+        self._dirty: set[str] = set()
+
+    def request(self, branch: str) -> None:
+        with self._lock:
+            if branch in self._running:
+                self._dirty.add(branch)
+                return
+            self._running.add(branch)
+        self._pool.submit(self._run, branch)
+
+    def _run(self, branch: str) -> None:
+        while True:
+            self._build(branch)
+            with self._lock:
+                if branch not in self._dirty:
+                    self._running.discard(branch)
+                    return
+                self._dirty.discard(branch)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def watch_refs(
+    root: Path,
+    on_change: Callable[[list[str]], None],
+    pattern: str = "*",
+    base: str = "main",
+    remote: str = "origin",
+    debounce: float = DEFAULT_DEBOUNCE,
+    polling: bool = False,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    initial: bool = False,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """
+    Laço principal: espera uma mudança, aguarda `debounce` segundos de
+    silêncio e entrega a `on_change` as branches afetadas. Termina quando
+    `stop` é sinalizado (ou com KeyboardInterrupt).
+    """
+    git_dir, common_dir = git_dirs(root)
+    watcher = make_watcher(git_dir, common_dir, remote, polling=polling, interval=poll_interval)
+    state = snapshot_refs(root, pattern, base, remote)
+    if initial and state[0]:
+        on_change(list(state[0]))
+    try:
+        while stop is None or not stop.is_set():
+            if not watcher.wait(1.0 if stop is not None else None):
+                continue
+            # Debounce: um `fetch` ou `rebase` mexe em várias refs em sequência
+            while watcher.wait(debounce):
+                pass
+            new_state = snapshot_refs(root, pattern, base, remote)
+            branches = changed_branches(state, new_state)
+            state = new_state
+            if branches:
+                on_change(branches)
+    finally:
+        watcher.close()
@@ -0,0 +1,55 @@
+"""
+Fixtures compartilhadas: um repositório git de rascunho por teste.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+
+class ScratchRepo:
+    """Repositório git temporário com atalhos para gravar arquivos e commitar."""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def git(self, *args: str) -> str:
+        env = {
+            **os.environ,
+            "GIT_AUTHOR_NAME": "Teste",
+            "GIT_AUTHOR_EMAIL": "teste@example.com",
+            "GIT_COMMITTER_NAME": "Teste",
+            "GIT_COMMITTER_EMAIL": "teste@example.com",
+            "GIT_CONFIG_GLOBAL": os.devnull,
+            "GIT_CONFIG_NOSYSTEM": "1",
+        }
+        result = subprocess.run(
+            ["git", *args], cwd=self.root, env=env, capture_output=True, text=True, check=True
+        )
+        return result.stdout
+
+    def write(self, rel_path: str, content: str) -> None:
+        path = self.root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+    def commit(self, message: str, files: dict[str, str] | None = None) -> str:
+        for rel_path, content in (files or {}).items():
+            self.write(rel_path, content)
+        self.git("add", "-A")
+        self.git("commit", "-q", "-m", message)
+        return self.git("rev-parse", "HEAD").strip()
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> ScratchRepo:
+    """Repositório com um commit inicial em `main`."""
+    scratch = ScratchRepo(tmp_path / "repo")
+    scratch.root.mkdir()
+    scratch.git("init", "-q", "-b", "main")
+    scratch.commit("inicial", {"README.txt": "projeto\n"})
+    return scratch
@@ -0,0 +1,157 @@
+import gzip
+import os
+import time
+
+import pytest
+
+from code_review.archive import STALE_TEMP_SECONDS, ReportArchive, RetentionPolicy, report_of
+
+NOW = 1_800_000_000.0
+DAY = 86400
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = ReportArchive(tmp_path / "diffs")
+    archive.root.mkdir(parents=True)
+    return archive
+
+
+def _version(archive, report, age_days, size=100):
+    """Versão arquivada de `report` com `age_days` de idade (mtime relativo a NOW)."""
+    # O sufixo `-N` é o mesmo das versões gravadas no mesmo segundo
+    path = archive.root / f"{report}.20260101T000000Z-{age_days}.md.gz"
+    path.write_bytes(b"x" * size)
+    mtime = NOW - age_days * DAY
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def _names(paths):
+    return sorted(path.name for path in paths)
+
+
+def test_report_of():
+    assert report_of("relatorio_diff_feat.20260101T000000Z.md.gz") == "relatorio_diff_feat.md"
+    assert report_of("relatorio_diff_feat.20260101T000000Z-1.md.zst") == "relatorio_diff_feat.md"
+    assert report_of("relatorio_diff_feat.md") is None
+    assert report_of("notas.txt.gz") is None
+
+
+def test_retention_by_age(archive):
+    recent = _version(archive, "relatorio_diff_a", 1)
+    month = _version(archive, "relatorio_diff_a", 29)
+    old = _version(archive, "relatorio_diff_a", 31)
+    policy = RetentionPolicy(max_age_days=30, max_versions=None, max_bytes=None)
+
+    result = archive.collect(policy, dry_run=True, now=NOW)
+
+    assert result.removed == [old]
+    assert (result.kept, result.kept_bytes, result.freed_bytes) == (2, 200, 100)
+    # dry_run só informa
+    assert old.exists()
+    assert archive.collect(policy, now=NOW).removed == [old]
+    assert not old.exists() and recent.exists() and month.exists()
+
+
+def test_retention_by_versions_per_branch(archive):
+    feat = [_version(archive, "relatorio_diff_feat", age) for age in (1, 2, 3, 4)]
+    other = [_version(archive, "relatorio_diff_outra", age) for age in (5, 6)]
+    policy = RetentionPolicy(max_age_days=None, max_versions=2, max_bytes=None)
+
+    result = archive.collect(policy, dry_run=True, now=NOW)
+
+    assert _names(result.removed) == _names(feat[2:])
+    assert result.kept == 4
+    assert all(path.exists() for path in [*feat, *other])
+
+
+def test_retention_by_total_bytes_keeps_the_newest(archive):
+    newest = _version(archive, "relatorio_diff_a", 1, size=100)
+    middle = _version(archive, "relatorio_diff_b", 2, size=100)
+    oldest = _version(archive, "relatorio_diff_a", 3, size=100)
+    policy = RetentionPolicy(max_age_days=None, max_versions=None, max_bytes=250)
+
+    result = archive.collect(policy, dry_run=True, now=NOW)
+
+    assert result.removed == [oldest]
+    assert result.kept_bytes == 200
+    assert newest.exists() and middle.exists()
+
+
+def test_unrelated_files_are_ignored(archive):
+    notes = archive.root / "LEIA-ME.txt"
+    notes.write_text("notas\n", encoding="utf-8")
+    os.utime(notes, (0, 0))
+
+    result = archive.collect(RetentionPolicy(max_age_days=1), now=NOW)
+
+    assert result.removed == [] and notes.exists()
+
+
+def test_stale_temp_files(archive):
+    fresh = archive.root / ".relatorio_diff_a.md.1.2.tmp"
+    stale = archive.root / ".relatorio_diff_b.md.1.2.tmp"
+    for path in (fresh, stale):
+        path.write_bytes(b"tmp")
+    # Hard link recém-criado de um relatório antigo: mtime velho, ctime novo
+    os.utime(fresh, (0, 0))
+
+    now = time.time()
+    assert archive.collect(now=now).removed == []
+    later = now + STALE_TEMP_SECONDS + 60
+    assert _names(archive.collect(dry_run=True, now=later).removed) == _names([fresh, stale])
+    archive.collect(now=later)
+    assert not fresh.exists() and not stale.exists()
+
+
+REPORT = "# Relatório\n**Gerado em:** {stamp}\n\n```diff\n+{body}\n```\n"
+
+
+def _write_report(path, stamp, body, mtime=None):
+    path.write_text(REPORT.format(stamp=stamp, body=body), encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_store_skips_stamp_only_changes(tmp_path):
+    archive = ReportArchive(tmp_path / "diffs")
+    report = tmp_path / "diffs" / "relatorio_diff_feat.md"
+    report.parent.mkdir()
+    _write_report(report, "2026-01-01 10:00:00", "x = 1")
+
+    held = archive.stash(report)
+    report.unlink()
+    _write_report(report, "2026-01-02 11:30:00", "x = 1")
+
+    assert archive.store(held, report) is None
+    assert not held.exists()
+    assert list(archive.root.iterdir()) == []
+
+
+def _decompress(path):
+    if path.suffix == ".zst":
+        from compression import zstd
+
+        return zstd.decompress(path.read_bytes())
+    return gzip.decompress(path.read_bytes())
+
+
+def test_store_archives_changed_reports(tmp_path):
+    archive = ReportArchive(tmp_path / "diffs")
+    report = tmp_path / "diffs" / "relatorio_diff_feat.md"
+    report.parent.mkdir()
+    yesterday = int(time.time()) - DAY
+    _write_report(report, "2026-01-01 10:00:00", "x = 1", mtime=yesterday)
+    previous = report.read_bytes()
+
+    held = archive.stash(report)
+    report.unlink()
+    _write_report(report, "2026-01-02 11:30:00", "x = 2")
+    stored = archive.store(held, report)
+
+    assert stored is not None and not held.exists()
+    assert report_of(stored.name) == report.name
+    # A versão guarda o mtime do relatório original
+    assert stored.stat().st_mtime == yesterday
+    assert _decompress(stored) == previous
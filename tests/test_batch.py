@@ -0,0 +1,114 @@
+import sys
+
+import pytest
+
+from code_review.batch import plan_branches
+from code_review.git_utils import GitError
+
+
+@pytest.fixture
+def fallbacks(monkeypatch):
+    """Registra as chamadas ao `git merge-base` de reserva."""
+    batch = sys.modules["code_review.batch"]
+    calls = []
+    original = batch.merge_base
+
+    def spy(a, b, cwd=None):
+        calls.append(b)
+        return original(a, b, cwd=cwd)
+
+    monkeypatch.setattr(batch, "merge_base", spy)
+    return calls
+
+
+def _plans(repo, *branches):
+    plans, errors = plan_branches(branches, base="main", remote="", cwd=repo.root)
+    return {plan.range.target: plan for plan in plans}, errors
+
+
+def _merge(repo, ref, message):
+    repo.git("merge", "-q", "--no-ff", "-m", message, ref)
+    return repo.git("rev-parse", "HEAD").strip()
+
+
+def test_fork_point_from_the_single_walk(repo, fallbacks):
+    fork = repo.git("rev-parse", "HEAD").strip()
+    repo.git("checkout", "-q", "-b", "feat")
+    repo.commit("um", {"a.txt": "1\n"})
+    repo.commit("dois", {"a.txt": "2\n"})
+    repo.git("checkout", "-q", "main")
+    repo.commit("base anda", {"b.txt": "b\n"})
+
+    plans, errors = _plans(repo, "feat")
+
+    assert errors == {}
+    assert plans["feat"].range.merge_base == fork == repo.git("merge-base", "main", "feat").strip()
+    assert [line.split(" ", 1)[1] for line in plans["feat"].commit_lines] == ["dois", "um"]
+    assert fallbacks == []
+
+
+def test_base_merged_into_branch_uses_the_latest_fork_point(repo):
+    repo.git("checkout", "-q", "-b", "feat")
+    repo.commit("um", {"a.txt": "1\n"})
+    repo.git("checkout", "-q", "main")
+    repo.commit("base anda", {"b.txt": "b\n"})
+    repo.git("checkout", "-q", "feat")
+    _merge(repo, "main", "atualiza com main")
+
+    plans, _ = _plans(repo, "feat")
+
+    assert plans["feat"].range.merge_base == repo.git("merge-base", "main", "feat").strip()
+    # Commits de merge ficam fora do histórico
+    assert [line.split(" ", 1)[1] for line in plans["feat"].commit_lines] == ["um"]
+
+
+def test_criss_cross_falls_back_to_git_merge_base(repo, fallbacks):
+    repo.git("checkout", "-q", "-b", "feat")
+    f1 = repo.commit("f1", {"f.txt": "f\n"})
+    repo.git("checkout", "-q", "main")
+    m1 = repo.commit("m1", {"m.txt": "m\n"})
+    _merge(repo, f1, "main recebe f1")
+    repo.git("checkout", "-q", "feat")
+    tip = _merge(repo, m1, "feat recebe m1")
+    assert set(repo.git("merge-base", "--all", "main", "feat").split()) == {f1, m1}
+
+    plans, errors = _plans(repo, "feat")
+
+    assert errors == {}
+    assert plans["feat"].range.merge_base == repo.git("merge-base", "main", "feat").strip()
+    assert fallbacks == [tip]
+
+
+def test_already_merged_branch_has_no_commits(repo, fallbacks):
+    repo.git("checkout", "-q", "-b", "feat")
+    tip = repo.commit("um", {"a.txt": "1\n"})
+    repo.git("checkout", "-q", "main")
+    _merge(repo, "feat", "integra feat")
+
+    plans, errors = _plans(repo, "feat")
+
+    assert errors == {}
+    assert plans["feat"].range.merge_base == tip
+    assert plans["feat"].commit_lines == []
+    assert fallbacks == []
+
+
+def test_missing_and_unrelated_branches(repo, fallbacks):
+    repo.git("checkout", "-q", "--orphan", "solta")
+    repo.git("rm", "-q", "-rf", ".")
+    tip = repo.commit("sem relação", {"x.txt": "x\n"})
+    repo.git("checkout", "-q", "main")
+
+    plans, errors = _plans(repo, "nao-existe", "solta", "main")
+
+    assert list(plans) == ["main"]
+    assert errors == {
+        "nao-existe": "Branch alvo não encontrada: 'nao-existe'.",
+        "solta": "Sem merge-base entre 'main' e 'solta'.",
+    }
+    assert fallbacks == [tip]
+
+
+def test_missing_base(repo):
+    with pytest.raises(GitError):
+        plan_branches(["main"], base="develop", remote="origin", cwd=repo.root)
@@ -0,0 +1,50 @@
+from code_review.checkpoints import checkpoint_tip, load_checkpoints, save_checkpoints, since_checkpoint
+from code_review.report import resolve_range
+
+
+def _feature(repo):
+    repo.git("checkout", "-q", "-b", "feat")
+    return repo.commit("primeira revisão", {"a.py": "a = 1\n"})
+
+
+def test_since_checkpoint_narrows_to_new_commits(repo):
+    reviewed = _feature(repo)
+    repo.commit("depois da revisão", {"b.py": "b = 1\n"})
+    rng = resolve_range("feat", "main", remote="", cwd=repo.root)
+
+    delta = since_checkpoint(rng, reviewed, cwd=repo.root)
+
+    assert delta.checkpoint == reviewed
+    assert delta.base_sha == delta.merge_base == reviewed
+    assert delta.tip_sha == rng.tip_sha
+    assert repo.git("diff", "--name-only", f"{delta.base_sha}..{delta.tip_sha}").split() == ["b.py"]
+
+
+def test_since_checkpoint_falls_back_after_rewrite(repo):
+    reviewed = _feature(repo)
+    # Rebase/force-push: a ponta revisada deixa de ser ancestral da nova ponta
+    repo.git("reset", "-q", "--hard", "main")
+    repo.commit("reescrita", {"a.py": "a = 2\n"})
+    rng = resolve_range("feat", "main", remote="", cwd=repo.root)
+
+    assert since_checkpoint(rng, reviewed, cwd=repo.root) == rng
+
+
+def test_since_checkpoint_without_checkpoint(repo):
+    _feature(repo)
+    rng = resolve_range("feat", "main", remote="", cwd=repo.root)
+
+    assert since_checkpoint(rng, None, cwd=repo.root) == rng
+    # Checkpoint que sumiu do repositório (gc depois de um force-push)
+    assert since_checkpoint(rng, "0" * 40, cwd=repo.root) == rng
+
+
+def test_checkpoints_round_trip(repo):
+    _feature(repo)
+    rng = resolve_range("feat", "main", remote="", cwd=repo.root)
+
+    save_checkpoints(repo.root, [rng])
+
+    checkpoints = load_checkpoints(repo.root)
+    assert checkpoint_tip(checkpoints, "feat") == rng.tip_sha
+    assert checkpoint_tip(checkpoints, "outra") is None
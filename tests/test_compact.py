@@ -0,0 +1,76 @@
+import pytest
+
+from code_review.compact import CompactOptions, compact_patch
+
+HELPER = (
+    "def helper(values):\n"
+    "    total = 0\n"
+    "    for value in values:\n"
+    "        total += value\n"
+    "    return total\n"
+)
+
+
+@pytest.fixture
+def moved_patch(repo):
+    """Patch em que `helper` sai de a.py e entra, igual, em b.py."""
+    repo.commit("base", {"a.py": f"import os\n\n\n{HELPER}\n\nX = 1\n", "b.py": "Y = 2\n"})
+    base = repo.git("rev-parse", "HEAD").strip()
+    repo.commit("move helper", {"a.py": "import os\n\n\nX = 1\n", "b.py": f"Y = 2\n\n\n{HELPER}"})
+    return repo.git("diff", base, "HEAD").splitlines(keepends=True)
+
+
+def _compact(lines, **options):
+    return list(compact_patch(lines, CompactOptions(**options)))
+
+
+def test_moved_block_becomes_a_reference(moved_patch):
+    out = _compact(moved_patch)
+
+    assert "+⟲ 5 linha(s) movida(s) de a.py:4\n" in out
+    assert not any(line.startswith("+") and "total += value" in line for line in out)
+    # Remoções viram resumo (padrão `summary`)
+    assert not any(line.startswith("-    ") for line in out)
+    assert any(line.startswith("-⋯ ") for line in out)
+    # Cabeçalhos de arquivo e de hunk passam intactos
+    assert [line for line in out if line.startswith(("diff ", "@@"))] == [
+        line for line in moved_patch if line.startswith(("diff ", "@@"))
+    ]
+
+
+def test_keep_without_collapse_is_identity(moved_patch):
+    assert _compact(moved_patch, removed="keep", collapse_moved=False) == moved_patch
+
+
+def test_drop_removes_deleted_lines(moved_patch):
+    out = _compact(moved_patch, removed="drop")
+
+    assert not any(line.startswith("-") and not line.startswith("---") for line in out)
+    assert "+⟲ 5 linha(s) movida(s) de a.py:4\n" in out
+
+
+def test_short_blocks_are_not_collapsed(moved_patch):
+    out = _compact(moved_patch, min_moved_lines=6)
+
+    assert "+        total += value\n" in out
+    assert not any("⟲" in line for line in out)
+
+
+def test_reindented_block_in_place_is_kept(repo):
+    repo.commit("base", {"c.py": HELPER})
+    base = repo.git("rev-parse", "HEAD").strip()
+    indented = "".join(f"    {line}" for line in HELPER.splitlines(keepends=True))
+    repo.commit("reindenta", {"c.py": f"class Box:\n{indented}"})
+    patch = repo.git("diff", base, "HEAD").splitlines(keepends=True)
+
+    out = _compact(patch, removed="keep")
+
+    assert out == patch
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        CompactOptions(removed="talvez")
+    with pytest.raises(ValueError):
+        CompactOptions(context=-1)
+    assert CompactOptions(context=1, function_context=True).git_args() == ("-U1", "--function-context")
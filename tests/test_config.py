@@ -0,0 +1,179 @@
+import pytest
+
+from code_review.archive import RetentionPolicy
+from code_review.compact import CompactOptions
+from code_review.config import (
+    CONFIG_PATH,
+    ConfigError,
+    PathspecProfile,
+    compile_pattern,
+    load_archive,
+    load_pathspec,
+    parse_archive,
+    parse_compact,
+    parse_profile,
+)
+
+
+@pytest.mark.parametrize(
+    "pattern, exclude, pathspec",
+    [
+        # `.`: o repositório inteiro
+        (".", False, "."),
+        ("./", False, "."),
+        (".", True, ":(exclude)."),
+        # Glob sem `/`: sem a mágica glob, `*` atravessa diretórios
+        ("*.md", False, "*.md"),
+        ("*.md", True, ":(exclude)*.md"),
+        # Nome de arquivo sem `/`: em qualquer nível
+        ("yarn.lock", True, ":(exclude,glob)**/yarn.lock"),
+        # Diretório: em qualquer nível, ou a partir da raiz com `/`
+        ("vendor/", True, ":(exclude,glob)**/vendor/**"),
+        ("src/", False, ":(glob)**/src/**"),
+        ("/build/", True, ":(exclude,glob)build/**"),
+        # Ancorados e com `/` no meio: relativos à raiz
+        ("/setup.py", False, ":(glob)setup.py"),
+        ("docs/api/*.json", True, ":(exclude,glob)docs/api/*.json"),
+    ],
+)
+def test_compile_pattern(pattern, exclude, pathspec):
+    assert compile_pattern(pattern, exclude=exclude) == pathspec
+
+
+FILES = [
+    "README.md",
+    "docs/guia.md",
+    "src/app.py",
+    "src/vendor/lib.py",
+    "vendor/mod.go",
+    "build/out.txt",
+    "pkg/build/keep.txt",
+    "yarn.lock",
+    "web/yarn.lock",
+    "docs/api/a.json",
+    "docs/api/v1/b.json",
+    "setup.py",
+    "pkg/setup.py",
+]
+
+
+@pytest.fixture
+def tree(repo):
+    base = repo.git("rev-parse", "HEAD").strip()
+    tip = repo.commit("arquivos", {path: f"{path}\n" for path in FILES})
+    return repo, base, tip
+
+
+def _diff_paths(repo, base, tip, pathspec):
+    return set(repo.git("diff", "--name-only", base, tip, "--", *pathspec).splitlines())
+
+
+def test_git_applies_the_compiled_excludes(tree):
+    repo, base, tip = tree
+    profile = PathspecProfile(exclude=("vendor/", "/build/", "yarn.lock", "docs/api/*.json"))
+
+    assert _diff_paths(repo, base, tip, profile.compile()) == {
+        "src/app.py",
+        "pkg/build/keep.txt",
+        "docs/api/v1/b.json",
+        "setup.py",
+        "pkg/setup.py",
+    }
+
+
+def test_git_applies_the_compiled_includes(tree):
+    repo, base, tip = tree
+    profile = PathspecProfile(include=("src/", "/setup.py"), presets=())
+
+    assert _diff_paths(repo, base, tip, profile.compile()) == {"src/app.py", "src/vendor/lib.py", "setup.py"}
+
+
+def test_default_profile_only_drops_markdown(tree):
+    repo, base, tip = tree
+
+    assert _diff_paths(repo, base, tip, load_pathspec(repo.root)) == {
+        path for path in FILES if not path.endswith(".md")
+    }
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        ({"pathspec": ["docs"]}, "'pathspec' deve ser uma tabela."),
+        ({"pathspec": {"presets": "docs"}}, "'pathspec.presets' deve ser uma lista"),
+        ({"pathspec": {"exclude": ["ok", ""]}}, "'pathspec.exclude' deve ser uma lista"),
+        ({"pathspec": {"include": [1]}}, "'pathspec.include' deve ser uma lista"),
+        ({"pathspec": {"presets": ["docs", "rust"]}}, "Preset desconhecido: rust."),
+    ],
+)
+def test_parse_profile_errors(data, message):
+    with pytest.raises(ConfigError, match=message.replace(".", r"\.")):
+        parse_profile(data)
+
+
+def test_parse_profile_deduplicates_presets_and_excludes():
+    profile = parse_profile({"pathspec": {"presets": ["node", "generated"], "exclude": ["dist/", "gen/"]}})
+
+    patterns = profile.patterns()
+    assert len(patterns) == len(set(patterns))
+    assert patterns.index("node_modules/") < patterns.index("gen/")
+
+
+@pytest.mark.parametrize(
+    "report",
+    [
+        {"compact": True, "context": "1"},
+        {"compact": True, "context": True},
+        {"compact": True, "moved": "sim"},
+        {"compact": True, "removed": "talvez"},
+        {"compact": True, "context": -1},
+    ],
+)
+def test_parse_compact_errors(report):
+    with pytest.raises(ConfigError, match="'report"):
+        parse_compact({"report": report})
+
+
+def test_parse_compact():
+    assert parse_compact({}) is None
+    assert parse_compact({"report": {"compact": False, "context": "ignorado"}}) is None
+    assert parse_compact({"report": {"compact": True, "context": 1, "removed": "drop", "moved": False}}) == (
+        CompactOptions(context=1, removed="drop", collapse_moved=False)
+    )
+    with pytest.raises(ConfigError, match="'report' deve ser uma tabela"):
+        parse_compact({"report": "compacto"})
+
+
+@pytest.mark.parametrize(
+    "archive, key",
+    [
+        ({"max_age_days": -1}, "max_age_days"),
+        ({"max_age_days": "30"}, "max_age_days"),
+        ({"max_versions": 2.5}, "max_versions"),
+        ({"max_versions": True}, "max_versions"),
+        ({"max_bytes": -10}, "max_bytes"),
+    ],
+)
+def test_parse_archive_errors(archive, key):
+    with pytest.raises(ConfigError, match=f"'archive.{key}' deve ser um número não negativo"):
+        parse_archive({"archive": archive})
+
+
+def test_parse_archive():
+    assert parse_archive({}) == RetentionPolicy()
+    assert parse_archive({"archive": {"enabled": False, "max_versions": -1}}) is None
+    # 0 desliga o limite; dias aceitam fração
+    assert parse_archive({"archive": {"max_age_days": 0.5, "max_versions": 0}}) == RetentionPolicy(
+        max_age_days=0.5, max_versions=None
+    )
+    with pytest.raises(ConfigError, match="'archive' deve ser uma tabela"):
+        parse_archive({"archive": []})
+
+
+def test_invalid_toml_is_a_config_error(repo):
+    path = repo.root / CONFIG_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("[archive\nmax_versions = 1\n", encoding="utf-8")
+
+    with pytest.raises(ConfigError, match="config.toml"):
+        load_archive(repo.root)
@@ -0,0 +1,46 @@
+from code_review.diff_parser import parse_raw_line
+
+SHA_A = "a" * 40
+SHA_B = "b" * 40
+
+
+def test_parse_raw_line_modified():
+    entry = parse_raw_line(f":100644 100755 {SHA_A} {SHA_B} M\tsrc/app.py\n")
+
+    assert (entry.old_mode, entry.new_mode) == ("100644", "100755")
+    assert (entry.old_sha, entry.new_sha) == (SHA_A, SHA_B)
+    assert entry.status == "M"
+    assert entry.path == "src/app.py"
+    assert entry.old_display_path is None
+    assert entry.paths == ("src/app.py",)
+
+
+def test_parse_raw_line_rename_keeps_both_paths():
+    entry = parse_raw_line(f":100644 100644 {SHA_A} {SHA_B} R087\tantigo/a.py\tnovo/a.py\n")
+
+    assert entry.status == "R087"
+    assert entry.path == "novo/a.py"
+    assert entry.old_path == "antigo/a.py"
+    assert entry.paths == ("antigo/a.py", "novo/a.py")
+
+
+def test_parse_raw_line_unquotes_paths():
+    entry = parse_raw_line(f':000000 100644 {"0" * 40} {SHA_B} A\t"dir/caf\\303\\251 \\"x\\".txt"\n')
+
+    assert entry.display_path == '"dir/caf\\303\\251 \\"x\\".txt"'
+    assert entry.path == 'dir/café "x".txt'
+
+
+def test_parse_raw_line_from_git(repo):
+    repo.commit("base", {"a.py": "".join(f"linha {i}\n" for i in range(20)), "b.txt": "b\n"})
+    repo.git("mv", "a.py", "c.py")
+    repo.write("b.txt", "b2\n")
+    repo.commit("renomeia e altera")
+
+    raw = repo.git("diff", "--raw", "-M", "--abbrev=40", "HEAD~1", "HEAD")
+    entries = {entry.path: entry for entry in map(parse_raw_line, raw.splitlines(keepends=True))}
+
+    assert entries["c.py"].status.startswith("R")
+    assert entries["c.py"].old_path == "a.py"
+    assert entries["b.txt"].status == "M"
+    assert len(entries["b.txt"].new_sha) == 40
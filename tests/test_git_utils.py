@@ -0,0 +1,74 @@
+import sys
+import threading
+
+import pytest
+
+from code_review.git_utils import GitError, stream_git
+
+
+@pytest.fixture
+def fake_git(monkeypatch):
+    """Troca o executável do git por um script Python."""
+    git_utils = sys.modules["code_review.git_utils"]
+
+    def use(script):
+        monkeypatch.setattr(git_utils, "_git_command", lambda args: [sys.executable, "-c", script])
+
+    return use
+
+
+def _consume(args):
+    """Lê o stream numa thread, para que um travamento vire falha em vez de pendurar a suíte."""
+    outcome = {}
+
+    def run():
+        try:
+            with stream_git(args) as lines:
+                outcome["lines"] = list(lines)
+        except GitError as e:
+            outcome["error"] = str(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive(), "stream_git travou"
+    return outcome
+
+
+def test_large_stderr_does_not_block_stdout(fake_git):
+    # Bem acima do buffer de um pipe (64 KiB no Linux)
+    fake_git(
+        "import sys\n"
+        "sys.stderr.write('aviso\\n' * 200_000)\n"
+        "sys.stderr.flush()\n"
+        "sys.stdout.write('a\\nb\\n')\n"
+    )
+
+    assert _consume(["diff"]) == {"lines": ["a\n", "b\n"]}
+
+
+def test_failure_reports_stderr(fake_git):
+    fake_git(
+        "import sys\n"
+        "sys.stdout.write('parcial\\n')\n"
+        "sys.stderr.write('x' * 100_000 + '\\nfatal: ruim\\n')\n"
+        "sys.exit(128)\n"
+    )
+
+    outcome = _consume(["log"])
+
+    assert outcome["error"].startswith("git log: xxx")
+    assert outcome["error"].endswith("fatal: ruim")
+
+
+def test_failure_without_stderr(fake_git):
+    fake_git("raise SystemExit(3)")
+
+    assert _consume(["show"])["error"] == "git show: código 3"
+
+
+def test_early_stop_kills_the_process(fake_git):
+    fake_git("import sys\nfor i in range(10_000_000):\n    sys.stdout.write(f'{i}\\n')\n")
+
+    with stream_git(["log"]) as lines:
+        assert next(lines) == "0\n"
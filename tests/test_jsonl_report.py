@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from code_review.jsonl_report import ReportIndex, index_filename, write_jsonl_report
+from code_review.report import resolve_range
+
+
+def _numbered(count: int, changed: tuple[int, ...] = ()) -> str:
+    return "".join(f"linha {i}{' alterada' if i in changed else ''}\n" for i in range(count))
+
+
+@pytest.fixture
+def feature(repo):
+    repo.commit("base", {"app.py": _numbered(60), "notas/café.txt": "a\n"})
+    repo.git("checkout", "-q", "-b", "feat")
+    repo.commit(
+        "altera",
+        {"app.py": _numbered(60, changed=(5, 40)), "notas/café.txt": "b\n", "novo.py": "x = 1\n"},
+    )
+    return repo
+
+
+def test_report_index_round_trip(feature, tmp_path):
+    rng = resolve_range("feat", "main", remote="", cwd=feature.root)
+    path = tmp_path / "relatorio.jsonl"
+
+    index_path, count = write_jsonl_report(rng, path, cwd=feature.root)
+
+    assert index_path == index_filename(path)
+    assert count == 3
+    records = [json.loads(line) for line in path.read_bytes().splitlines()]
+    assert records[0]["type"] == "meta"
+    assert records[0]["files"] == ["app.py", "notas/café.txt", "novo.py"]
+
+    index = ReportIndex(index_path)
+    sequential: dict[str, list[dict]] = {}
+    for record in records[1:]:
+        sequential.setdefault(record["path"], []).append(record)
+    assert set(index.files) == set(sequential)
+    for file_path, expected in sequential.items():
+        assert index.file_records(file_path) == expected
+        hunks = [record for record in expected if record["type"] == "hunk"]
+        assert expected[0]["hunks"] == len(hunks)
+        for number, hunk in enumerate(hunks, start=1):
+            assert index.hunk_record(file_path, number) == hunk
+
+
+def test_report_index_hunks(feature, tmp_path):
+    rng = resolve_range("feat", "main", remote="", cwd=feature.root)
+    index_path, _ = write_jsonl_report(rng, tmp_path / "relatorio.jsonl", cwd=feature.root)
+    index = ReportIndex(index_path)
+
+    first, second = index.hunk_record("app.py", 1), index.hunk_record("app.py", 2)
+    assert "+linha 5 alterada\n" in first["text"]
+    assert "+linha 40 alterada\n" in second["text"]
+    # Linhas removidas ficam fora do texto por padrão, mas entram nas contagens
+    assert "-linha 5\n" not in first["text"]
+    assert (first["added"], first["removed"]) == (1, 1)
+    with pytest.raises(IndexError):
+        index.hunk_record("app.py", 3)
+
+
+def test_report_index_rejects_unknown_format(tmp_path):
+    index_path = tmp_path / "relatorio.idx.json"
+    index_path.write_text(json.dumps({"format": 999, "report": "x.jsonl", "files": {}}), encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        ReportIndex(index_path)
@@ -0,0 +1,92 @@
+import hashlib
+import os
+
+import pytest
+
+from code_review import StepTracker, bootstrap_repo
+from code_review.kit_manifest import (
+    CREATED,
+    DRIFTED,
+    UNCHANGED,
+    UNTRACKED,
+    USER_MODIFIED,
+    load_manifest,
+    make_entry,
+    save_manifest,
+)
+
+SCRIPT = ".code_review/scripts/git-relatorio.sh"
+
+
+def _init(root, force=False):
+    summary = bootstrap_repo(root, "claude", "sh", StepTracker("init"), force=force)
+    return {f["path"]: (f["status"], f["written"]) for f in summary["files"]}
+
+
+@pytest.fixture
+def installed(repo):
+    assert set(_init(repo.root).values()) == {(CREATED, True)}
+    return repo.root
+
+
+def test_init_is_idempotent(installed):
+    manifest = load_manifest(installed)
+
+    assert set(_init(installed).values()) == {(UNCHANGED, False)}
+    assert load_manifest(installed) == manifest
+
+
+def test_touch_is_not_an_edit(installed):
+    script = installed / SCRIPT
+    st = script.stat()
+    os.utime(script, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+    assert _init(installed)[SCRIPT] == (UNCHANGED, False)
+    # O stat novo é registrado: a próxima execução decide sem ler o arquivo
+    assert load_manifest(installed)[SCRIPT]["mtime_ns"] == script.stat().st_mtime_ns
+
+
+def test_local_edit_is_kept_unless_forced(installed):
+    script = installed / SCRIPT
+    script.write_text(script.read_text(encoding="utf-8") + "# local\n", encoding="utf-8")
+
+    assert _init(installed)[SCRIPT] == (USER_MODIFIED, False)
+    assert script.read_text(encoding="utf-8").endswith("# local\n")
+    assert _init(installed, force=True)[SCRIPT] == (USER_MODIFIED, True)
+    assert _init(installed)[SCRIPT] == (UNCHANGED, False)
+
+
+def test_same_size_edit_is_detected(installed):
+    script = installed / SCRIPT
+    content = script.read_bytes()
+    script.write_bytes(content.replace(b"main", b"mast", 1))
+    assert script.stat().st_size == len(content)
+
+    assert _init(installed)[SCRIPT] == (USER_MODIFIED, False)
+
+
+def test_old_template_is_updated(installed):
+    # Arquivo gravado por uma versão anterior do template, depois clonado (mtime novo)
+    script = installed / SCRIPT
+    old = b"#!/bin/bash\necho template antigo\n"
+    script.write_bytes(old)
+    manifest = load_manifest(installed)
+    manifest[SCRIPT] = make_entry(SCRIPT, script.stat(), hashlib.sha256(old).hexdigest())
+    save_manifest(installed, manifest, "0.0.0")
+    st = script.stat()
+    os.utime(script, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+    assert _init(installed)[SCRIPT] == (DRIFTED, True)
+    assert script.read_bytes() != old
+
+
+def test_files_without_manifest_entry(installed):
+    (installed / ".code_review" / "manifest").unlink()
+    script = installed / SCRIPT
+    script.write_text("#!/bin/bash\necho versão antiga\n", encoding="utf-8")
+
+    statuses = _init(installed)
+    assert statuses[SCRIPT] == (UNTRACKED, False)
+    assert set(statuses.values()) == {(UNTRACKED, False), (UNCHANGED, False)}
+    assert _init(installed, force=True)[SCRIPT] == (UNTRACKED, True)
+    assert _init(installed)[SCRIPT] == (UNCHANGED, False)
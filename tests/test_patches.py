@@ -0,0 +1,161 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from code_review.diff_parser import parse_raw_line
+from code_review.patches import (
+    _expected_blocks,
+    _iter_batch_outputs,
+    file_patch_key,
+    iter_cached_patch,
+    iter_raw_entries,
+    iter_teed_patch,
+    plan_batches,
+    split_file_patches,
+)
+from code_review.report import ReportOptions, ReportRange, iter_report_lines
+from code_review.report_cache import DiskLRU
+
+
+@pytest.fixture
+def changes(repo):
+    """Base e ponta com modificação, renomeação, criação, remoção e troca de tipo (arquivo -> symlink)."""
+    repo.commit(
+        "base",
+        {
+            "a.py": "".join(f"a {i}\n" for i in range(30)),
+            "antigo.py": "".join(f"r {i}\n" for i in range(30)),
+            "link": "era um arquivo\n",
+            "sai.txt": "tchau\n",
+        },
+    )
+    base = repo.git("rev-parse", "HEAD").strip()
+    repo.write("a.py", "".join(f"a {i}{'!' if i == 10 else ''}\n" for i in range(30)))
+    repo.git("mv", "antigo.py", "novo.py")
+    (repo.root / "link").unlink()
+    os.symlink("a.py", repo.root / "link")
+    (repo.root / "sai.txt").unlink()
+    repo.write("z.txt", "novo\n")
+    tip = repo.commit("mudanças")
+    entries = [
+        parse_raw_line(line)
+        for line in repo.git("diff", "--raw", "--no-abbrev", base, tip).splitlines(keepends=True)
+    ]
+    patch = repo.git("diff", base, tip)
+    return base, tip, entries, patch
+
+
+def test_split_file_patches_round_trip(changes):
+    _, _, entries, patch = changes
+    output = patch.encode("utf-8")
+
+    blocks = split_file_patches(output)
+
+    assert b"".join(blocks) == output
+    assert all(block.startswith(b"diff --git ") for block in blocks)
+    assert len(blocks) == sum(_expected_blocks(entry) for entry in entries)
+
+
+def test_split_file_patches_ignores_content_lines():
+    output = b"diff --git a/x b/x\n@@ -1 +1 @@\n-diff --git a/y b/y\n+ok\n"
+
+    assert split_file_patches(output) == [output]
+    assert split_file_patches(b"") == []
+
+
+def test_expected_blocks_for_type_change(changes):
+    by_path = {entry.path: entry for entry in changes[2]}
+
+    assert by_path["link"].status == "T"
+    assert _expected_blocks(by_path["link"]) == 2
+    assert by_path["novo.py"].status.startswith("R")
+    assert _expected_blocks(by_path["novo.py"]) == 1
+    assert _expected_blocks(by_path["a.py"]) == 1
+
+
+def test_teed_patch_fills_the_file_cache(repo, changes, tmp_path):
+    base, tip, entries, patch = changes
+    cache = DiskLRU(tmp_path / "files", suffix=".patch")
+    counts = {}
+
+    teed = "".join(iter_teed_patch(patch.splitlines(keepends=True), entries, cache, counts=counts))
+
+    assert teed == patch
+    assert counts == {"hits": 0, "misses": len(entries)}
+    blocks = iter(split_file_patches(patch.encode("utf-8")))
+    for entry in entries:
+        expected = b"".join(next(blocks) for _ in range(_expected_blocks(entry)))
+        stored = cache.get(file_patch_key(entry))
+        assert stored is not None and stored.read_bytes() == expected
+
+    # Com um bloco faltando, só ele vai para o git e o patch montado é o mesmo
+    cache.path_for(file_patch_key(entries[0])).unlink()
+    counts = {}
+    cached = "".join(iter_cached_patch(base, tip, entries, cache, cwd=repo.root, counts=counts))
+    assert cached == patch
+    assert counts["hits"] == len(entries) - 1
+
+
+def test_teed_patch_skips_unexpected_blocks(changes, tmp_path):
+    _, _, entries, patch = changes
+    cache = DiskLRU(tmp_path / "files", suffix=".patch")
+
+    # Entradas fora de ordem: nenhum cabeçalho confere, nada é guardado
+    teed = "".join(iter_teed_patch(patch.splitlines(keepends=True), entries[::-1], cache))
+
+    assert teed == patch
+    assert not any(cache.path_for(file_patch_key(entry)).exists() for entry in entries)
+
+
+@pytest.fixture
+def many_changes(repo):
+    """Dezenas de arquivos com renomeações, remoções e caminhos citados/não ASCII."""
+    names = [f"mod/arquivo_{i:02}.txt" for i in range(30)]
+    odd = ["ação/ñandú.txt", "com espaço.txt", 'aspas"duplas.txt', "tab\there.txt", "日本/語.txt"]
+    repo.commit("base", {name: "".join(f"{name} {j}\n" for j in range(12)) for name in [*names, *odd]})
+    base = repo.git("rev-parse", "HEAD").strip()
+    for i, name in enumerate(names):
+        if i % 5 == 0:
+            repo.git("mv", name, name.replace("arquivo", "renomeado"))
+        elif i % 5 == 1:
+            (repo.root / name).unlink()
+        else:
+            repo.write(name, "".join(f"{name} {j}{'*' if j == i % 12 else ''}\n" for j in range(12)))
+    repo.git("mv", "ação/ñandú.txt", "ação/ñandú-2.txt")
+    (repo.root / "com espaço.txt").unlink()
+    repo.write('aspas"duplas.txt', "trocado\n")
+    repo.write("tab\there.txt", "tab\there.txt 0\n")
+    repo.write("novo/ção.txt", "criado\n")
+    tip = repo.commit("muitas mudanças")
+    entries = list(iter_raw_entries(base, tip, [], cwd=repo.root))
+    return repo, base, tip, entries
+
+
+def test_parallel_batches_match_serial_diff(many_changes):
+    repo, base, tip, entries = many_changes
+    serial = subprocess.run(["git", "diff", base, tip], cwd=repo.root, capture_output=True, check=True).stdout
+
+    batches = plan_batches(entries, 4)
+    parallel = b"".join(_iter_batch_outputs(base, tip, batches, workers=4, cwd=repo.root))
+
+    assert len(batches) > 4
+    assert [entry for batch in batches for entry in batch] == entries
+    assert {entry.status[:1] for entry in entries} >= {"R", "D", "M", "A"}
+    assert any(entry.path.startswith("ação/") for entry in entries)
+    assert parallel == serial
+
+
+def test_report_with_workers_is_byte_identical(many_changes, monkeypatch):
+    repo, base, tip, _ = many_changes
+    monkeypatch.setattr(sys.modules["code_review.report"], "_now", lambda: "2026-01-01 10:00:00")
+    rng = ReportRange(target="feat", base="main", base_ref="main", base_sha=base, tip_sha=tip, merge_base=base)
+
+    for keep_removed in (False, True):
+        reports = [
+            "".join(iter_report_lines(rng, cwd=repo.root, options=ReportOptions(workers=workers, keep_removed=keep_removed)))
+            for workers in (1, 4)
+        ]
+        assert reports[0] == reports[1]
+        assert 'rename to "a\\303\\247\\303\\243o/\\303\\261and\\303\\272-2.txt"\n' in reports[0]
@@ -0,0 +1,154 @@
+import os
+import sys
+from contextlib import contextmanager
+
+import pytest
+
+from code_review.diff_parser import parse_raw_line
+from code_review.git_utils import GitError
+from code_review.prefilter import (
+    FileStat,
+    FilterRules,
+    generated_pattern,
+    iter_file_stats,
+    partition,
+    skip_reason,
+)
+
+SHA = "1" * 40
+
+
+@pytest.fixture
+def changes(repo):
+    """Modificação, binário, rename puro e com edição, troca de tipo, remoção e arquivos gerados."""
+    repo.commit(
+        "base",
+        {
+            "app.py": "".join(f"x{i} = {i}\n" for i in range(10)),
+            "antigo.txt": "".join(f"linha {i}\n" for i in range(20)),
+            "movido.txt": "".join(f"m {i}\n" for i in range(20)),
+            "link": "arquivo\n",
+            "sai.txt": "a\nb\n",
+        },
+    )
+    (repo.root / "logo.png").write_bytes(b"\x89PNG\x00\x01")
+    base = repo.commit("binário")
+    repo.write("app.py", "".join(f"x{i} = {i * 10 if i < 3 else i}\n" for i in range(10)))
+    (repo.root / "logo.png").write_bytes(b"\x89PNG\x00\x02\x03")
+    repo.git("mv", "antigo.txt", "novo.txt")
+    repo.git("mv", "movido.txt", "editado.txt")
+    repo.write("editado.txt", "".join(f"m {i}{'!' if i == 5 else ''}\n" for i in range(20)))
+    (repo.root / "link").unlink()
+    os.symlink("app.py", repo.root / "link")
+    (repo.root / "sai.txt").unlink()
+    repo.write("package-lock.json", "{}\n" * 50)
+    repo.write("vendor/lib/x.js", "var x;\n")
+    tip = repo.commit("mudanças")
+    stats = iter_file_stats(base, tip, [], cwd=repo.root)
+    return repo, base, tip, {stat.entry.path: stat for stat in stats}
+
+
+def test_raw_and_numstat_are_paired(changes):
+    _, _, _, stats = changes
+
+    counts = {path: (stat.entry.status[:1], stat.added, stat.deleted) for path, stat in stats.items()}
+    assert counts == {
+        "app.py": ("M", 2, 2),
+        "editado.txt": ("R", 1, 1),
+        "link": ("T", 1, 1),
+        "logo.png": ("M", None, None),
+        "novo.txt": ("R", 0, 0),
+        "package-lock.json": ("A", 50, 0),
+        "sai.txt": ("D", 0, 2),
+        "vendor/lib/x.js": ("A", 1, 0),
+    }
+    assert stats["novo.txt"].entry.old_path == "antigo.txt"
+    assert stats["logo.png"].binary
+
+
+def test_mismatched_counts_raise(monkeypatch):
+    prefilter = sys.modules["code_review.prefilter"]
+
+    @contextmanager
+    def fake_stream(args, cwd=None):
+        yield iter([f":100644 100644 {SHA} {SHA} M\ta.py\n", "1\t1\ta.py\n", "2\t0\tb.py\n"])
+
+    monkeypatch.setattr(prefilter, "stream_git", fake_stream)
+
+    with pytest.raises(GitError, match="1 linha\\(s\\) raw e 2 de numstat"):
+        iter_file_stats("a", "b", [])
+
+
+def _stat(path="src/app.py", added=1, deleted=1, size=None):
+    entry = parse_raw_line(f":100644 100644 {SHA} {SHA} M\t{path}\n")
+    return FileStat(entry, added, deleted, size)
+
+
+@pytest.mark.parametrize(
+    "path, pattern",
+    [
+        ("package-lock.json", "package-lock.json"),
+        ("web/package-lock.json", "package-lock.json"),
+        ("static/app.min.js", "*.min.js"),
+        ("api/v1/service_pb2.py", "*_pb2.py"),
+        ("vendor/lib/x.js", "vendor/"),
+        ("a/node_modules/b/index.js", "node_modules/"),
+        ("src/vendor.py", None),
+        ("dist", None),
+        ("src/app.py", None),
+    ],
+)
+def test_generated_pattern(path, pattern):
+    assert generated_pattern(path, FilterRules().generated_patterns) == pattern
+
+
+@pytest.mark.parametrize(
+    "stat, rules, reason",
+    [
+        (_stat(), FilterRules(), None),
+        (_stat("yarn.lock"), FilterRules(), "gerado (yarn.lock)"),
+        (_stat("yarn.lock"), FilterRules(skip_generated=False), None),
+        (_stat(added=None, deleted=None), FilterRules(), "binário"),
+        (_stat(added=None, deleted=None), FilterRules(skip_binary=False), None),
+        (_stat(added=1500, deleted=501), FilterRules(), "acima de 2000 linhas alteradas"),
+        (_stat(added=1500, deleted=500), FilterRules(), None),
+        (_stat(added=5000, deleted=0), FilterRules(max_lines=None), None),
+        (_stat(size=600 * 1024), FilterRules(), "acima de 512 KB"),
+        (_stat(size=600 * 1024), FilterRules(max_bytes=None), None),
+        # Gerado vence binário e limites
+        (_stat("dist/app.js", added=None, deleted=None, size=10**9), FilterRules(), "gerado (dist/)"),
+    ],
+)
+def test_skip_reason(stat, rules, reason):
+    assert skip_reason(stat, rules) == reason
+
+
+def test_partition_keeps_order_and_reads_blob_sizes(changes):
+    repo, _, _, stats = changes
+    rules = FilterRules(max_lines=2, max_bytes=100)
+
+    kept, skipped = partition(list(stats.values()), rules, cwd=repo.root)
+
+    assert [stat.entry.path for stat in kept] == ["editado.txt", "link", "sai.txt"]
+    assert {item.stat.entry.path: item.reason for item in skipped} == {
+        "app.py": "acima de 2 linhas alteradas",
+        "logo.png": "binário",
+        "novo.txt": "acima de 100 B",
+        "package-lock.json": "gerado (package-lock.json)",
+        "vendor/lib/x.js": "gerado (vendor/)",
+    }
+    sizes = {stat.entry.path: stat.size for stat in [*kept, *(item.stat for item in skipped)]}
+    assert sizes["novo.txt"] == len("".join(f"linha {i}\n" for i in range(20)))
+    # Remoção: tamanho do blob antigo
+    assert sizes["sai.txt"] == 4
+
+
+def test_partition_without_size_limit_skips_cat_file(changes, monkeypatch):
+    repo, _, _, stats = changes
+    prefilter = sys.modules["code_review.prefilter"]
+    monkeypatch.setattr(prefilter, "with_blob_sizes", lambda *a, **k: pytest.fail("cat-file desnecessário"))
+
+    kept, skipped = partition(list(stats.values()), FilterRules(max_bytes=None), cwd=repo.root)
+
+    assert all(stat.size is None for stat in kept)
+    assert len(kept) + len(skipped) == len(stats)
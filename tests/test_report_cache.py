@@ -0,0 +1,61 @@
+import os
+import sys
+
+import pytest
+
+from code_review.report import ReportOptions, generate_report
+
+
+@pytest.fixture
+def feature(repo, monkeypatch):
+    # `code_review.report` como atributo do pacote é o comando da CLI
+    stamps = iter(["2026-01-01 10:00:00", "2026-01-02 11:30:00", "2026-01-03 12:45:00"])
+    monkeypatch.setattr(sys.modules["code_review.report"], "_now", lambda: next(stamps))
+    repo.git("checkout", "-q", "-b", "feat")
+    repo.commit("altera", {"app.py": "x = 1\n"})
+    return repo
+
+
+def _generate(repo, **options):
+    return generate_report("feat", "main", remote="", cwd=repo.root, options=ReportOptions(**options))
+
+
+def _cache_entries(repo):
+    return sorted((repo.root / "diffs" / ".cache" / "reports").iterdir())
+
+
+def test_cache_hit_is_a_restamped_copy(feature):
+    first = _generate(feature, archive=None)
+    [entry] = _cache_entries(feature)
+    cached_body = entry.read_bytes()
+    assert b"**Gerado em:** 2026-01-01 10:00:00\n" in cached_body
+
+    second = _generate(feature, archive=None)
+
+    assert second.cached and second.path == first.path
+    published = second.path.read_bytes()
+    assert not os.path.samefile(entry, second.path)
+    assert published == cached_body.replace(b"2026-01-01 10:00:00", b"2026-01-02 11:30:00")
+    assert entry.read_bytes() == cached_body
+
+
+def test_editing_the_published_report_keeps_the_cache(feature):
+    result = _generate(feature, archive=None)
+    [entry] = _cache_entries(feature)
+    cached_body = entry.read_bytes()
+
+    with open(result.path, "a", encoding="utf-8") as f:
+        f.write("anotação local\n")
+
+    assert entry.read_bytes() == cached_body
+    again = _generate(feature, archive=None)
+    assert again.cached
+    assert b"anota" not in again.path.read_bytes()
+
+
+def test_restamped_hit_is_not_archived(feature):
+    _generate(feature)
+    hit = _generate(feature)
+
+    assert hit.cached
+    assert hit.archived is None
@@ -0,0 +1,116 @@
+import pytest
+
+from code_review.diff_parser import parse_raw_line
+from code_review.report_cache import DiskLRU
+from code_review.semantic import SemanticFilter, apply_hunk, python_fingerprint
+
+SOURCE = b'''def soma(a, b):
+    """Soma.
+
+        Detalhes.
+    """
+    return a + b  # simples
+'''
+
+
+@pytest.mark.parametrize(
+    "other",
+    [
+        # Quebras de linha, aspas e espaços (black/ruff format)
+        b'def soma(\n    a,\n    b,\n):\n    """Soma.\n\n    Detalhes.\n    """\n    return (a + b)  #simples\n',
+        b"def soma(a,b):\n  '''Soma.\n\n  Detalhes.\n  '''\n  return a+b   # simples\n",
+    ],
+)
+def test_fingerprint_ignores_formatting(other):
+    assert python_fingerprint(other) == python_fingerprint(SOURCE)
+
+
+@pytest.mark.parametrize(
+    "other",
+    [
+        SOURCE.replace(b"a + b", b"a - b"),
+        SOURCE.replace(b"# simples", b"# type: ignore"),
+        SOURCE.replace(b"  # simples", b"  # simples  # noqa: E501"),
+        b"# Copyright 2026\n" + SOURCE,
+        SOURCE + b"# return a * b\n",
+    ],
+)
+def test_fingerprint_sees_code_and_comments(other):
+    assert python_fingerprint(other) != python_fingerprint(SOURCE)
+
+
+def test_fingerprint_of_invalid_source():
+    assert python_fingerprint(b"def (:\n") is None
+    assert python_fingerprint(b'x = """sem fim\n') is None
+
+
+OLD = [f"linha {i}\n" for i in range(1, 11)]
+
+
+def test_apply_hunk_replaces_only_its_range():
+    hunk = ["@@ -3,3 +3,3 @@\n", " linha 3\n", "-linha 4\n", "+LINHA 4\n", " linha 5\n"]
+
+    assert apply_hunk(OLD, hunk) == [*OLD[:3], "LINHA 4\n", *OLD[4:]]
+
+
+def test_apply_hunk_insertion_and_mismatch():
+    insertion = ["@@ -2,0 +3,1 @@\n", "+nova\n"]
+    assert apply_hunk(OLD, insertion) == [*OLD[:2], "nova\n", *OLD[2:]]
+
+    stale = ["@@ -3,2 +3,2 @@\n", " linha 3\n", "-outra coisa\n", "+x\n"]
+    assert apply_hunk(OLD, stale) is None
+    assert apply_hunk(OLD, ["não é cabeçalho\n"]) is None
+
+
+@pytest.fixture
+def reformatted(repo):
+    """Um arquivo só reformatado e outro com formatação + uma mudança real."""
+    body = "".join(f"def f{i}(x):\n    return x+{i}\n\n\n" for i in range(12))
+    repo.commit("base", {"fmt.py": "x = {'a':1}\n", "mix.py": body})
+    base = repo.git("rev-parse", "HEAD").strip()
+    changed = body.replace("x+0", "x + 0").replace("x+11", "x - 11")
+    tip = repo.commit("formata", {"fmt.py": 'x = {"a": 1}\n', "mix.py": changed})
+    raw = repo.git("diff", "--raw", "--no-abbrev", base, tip).splitlines(keepends=True)
+    return repo, {entry.path: entry for entry in map(parse_raw_line, raw)}, base, tip
+
+
+def test_filter_patch_marks_formatting_hunks(reformatted):
+    repo, entries, base, tip = reformatted
+    patch = repo.git("diff", base, tip, "--", "mix.py").splitlines(keepends=True)
+    semantic = SemanticFilter(cwd=repo.root)
+    try:
+        out = list(semantic.filter_patch(patch, entries.values()))
+    finally:
+        semantic.close()
+
+    assert "+⋯ 1 hunk(s) omitido(s): apenas formatação (AST e comentários iguais)\n" in out
+    assert "+    return x - 11\n" in out
+    assert "+    return x + 0\n" not in out
+    # Toda linha do bloco continua com um prefixo de diff válido
+    assert all(line[:1] in "d-+ @i\\" for line in out)
+
+
+def test_decisions_are_cached_by_blob_pair(reformatted, tmp_path):
+    repo, entries, _, _ = reformatted
+    cache = DiskLRU(tmp_path / "semantic", suffix=".json")
+    first = SemanticFilter(cache, cwd=repo.root)
+    assert first.formatting_only(entries["fmt.py"])
+    assert not first.formatting_only(entries["mix.py"])
+    first.close()
+    assert len(list(cache.root.iterdir())) == 2
+
+    # Outro processo com o mesmo cache: nenhuma leitura de blob
+    second = SemanticFilter(cache, cwd=repo.root)
+    assert second.formatting_only(entries["fmt.py"])
+    assert not second.formatting_only(entries["mix.py"])
+    assert second._reader is None
+    second.close()
+
+    # Mesmo par de blobs em outro caminho: mesma chave
+    moved = parse_raw_line(
+        f":100644 100644 {entries['fmt.py'].old_sha} {entries['fmt.py'].new_sha} M\toutro/fmt.py\n"
+    )
+    third = SemanticFilter(cache, cwd=repo.root)
+    assert third.formatting_only(moved)
+    assert third._reader is None
+    third.close()
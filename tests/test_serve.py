@@ -0,0 +1,191 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from code_review.checkpoints import CHECKPOINTS_PATH, load_checkpoints
+from code_review.report import ReportOptions
+from code_review.serve import (
+    INVALID_PARAMS,
+    INVALID_REQUEST,
+    METHOD_NOT_FOUND,
+    PARSE_ERROR,
+    SERVER_ERROR,
+    ReportService,
+    allowed_host,
+    handle_rpc,
+    make_http_server,
+)
+
+
+@pytest.fixture
+def service(repo):
+    repo.git("checkout", "-q", "-b", "feat")
+    repo.commit("altera", {"app.py": "".join(f"x{i} = {i}\n" for i in range(20))})
+    repo.commit("mais", {"app.py": "".join(f"x{i} = {i * 2 if i in (1, 18) else i}\n" for i in range(20))})
+    service = ReportService(repo.root, remote="", options=ReportOptions(archive=None))
+    yield service
+    service.close()
+
+
+def _rpc(service, method, params=None, request_id=1):
+    request = {"jsonrpc": "2.0", "id": request_id, "method": method}
+    if params is not None:
+        request["params"] = params
+    return handle_rpc(service, json.dumps(request))
+
+
+def _error_code(response):
+    return response["error"]["code"]
+
+
+@pytest.mark.parametrize(
+    "payload, code",
+    [
+        ("{não é json", PARSE_ERROR),
+        ("[1, 2]", INVALID_REQUEST),
+        ('{"jsonrpc": "2.0", "id": 1}', INVALID_REQUEST),
+        ('{"jsonrpc": "2.0", "id": 1, "method": "apaga"}', METHOD_NOT_FOUND),
+    ],
+)
+def test_malformed_requests(service, payload, code):
+    assert _error_code(handle_rpc(service, payload)) == code
+
+
+def test_bad_params_and_server_errors(service):
+    assert _error_code(_rpc(service, "hunk", {"path": "app.py"})) == INVALID_PARAMS
+    assert _error_code(_rpc(service, "ping", ["extra"])) == INVALID_PARAMS
+    assert _error_code(_rpc(service, "hunk", {"path": "app.py", "n": 9, "branch": "feat"})) == SERVER_ERROR
+    assert _error_code(_rpc(service, "file", {"path": "outro.py", "branch": "feat"})) == SERVER_ERROR
+    assert _error_code(_rpc(service, "files", {"branch": "nao-existe"})) == SERVER_ERROR
+
+
+def test_notifications_have_no_response(service):
+    assert handle_rpc(service, '{"jsonrpc": "2.0", "method": "ping"}') is None
+    assert _rpc(service, "ping") == {"jsonrpc": "2.0", "id": 1, "result": "pong"}
+
+
+def test_files_and_hunks(service):
+    [entry] = _rpc(service, "files", {"branch": "feat"})["result"]
+    assert entry == {
+        "path": "app.py",
+        "old_path": "app.py",
+        "status": "A",
+        "hunks": 1,
+        "added": 20,
+        "removed": 0,
+    }
+
+    hunk = _rpc(service, "hunk", ["app.py", 1, "feat"])["result"]
+    assert "+x18 = 36\n" in hunk["text"]
+    assert _rpc(service, "file", {"path": "app.py", "branch": "feat"})["result"]["text"].startswith("diff --git")
+
+
+def test_lru_hits(service):
+    first = _rpc(service, "report", {"branch": "feat"})["result"]
+    misses = service.stats()["misses"]
+
+    second = _rpc(service, "report", {"branch": "feat", "text": False})["result"]
+
+    assert not first["cached"]
+    assert second["cached"] and second["path"] == first["path"]
+    assert "text" not in second
+    assert service.stats()["misses"] == misses
+    assert service.stats()["hits"] >= 1
+
+
+def test_checkpoint_only_when_generated_or_asked(repo, service):
+    checkpoints = service.root / CHECKPOINTS_PATH
+    first = service.report("feat")
+    assert load_checkpoints(service.root)["feat"]["tip"] == first["tip"]
+
+    checkpoints.unlink()
+    service.report("feat")
+    assert not checkpoints.exists()
+
+    service.report("feat", checkpoint=True)
+    assert load_checkpoints(service.root)["feat"]["tip"] == first["tip"]
+
+    checkpoints.unlink()
+    repo.commit("outra", {"app.py": "y = 1\n"})
+    assert not service.report("feat", checkpoint=False)["cached"]
+    assert not checkpoints.exists()
+
+
+@pytest.mark.parametrize(
+    "host, allowed",
+    [
+        ("127.0.0.1:8765", True),
+        ("localhost", True),
+        ("LOCALHOST:80", True),
+        ("evil.example:8765", False),
+        ("127.0.0.1.evil.example", False),
+        ("", False),
+        (None, False),
+    ],
+)
+def test_allowed_host(host, allowed):
+    assert allowed_host(host) is allowed
+
+
+@pytest.fixture
+def http_call(service):
+    server = make_http_server(service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def send(method, path, body=None, host=None):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=30)
+        try:
+            conn.putrequest(method, path, skip_host=host is not None)
+            if host is not None:
+                conn.putheader("Host", host)
+            if body is not None:
+                conn.putheader("Content-Length", str(len(body)))
+            conn.endheaders(body.encode() if body is not None else None)
+            response = conn.getresponse()
+            return response.status, response.read().decode("utf-8")
+        finally:
+            conn.close()
+
+    yield send
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_routes(http_call):
+    status, text = http_call("GET", "/report?branch=feat")
+    assert status == 200 and text.startswith("#")
+
+    status, text = http_call("GET", "/files?branch=feat")
+    assert status == 200 and json.loads(text)[0]["path"] == "app.py"
+
+    status, text = http_call("GET", "/hunk?branch=feat&path=app.py&n=1")
+    assert status == 200 and "+x1 = 2\n" in text
+
+    status, text = http_call("GET", "/hunk?branch=feat&path=app.py&n=1&format=json")
+    assert status == 200 and json.loads(text)["path"] == "app.py"
+
+    assert http_call("GET", "/ping") == (200, "pong\n")
+    assert json.loads(http_call("GET", "/stats")[1])["entries"] >= 1
+
+
+def test_http_errors(http_call):
+    assert http_call("GET", "/hunk?branch=feat")[0] == 400
+    assert http_call("GET", "/hunk?branch=feat&path=app.py&n=9")[0] == 404
+    assert http_call("GET", "/nada")[0] == 404
+    assert http_call("POST", "/outro", "{}")[0] == 404
+
+
+def test_http_rpc(http_call):
+    status, text = http_call("POST", "/rpc", json.dumps({"jsonrpc": "2.0", "id": 7, "method": "ping"}))
+    assert status == 200 and json.loads(text) == {"jsonrpc": "2.0", "id": 7, "result": "pong"}
+    assert http_call("POST", "/rpc", json.dumps({"jsonrpc": "2.0", "method": "ping"}))[0] == 204
+
+
+def test_http_rejects_foreign_host(http_call):
+    assert http_call("GET", "/ping", host="localhost")[0] == 200
+    assert http_call("GET", "/report?branch=feat", host="evil.example")[0] == 403
+    status, _ = http_call("POST", "/rpc", json.dumps({"jsonrpc": "2.0", "id": 1, "method": "ping"}), host="evil.example")
+    assert status == 403
@@ -0,0 +1,143 @@
+import json
+
+import pytest
+
+from code_review.diff_parser import iter_file_diffs
+from code_review.report import ReportOptions, generate_report
+from code_review.shard import (
+    DIFF_FENCE,
+    FENCE_END,
+    _chunks_for_file,
+    _size,
+    split_report_stream,
+    tokens_to_bytes,
+)
+
+
+def _lines(changed: tuple[int, ...] = ()) -> str:
+    return "".join(f"linha de código de exemplo número {i}{' alterada' if i in changed else ''}\n" for i in range(200))
+
+
+@pytest.fixture
+def feature(repo):
+    """`grande.py` com três hunks distantes e arquivos pequenos antes e depois."""
+    repo.commit("base", {"a.txt": "a\n", "grande.py": _lines(), "z.txt": "z\n"})
+    repo.git("checkout", "-q", "-b", "feat")
+    repo.commit(
+        "altera",
+        {
+            "a.txt": "a mudou\n",
+            "grande.py": _lines(changed=(20, 100, 180)),
+            "z.txt": "z mudou\n",
+        },
+    )
+    return repo
+
+
+def _generate(repo, **options):
+    return generate_report(
+        "feat", "main", remote="", cwd=repo.root, options=ReportOptions(use_cache=False, archive=None, **options)
+    )
+
+
+def _part_patch(path):
+    lines = path.read_text(encoding="utf-8").splitlines(keepends=True)
+    assert lines[2] == DIFF_FENCE and lines[-1] == FENCE_END
+    return lines[3:-1]
+
+
+def test_chunks_split_at_hunk_boundaries(feature):
+    patch = feature.git("diff", "main", "feat", "--", "grande.py").splitlines(keepends=True)
+    [file_diff] = iter_file_diffs(patch)
+    assert len(file_diff.hunks) == 3
+    two_hunks = _size(file_diff.header) + _size(file_diff.hunks[0]) + _size(file_diff.hunks[1])
+
+    chunks = list(_chunks_for_file(file_diff, two_hunks))
+
+    assert [hunks for _, _, hunks in chunks] == [2, 1]
+    assert [size for _, size, _ in chunks] == [_size(lines) for lines, _, _ in chunks]
+    for lines, _, _ in chunks:
+        assert lines[: len(file_diff.header)] == file_diff.header
+    assert [line for lines, _, _ in chunks for line in lines[len(file_diff.header):]] == [
+        line for hunk in file_diff.hunks for line in hunk
+    ]
+
+    # Orçamento menor que um hunk: cada hunk vira um bloco próprio
+    assert [hunks for _, _, hunks in _chunks_for_file(file_diff, 1)] == [1, 1, 1]
+
+
+def test_chunks_of_a_file_without_hunks(repo):
+    repo.commit("base", {"antigo.txt": "x\n"})
+    repo.git("mv", "antigo.txt", "novo.txt")
+    repo.commit("renomeia")
+    [file_diff] = iter_file_diffs(repo.git("diff", "HEAD~1", "HEAD").splitlines(keepends=True))
+
+    assert list(_chunks_for_file(file_diff, 1)) == [(file_diff.header, _size(file_diff.header), 0)]
+
+
+def test_sharded_report_keeps_the_patch_and_the_budget(feature):
+    full = _generate(feature).path.read_text(encoding="utf-8").splitlines(keepends=True)
+    _, patch, _ = split_report_stream(full)
+    patch = list(patch)
+    budget = 900
+
+    result = _generate(feature, shard_bytes=budget)
+
+    manifest = json.loads(result.manifest.read_text(encoding="utf-8"))
+    parts = [result.path.with_name(shard["file"]) for shard in manifest["shards"]]
+    assert len(parts) > 2
+    assert all(shard["bytes"] == part.stat().st_size for shard, part in zip(manifest["shards"], parts))
+    assert all(shard["bytes"] <= budget for shard in manifest["shards"])
+    # Os hunks de grande.py, repetindo o cabeçalho, remontam o patch original
+    rebuilt = []
+    for part in parts:
+        for file_diff in iter_file_diffs(_part_patch(part)):
+            if rebuilt and rebuilt[-1].header == file_diff.header:
+                rebuilt[-1].hunks.extend(file_diff.hunks)
+            else:
+                rebuilt.append(file_diff)
+    assert [line for file_diff in rebuilt for line in file_diff.lines] == patch
+
+
+def test_manifest_describes_files_and_parts(feature):
+    result = _generate(feature, shard_bytes=900)
+
+    manifest = json.loads(result.manifest.read_text(encoding="utf-8"))
+    files = {entry["path"]: entry for entry in manifest["files"]}
+
+    assert manifest["report"] == result.path.name
+    assert manifest["target"] == "feat" and manifest["budget_bytes"] == 900
+    assert list(files) == ["a.txt", "grande.py", "z.txt"]
+    assert files["grande.py"]["hunks"] == 3
+    assert len(files["grande.py"]["shards"]) > 1
+    for path, entry in files.items():
+        listed = [
+            item["hunks"]
+            for shard in manifest["shards"]
+            for item in shard["files"]
+            if item["path"] == path
+        ]
+        assert sum(listed) == entry["hunks"]
+        assert [s["index"] for s in manifest["shards"] if path in {f["path"] for f in s["files"]}] == entry["shards"]
+    for shard in manifest["shards"]:
+        assert shard["approx_tokens"] == shard["bytes"] // 4
+        assert shard["file"] in result.path.read_text(encoding="utf-8")
+
+
+def test_token_budget_and_stale_parts(feature):
+    small = _generate(feature, shard_bytes=tokens_to_bytes(200))
+    stem = small.path.name[: -len(".md")]
+    assert len(list(small.path.parent.glob(f"{stem}.part-*.md"))) > 1
+
+    large = _generate(feature, shard_bytes=tokens_to_bytes(100_000))
+
+    manifest = json.loads(large.manifest.read_text(encoding="utf-8"))
+    assert manifest["budget_bytes"] == 400_000
+    assert [shard["file"] for shard in manifest["shards"]] == [f"{stem}.part-001.md"]
+    assert [p.name for p in large.path.parent.glob(f"{stem}.part-*.md")] == [f"{stem}.part-001.md"]
+
+    # Sem divisão, partes e manifesto antigos somem
+    plain = _generate(feature)
+    assert plain.manifest is None
+    assert not list(plain.path.parent.glob(f"{stem}.part-*"))
+    assert not large.manifest.exists()
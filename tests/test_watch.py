@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+
+from code_review.watch import ReportScheduler, changed_branches, snapshot_refs
+
+A, B, C = "a" * 40, "b" * 40, "c" * 40
+
+
+@pytest.mark.parametrize(
+    "before, after, expected",
+    [
+        # Só uma branch andou
+        (({"x": A, "y": A}, B), ({"x": A, "y": C}, B), ["y"]),
+        # Branch nova entra; branch apagada não
+        (({"x": A, "y": A}, B), ({"x": A, "z": A}, B), ["z"]),
+        # A base andou: todas as branches observadas
+        (({"x": A, "y": A}, B), ({"x": A, "y": A}, C), ["x", "y"]),
+        # Base que aparece (primeiro fetch) também conta como mudança
+        (({"x": A}, None), ({"x": A}, B), ["x"]),
+        (({"x": A}, B), ({"x": A}, B), []),
+    ],
+)
+def test_changed_branches(before, after, expected):
+    assert changed_branches(before, after) == expected
+
+
+@pytest.fixture
+def branches(repo):
+    main = repo.git("rev-parse", "HEAD").strip()
+    for name in ("feature/a", "feature/deep/b", "fix/c"):
+        repo.git("branch", name)
+    repo.git("checkout", "-q", "-b", "outra")
+    other = repo.commit("outra", {"o.txt": "o\n"})
+    repo.git("checkout", "-q", "main")
+    return repo, main, other
+
+
+def test_snapshot_includes_nested_refs(branches):
+    repo, main, other = branches
+
+    refs, base = snapshot_refs(repo.root, "*", "main", "")
+
+    assert refs == {"feature/a": main, "feature/deep/b": main, "fix/c": main, "outra": other}
+    assert base == main
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        # Glob do for-each-ref: `*` não atravessa `/`
+        ("feature/*", {"feature/a"}),
+        # Sem glob, casa o prefixo até uma `/`, com todas as subpastas
+        ("feature", {"feature/a", "feature/deep/b"}),
+        ("", {"feature/a", "feature/deep/b", "fix/c", "outra"}),
+    ],
+)
+def test_snapshot_patterns(branches, pattern, expected):
+    repo = branches[0]
+
+    assert set(snapshot_refs(repo.root, pattern, "main", "")[0]) == expected
+
+
+def test_snapshot_prefers_the_remote_base(branches):
+    repo, main, other = branches
+    repo.git("update-ref", "refs/remotes/origin/main", other)
+
+    refs, base = snapshot_refs(repo.root, "*", "main", "origin")
+    assert base == other
+    # A base local não é uma branch observada, mesmo com a remota em uso
+    assert "main" not in refs
+
+    assert snapshot_refs(repo.root, "*", "main", "")[1] == main
+    # Remoto sem a ref da base: volta para a local
+    assert snapshot_refs(repo.root, "*", "main", "upstream")[1] == main
+    assert snapshot_refs(repo.root, "*", "develop", "origin")[1] is None
+
+
+def test_scheduler_reruns_a_busy_branch_once():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def build(branch):
+        calls.append(branch)
+        if len(calls) == 1:
+            started.set()
+            assert release.wait(10)
+
+    scheduler = ReportScheduler(build, jobs=2)
+    scheduler.request("feat")
+    assert started.wait(10)
+    # Três pedidos durante a geração viram uma única nova execução
+    for _ in range(3):
+        scheduler.request("feat")
+    release.set()
+    scheduler.shutdown(wait=True)
+
+    assert calls == ["feat", "feat"]
+
+
+def test_scheduler_runs_different_branches_in_parallel():
+    barrier = threading.Barrier(2, timeout=10)
+    calls = []
+
+    def build(branch):
+        calls.append(branch)
+        # Só passa se as duas branches estiverem gerando ao mesmo tempo
+        barrier.wait()
+
+    scheduler = ReportScheduler(build, jobs=2)
+    scheduler.request("a")
+    scheduler.request("b")
+    scheduler.shutdown(wait=True)
+
+    assert sorted(calls) == ["a", "b"]
+    assert not barrier.broken
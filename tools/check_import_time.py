@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Checagem de regressão do tempo de inicialização da CLI.
+
+Roda `python -X importtime -c "import code_review"` em um processo limpo e
+falha se:
+- algum módulo da pilha de UI/metadata, ou usado por um só comando, for
+  importado no caminho não interativo;
+- o tempo cumulativo de importação passar do orçamento (padrão: 70 ms, bem
+  abaixo dos 100 ms percebidos como instantâneos);
+- o tempo próprio dos módulos `code_review*` (sem as dependências) passar de
+  `--own-budget-ms` (padrão: 10 ms). Essa parte varia pouco entre máquinas:
+  numa máquina lenta, em que só o typer já passa do orçamento total, é ela
+  que aponta uma regressão.
+
+Uso:
+    python tools/check_import_time.py [--budget-ms 70] [--own-budget-ms 10] [--runs 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Não devem ser carregados só por importar a CLI
+FORBIDDEN_MODULES = (
+    "rich.console",
+    "rich.live",
+    "rich.panel",
+    "rich.tree",
+    "rich.table",
+    "rich.align",
+    "readchar",
+    "importlib.metadata",
+    "code_review.report",
+    "code_review.batch",
+    "code_review.history",
+    "code_review.kit_manifest",
+    "json",
+    "hashlib",
+)
+
+
+def measure(statement: str) -> tuple[int, int, set[str]]:
+    """Retorna (tempo cumulativo de `code_review` e próprio dos `code_review*` em µs, módulos importados)."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    modules = set()
+    total = own = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_time, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # cabeçalho
+        module = name.strip()
+        modules.add(module)
+        if module == "code_review":
+            total = int(cumulative)
+        if module == "code_review" or module.startswith("code_review."):
+            own += int(self_time.rsplit(":", 1)[1])
+    return total, own, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=70.0)
+    parser.add_argument("--own-budget-ms", type=float, default=10.0, help="Orçamento dos módulos code_review*")
+    parser.add_argument("--runs", type=int, default=5, help="Usa a mediana de N execuções")
+    args = parser.parse_args()
+
+    timings = []
+    own_timings = []
+    modules: set[str] = set()
+    for _ in range(args.runs):
+        total, own, modules = measure("import code_review")
+        timings.append(total)
+        own_timings.append(own)
+    timings.sort()
+    own_timings.sort()
+    median_ms = timings[len(timings) // 2] / 1000
+    own_ms = own_timings[len(own_timings) // 2] / 1000
+
+    failed = False
+    leaked = sorted(m for m in FORBIDDEN_MODULES if m in modules)
+    if leaked:
+        print(f"[ERR] módulos carregados no import da CLI: {', '.join(leaked)}")
+        failed = True
+    summary = (
+        f"import code_review: {median_ms:.1f} ms (orçamento {args.budget_ms:.0f} ms), "
+        f"próprio: {own_ms:.1f} ms (orçamento {args.own_budget_ms:.0f} ms)"
+    )
+    if median_ms > args.budget_ms or own_ms > args.own_budget_ms:
+        print(f"[ERR] {summary}")
+        failed = True
+    if not failed:
+        print(f"[OK] {summary}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())